@@ -0,0 +1,358 @@
+"""
+gRPC Load Generator
+Drives sustained load against one gRPC analytics service and records
+HDR-style latency histograms and error counts per load step:
+
+  closed loop  LOAD_CONCURRENCY virtual clients, each sending its next request
+               as soon as the previous answer arrives
+  open loop    requests sent on a fixed schedule at LOAD_RATE req/s (uniform or
+               Poisson arrivals) whether or not earlier ones completed; latency
+               is measured from the scheduled send time, so queueing in an
+               overloaded server shows up instead of being hidden
+
+LOAD_CONCURRENCY / LOAD_RATE / LOAD_BATCH_SIZES take comma-separated lists and
+each combination is one step; the report names the last step the service still
+sustained, i.e. where the max_workers=8 pool saturates. Requests are serialized
+once up front, so the client spends its time sending, not encoding.
+
+  LOAD_SERVICE=mapreduce LOAD_MODE=open LOAD_RATE=20,40,80 python benchmarks/grpc_load.py
+"""
+import os
+import sys
+import json
+import random
+import threading
+import time
+from datetime import datetime
+
+import grpc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "grpc", "client", "generated"))
+
+import music_service_pb2
+from latency_histogram import LatencyHistogram
+from services import stream_loader
+
+# ───────────────────────────────────────────────
+# Environment Variables
+# ───────────────────────────────────────────────
+def _list(name, default, cast=str):
+    return [cast(v.strip()) for v in os.getenv(name, default).split(",") if v.strip()]
+
+
+LOAD_SERVICE = os.getenv("LOAD_SERVICE", "mapreduce")
+LOAD_MODE = os.getenv("LOAD_MODE", "closed")
+LOAD_CONCURRENCY = _list("LOAD_CONCURRENCY", "1,4,8,16", int)
+LOAD_RATE = _list("LOAD_RATE", "10,20,40", float)
+# "uniform" spaces requests evenly, "poisson" draws exponential gaps
+LOAD_ARRIVALS = os.getenv("LOAD_ARRIVALS", "uniform")
+LOAD_BATCH_SIZES = _list("LOAD_BATCH_SIZES", "1000", int)
+LOAD_DURATION = float(os.getenv("LOAD_DURATION", "10"))
+# Seconds of load before recording starts
+LOAD_WARMUP = float(os.getenv("LOAD_WARMUP", "2"))
+LOAD_TIMEOUT = float(os.getenv("LOAD_TIMEOUT", "30"))
+# Open loop: requests beyond this many outstanding are dropped (and counted) rather than queued in the client
+LOAD_MAX_IN_FLIGHT = int(os.getenv("LOAD_MAX_IN_FLIGHT", "1000"))
+# Separate HTTP/2 connections to spread the load over
+LOAD_CHANNELS = int(os.getenv("LOAD_CHANNELS", "1"))
+# A step counts as sustained while achieved >= LOAD_SUSTAIN x target (open) or
+# throughput still grows by that factor over the previous step (closed)
+LOAD_SUSTAIN = float(os.getenv("LOAD_SUSTAIN", "0.95"))
+LOAD_SEED = int(os.getenv("LOAD_SEED", "42"))
+DATA_CSV = os.getenv("DATA_CSV", os.path.join(PROJECT_ROOT, "data", "stream_data.csv"))
+RESULTS_DIR = os.getenv("RESULTS_DIR", os.path.join(PROJECT_ROOT, "results"))
+LOAD_REPORT = os.getenv("LOAD_REPORT", os.path.join(RESULTS_DIR, f"grpc_load_{LOAD_SERVICE}_{LOAD_MODE}.json"))
+
+# service -> (proto service, method, host variable, port variable, default port)
+METHODS = {
+    "mapreduce": ("MapReduceService", "AggregateStream", "MAPREDUCE_HOST", "MAPREDUCE_PORT", "50051"),
+    "userbehavior": ("UserBehaviorService", "AnalyzeUsers", "USERBEHAVIOR_HOST", "USERBEHAVIOR_PORT", "50053"),
+    "genre": ("GenreAnalysisService", "AnalyzeGenres", "GENRE_ANALYSIS_HOST", "GENRE_ANALYSIS_PORT", "50055"),
+    "recommendation": ("RecommendationService", "Recommend", "RECOMMENDATION_HOST", "RECOMMENDATION_PORT", "50057"),
+    "analytics": ("AnalyticsService", "AnalyzeAll", "ANALYTICS_HOST", "ANALYTICS_PORT", "50059"),
+}
+CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", 64 * 1024 * 1024),
+    ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+]
+
+
+def address(service):
+    _, _, host_var, port_var, default_port = METHODS[service]
+    return f"{os.getenv(host_var, 'localhost')}:{os.getenv(port_var, default_port)}"
+
+
+def raw_method(channel, service):
+    """Unary callable taking and returning serialized bytes."""
+    proto_service, method, *_ = METHODS[service]
+    full_name = music_service_pb2.DESCRIPTOR.services_by_name[proto_service].full_name
+    return channel.unary_unary(f"/{full_name}/{method}")
+
+
+def make_channels(n=LOAD_CHANNELS):
+    # a local subchannel pool keeps identical channels on separate connections
+    options = CHANNEL_OPTIONS + [("grpc.use_local_subchannel_pool", 1)]
+    return [grpc.insecure_channel(address(LOAD_SERVICE), options=options) for _ in range(n)]
+
+
+def stream_list(records):
+    pb2 = music_service_pb2
+    return pb2.StreamList(records=[
+        pb2.StreamRecord(
+            user_id=r["user_id"], song_id=r["song_id"], artist=r["artist"],
+            duration=int(r["duration"]), timestamp=r["timestamp"], genre=r.get("genre") or ""
+        )
+        for r in records
+    ])
+
+
+def build_payload(records):
+    """Serialized request for LOAD_SERVICE built from records."""
+    batch = stream_list(records)
+    if LOAD_SERVICE != "recommendation":
+        return batch.SerializeToString()
+    # recommendation consumes the mapreduce and userbehavior answers for the same records
+    pb2 = music_service_pb2
+    upstream = {}
+    for service, response_cls in (("mapreduce", pb2.PlayCounts), ("userbehavior", pb2.UserStatsList)):
+        channel = grpc.insecure_channel(address(service), options=CHANNEL_OPTIONS)
+        try:
+            upstream[service] = response_cls.FromString(raw_method(channel, service)(batch.SerializeToString(), timeout=LOAD_TIMEOUT))
+        finally:
+            channel.close()
+    return pb2.RecommendationRequest(
+        play_counts=pb2.PlayCounts(play_counts=upstream["mapreduce"].play_counts),
+        user_stats=pb2.UserStatsList(user_stats=upstream["userbehavior"].user_stats,
+                                     top_users=upstream["userbehavior"].top_users),
+    ).SerializeToString()
+
+
+def load_records(n):
+    """The first n records of DATA_CSV, repeated when the file is shorter."""
+    records = []
+    for chunk in stream_loader.iter_records(DATA_CSV):
+        records.extend(chunk)
+        if len(records) >= n:
+            return records[:n]
+    if not records:
+        raise ValueError(f"No records in {DATA_CSV}")
+    return (records * -(-n // len(records)))[:n]
+
+
+# ───────────────────────────────────────────────
+# Load step
+# ───────────────────────────────────────────────
+class StepResult:
+    """Latency histogram and outcome counts of the measured window."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = {}
+        self.ok = 0
+        self.dropped = 0
+        self.response_bytes = 0
+        self.lock = threading.Lock()
+        self.recording = False
+
+    def record(self, latency, error=None, response=None):
+        if not self.recording:
+            return
+        if error is not None:
+            with self.lock:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            return
+        self.histogram.record(latency)
+        with self.lock:
+            self.ok += 1
+            self.response_bytes += len(response)
+
+    def drop(self):
+        if self.recording:
+            with self.lock:
+                self.dropped += 1
+
+
+def error_name(e):
+    return e.code().name if isinstance(e, grpc.RpcError) and e.code() else type(e).__name__
+
+
+def run_closed(calls, payload, concurrency, result, stop):
+    def client(call):
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                response = call(payload, timeout=LOAD_TIMEOUT)
+            except Exception as e:
+                result.record(None, error_name(e))
+                continue
+            result.record(time.perf_counter() - start, response=response)
+
+    threads = [threading.Thread(target=client, args=(calls[i % len(calls)],), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def run_open(calls, payload, rate, result, stop):
+    rng = random.Random(LOAD_SEED)
+    idle = threading.Condition()
+    in_flight = [0]
+
+    def done(future, scheduled):
+        try:
+            response = future.result()
+        except Exception as e:
+            result.record(None, error_name(e))
+        else:
+            result.record(time.perf_counter() - scheduled, response=response)
+        with idle:
+            in_flight[0] -= 1
+            idle.notify_all()
+
+    def scheduler():
+        scheduled = time.perf_counter()
+        sent = 0
+        while not stop.is_set():
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with idle:
+                full = in_flight[0] >= LOAD_MAX_IN_FLIGHT
+                if not full:
+                    in_flight[0] += 1
+            if full:
+                result.drop()
+            else:
+                future = calls[sent % len(calls)].future(payload, timeout=LOAD_TIMEOUT)
+                future.add_done_callback(lambda f, s=scheduled: done(f, s))
+                sent += 1
+            scheduled += rng.expovariate(rate) if LOAD_ARRIVALS == "poisson" else 1.0 / rate
+        # let the answers still in flight land (bounded by their deadline)
+        with idle:
+            idle.wait_for(lambda: in_flight[0] == 0, timeout=LOAD_TIMEOUT)
+
+    thread = threading.Thread(target=scheduler, daemon=True)
+    thread.start()
+    return [thread]
+
+
+def run_step(calls, payload, records, concurrency=None, rate=None):
+    result, stop = StepResult(), threading.Event()
+    if LOAD_MODE == "closed":
+        threads = run_closed(calls, payload, concurrency, result, stop)
+    else:
+        threads = run_open(calls, payload, rate, result, stop)
+
+    time.sleep(LOAD_WARMUP)
+    result.recording = True
+    start = time.perf_counter()
+    time.sleep(LOAD_DURATION)
+    result.recording = False
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join(LOAD_TIMEOUT)
+
+    achieved = result.ok / elapsed
+    return {
+        "mode": LOAD_MODE,
+        "concurrency": concurrency,
+        "target_rps": rate,
+        "batch_records": records,
+        "request_bytes": len(payload),
+        "duration_seconds": round(elapsed, 3),
+        "ok": result.ok,
+        "errors": result.errors,
+        "dropped": result.dropped,
+        "achieved_rps": round(achieved, 2),
+        "records_per_second": round(achieved * records, 1),
+        "response_bytes_mean": result.response_bytes // result.ok if result.ok else None,
+        "latency_ms": result.histogram.summary(),
+        "histogram": result.histogram.buckets(),
+    }, result.histogram
+
+
+def sustained(step, previous):
+    if step["errors"] or step["dropped"]:
+        return False
+    if step["mode"] == "open":
+        return step["achieved_rps"] >= LOAD_SUSTAIN * step["target_rps"]
+    return previous is None or step["achieved_rps"] * LOAD_SUSTAIN >= previous["achieved_rps"]
+
+
+def main():
+    if LOAD_SERVICE not in METHODS:
+        raise ValueError(f"Unknown service '{LOAD_SERVICE}', expected one of {tuple(METHODS)}")
+    if LOAD_MODE not in ("closed", "open"):
+        raise ValueError(f"Unknown load mode '{LOAD_MODE}', expected 'closed' or 'open'")
+    if LOAD_ARRIVALS not in ("uniform", "poisson"):
+        raise ValueError(f"Unknown arrival process '{LOAD_ARRIVALS}', expected 'uniform' or 'poisson'")
+
+    levels = LOAD_CONCURRENCY if LOAD_MODE == "closed" else LOAD_RATE
+    print("=" * 70)
+    print(f"🎵 gRPC LOAD — {LOAD_SERVICE} @ {address(LOAD_SERVICE)} ({LOAD_MODE} loop)")
+    print("=" * 70)
+    print(f"Steps: {'concurrency' if LOAD_MODE == 'closed' else 'req/s'} {levels} x batch {LOAD_BATCH_SIZES}, "
+          f"{LOAD_WARMUP:g}s warmup + {LOAD_DURATION:g}s each")
+    print(f"{'batch':>7}{'level':>8}{'ok':>8}{'err':>6}{'drop':>6}{'req/s':>9}{'records/s':>12}"
+          f"{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'p99.9 ms':>10}{'max ms':>9}")
+
+    channels = make_channels()
+    calls = [raw_method(channel, LOAD_SERVICE) for channel in channels]
+    steps, saturation = [], {}
+    try:
+        for records in LOAD_BATCH_SIZES:
+            payload = build_payload(load_records(records))
+            previous, last_sustained = None, None
+            for level in levels:
+                step, histogram = run_step(calls, payload, records,
+                                           concurrency=level if LOAD_MODE == "closed" else None,
+                                           rate=level if LOAD_MODE == "open" else None)
+                steps.append(step)
+                latency = step["latency_ms"]
+                print(f"{records:>7}{level:>8g}{step['ok']:>8}{sum(step['errors'].values()):>6}{step['dropped']:>6}"
+                      f"{step['achieved_rps']:>9.1f}{step['records_per_second']:>12,.0f}"
+                      + "".join(f"{latency.get(k, 0) or 0:>{w}.2f}" for k, w in
+                                (("p50", 9), ("p90", 9), ("p99", 9), ("p99.9", 10), ("max", 9))), flush=True)
+                if sustained(step, previous):
+                    last_sustained = level
+                previous = step
+            saturation[str(records)] = last_sustained
+            print(f"  batch {records}: last sustained {'concurrency' if LOAD_MODE == 'closed' else 'rate'} "
+                  f"= {last_sustained}")
+        if steps:
+            print("-" * 70)
+            print(f"Latency distribution of the last step:\n{histogram.distribution()}")
+    finally:
+        for channel in channels:
+            channel.close()
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "service": LOAD_SERVICE,
+        "address": address(LOAD_SERVICE),
+        "config": {
+            "mode": LOAD_MODE,
+            "arrivals": LOAD_ARRIVALS if LOAD_MODE == "open" else None,
+            "levels": levels,
+            "batch_sizes": LOAD_BATCH_SIZES,
+            "duration": LOAD_DURATION,
+            "warmup": LOAD_WARMUP,
+            "timeout": LOAD_TIMEOUT,
+            "channels": LOAD_CHANNELS,
+            "max_in_flight": LOAD_MAX_IN_FLIGHT,
+        },
+        "last_sustained": saturation,
+        "steps": steps,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(LOAD_REPORT)), exist_ok=True)
+    with open(LOAD_REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("=" * 70)
+    print(f"✅ Load report saved to {LOAD_REPORT}")
+
+
+if __name__ == "__main__":
+    main()
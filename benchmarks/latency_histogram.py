@@ -0,0 +1,98 @@
+"""
+Latency Histogram
+HDR-style log-linear histogram of microsecond latencies: exact below
+SUB_BUCKETS, then SUB_BUCKETS/2 linear buckets per power of two, so any
+recorded value is kept to within 1% (2 significant digits) with a fixed,
+small number of counters whatever the range.
+"""
+import threading
+
+SUB_BUCKETS = 256
+HALF = SUB_BUCKETS // 2
+SHIFT_BASE = SUB_BUCKETS.bit_length() - 2  # values below 2**(SHIFT_BASE + 1) are exact
+
+
+def bucket_index(value):
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - 1 - SHIFT_BASE
+    return shift * HALF + (value >> shift)
+
+
+def bucket_bounds(index):
+    """(lowest, highest) value counted by a bucket."""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift = index // HALF - 1
+    low = (index - shift * HALF) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Thread-safe; record() takes seconds, every reported value is in milliseconds."""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        us = max(0, int(seconds * 1_000_000))
+        index = bucket_index(us)
+        with self.lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.count += 1
+            self.total_us += us
+            self.max_us = max(self.max_us, us)
+            self.min_us = us if self.min_us is None else min(self.min_us, us)
+
+    def merge(self, other):
+        with self.lock:
+            for index, n in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + n
+            self.count += other.count
+            self.total_us += other.total_us
+            self.max_us = max(self.max_us, other.max_us)
+            if other.min_us is not None:
+                self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def value_at(self, percentile):
+        """Highest value equivalent to the given percentile (ms), like HdrHistogram."""
+        if not self.count:
+            return None
+        target = max(1, -(-self.count * percentile // 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(bucket_bounds(index)[1], self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self, percentiles=(50, 90, 95, 99, 99.9, 99.99)):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "min": self.min_us / 1000,
+            "mean": round(self.total_us / self.count / 1000, 3),
+            "max": self.max_us / 1000,
+            **{f"p{p:g}": self.value_at(p) for p in percentiles},
+        }
+
+    def buckets(self):
+        """[[low_ms, high_ms, count], ...] of the non-empty buckets, for plotting."""
+        return [[low / 1000, high / 1000, self.counts[index]]
+                for index in sorted(self.counts) for low, high in [bucket_bounds(index)]]
+
+    def distribution(self, steps=(0, 50, 75, 90, 95, 99, 99.9, 99.99, 100)):
+        """Percentile table in the spirit of HdrHistogram's output."""
+        lines = [f"{'Value(ms)':>12} {'Percentile':>12} {'TotalCount':>11}"]
+        if not self.count:
+            return "\n".join(lines + ["(no samples)"])
+        for p in steps:
+            value = self.value_at(p) if p else (self.min_us or 0) / 1000
+            lines.append(f"{value:>12.3f} {p / 100:>12.6f} {int(self.count * p / 100):>11}")
+        return "\n".join(lines)
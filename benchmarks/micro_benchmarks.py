@@ -0,0 +1,261 @@
+"""
+Analytics Kernel Micro-benchmarks
+Times the services/ kernels in isolation (no transport) across input sizes and
+cardinality profiles, comparing the alternative implementations of each:
+
+  mapreduce       threads (engine default) | single (plain loop) | vectorized |
+                  vectorized_from_rows (includes building the RecordBatch) | processes
+  userbehavior    loop | vectorized
+  genre           threads | single | vectorized
+  recommendation  default
+  analytics       fused analyze_all | separate vectorized kernels
+
+Variants of a kernel are checked to return the same answer before they are timed.
+Each benchmark is timed with timeit (loop count from autorange, best of
+MICRO_REPEATS) and compared against the stored baseline; a benchmark slower
+than baseline x (1 + MICRO_TOLERANCE), even after MICRO_RETRIES re-timings,
+is a regression and the run exits 1.
+Baselines are scaled by a fixed pure-Python calibration loop so a baseline
+recorded on another machine stays usable.
+
+  python benchmarks/micro_benchmarks.py                        # check
+  MICRO_UPDATE_BASELINE=1 python benchmarks/micro_benchmarks.py  # re-record
+"""
+import os
+import sys
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import timeit
+from datetime import datetime
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from services.columnar_store import ColumnarDataset
+from services.record_batch import RecordBatch
+from services.mapreduce_service import MapReduceStreamService
+from services.user_behavior_service import UserBehaviorService
+from services.genre_analysis_service import GenreAnalysisStreamService
+from services.recommendation_service import RecommendationService
+from services.analytics_service import FusedAnalyticsService
+
+# ───────────────────────────────────────────────
+# Environment Variables
+# ───────────────────────────────────────────────
+def _list(name, default, cast=str):
+    return [cast(v.strip()) for v in os.getenv(name, default).split(",") if v.strip()]
+
+
+MICRO_SIZES = _list("MICRO_SIZES", "1000,10000,100000", int)
+MICRO_PROFILES = _list("MICRO_PROFILES", "low,high")
+MICRO_REPEATS = int(os.getenv("MICRO_REPEATS", "5"))
+# Only run benchmarks whose name contains this (e.g. "mapreduce/" or "/high/")
+MICRO_FILTER = os.getenv("MICRO_FILTER", "")
+MICRO_TOLERANCE = float(os.getenv("MICRO_TOLERANCE", "0.25"))
+# Times a suspected regression is re-timed (after re-calibrating) before it counts
+MICRO_RETRIES = int(os.getenv("MICRO_RETRIES", "2"))
+MICRO_UPDATE_BASELINE = os.getenv("MICRO_UPDATE_BASELINE", "0") == "1"
+MICRO_BASELINE = os.getenv("MICRO_BASELINE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "micro_baseline.json"))
+MICRO_SEED = os.getenv("MICRO_SEED", "7")
+RESULTS_DIR = os.getenv("RESULTS_DIR", os.path.join(PROJECT_ROOT, "results"))
+
+# Catalog sizes handed to data/data_generator.py
+PROFILES = {
+    "low": {"NUM_USERS": "5", "NUM_SONGS": "10", "NUM_ARTISTS": "9", "NUM_GENRES": "7"},
+    "high": {"NUM_USERS": "20000", "NUM_SONGS": "100000", "NUM_ARTISTS": "10000", "NUM_GENRES": "50"},
+}
+
+
+class KernelInput:
+    """One dataset slice in the shapes the kernels take."""
+
+    def __init__(self, batch):
+        self.rows = list(batch.rows())
+        self.batch = RecordBatch.from_records(self.rows)
+        self.play_counts = MapReduceStreamService.vectorized_counts(self.batch)
+        self.user_stats = UserBehaviorService.batch_user_stats(self.batch)
+
+
+def _single_mapreduce(data):
+    return MapReduceStreamService.reduce_counts([MapReduceStreamService.map_stream(r) for r in data.rows])
+
+
+def _single_genre(data):
+    return GenreAnalysisStreamService.reduce_counts([GenreAnalysisStreamService.map_genre(r) for r in data.rows])
+
+
+def _separate_analytics(data):
+    return {
+        "play_counts": MapReduceStreamService.vectorized_counts(data.batch),
+        "user_stats": UserBehaviorService.batch_user_stats(data.batch),
+        "genre_counts": GenreAnalysisStreamService.batch_genre_counts(data.batch),
+    }
+
+
+def _fused_analytics(data):
+    result = FusedAnalyticsService.analyze_all(data.batch)
+    return {name: result[name] for name in ("play_counts", "user_stats", "genre_counts")}
+
+
+# kernel -> variant -> function of a KernelInput returning the comparable answer
+KERNELS = {
+    "mapreduce": {
+        "threads": lambda d: MapReduceStreamService.perform_mapreduce(d.rows, engine="threads")["play_counts"],
+        "single": _single_mapreduce,
+        "vectorized": lambda d: MapReduceStreamService.perform_mapreduce(d.batch, engine="vectorized")["play_counts"],
+        "vectorized_from_rows": lambda d: MapReduceStreamService.perform_mapreduce(d.rows, engine="vectorized")["play_counts"],
+        "processes": lambda d: MapReduceStreamService.perform_mapreduce(d.batch, engine="processes")["play_counts"],
+    },
+    "userbehavior": {
+        "loop": lambda d: UserBehaviorService.analyze_behavior(d.rows)["user_stats"],
+        "vectorized": lambda d: UserBehaviorService.analyze_behavior(d.batch)["user_stats"],
+    },
+    "genre": {
+        "threads": lambda d: GenreAnalysisStreamService.perform_genre_analysis(d.rows)["genre_counts"],
+        "single": _single_genre,
+        "vectorized": lambda d: GenreAnalysisStreamService.perform_genre_analysis(d.batch)["genre_counts"],
+    },
+    "recommendation": {
+        "default": lambda d: RecommendationService.recommend(d.play_counts, d.user_stats)["recommendations"],
+    },
+    "analytics": {
+        "fused": _fused_analytics,
+        "separate": _separate_analytics,
+    },
+}
+
+
+def generate_dataset(profile, records, directory):
+    path = os.path.join(directory, f"micro_{profile}.mscol")
+    env = dict(os.environ, NUM_RECORDS=str(records), SEED=MICRO_SEED, **PROFILES[profile])
+    subprocess.run([sys.executable, os.path.join(PROJECT_ROOT, "data", "data_generator.py"), path],
+                   env=env, check=True, stdout=subprocess.DEVNULL)
+    return ColumnarDataset.open(path)
+
+
+def calibration():
+    """Seconds for a fixed pure-Python workload (dict counting and sorting), best of 5."""
+    keys = [f"k{i % 997}" for i in range(200_000)]
+
+    def work():
+        counts = {}
+        for k in keys:
+            counts[k] = counts.get(k, 0) + 1
+        sorted(keys)
+
+    return min(timeit.repeat(work, number=1, repeat=5))
+
+
+def time_call(fn):
+    """(best, median) seconds per call."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    runs = [t / number for t in timer.repeat(MICRO_REPEATS, number)]
+    return min(runs), statistics.median(runs)
+
+
+def load_baseline():
+    if not os.path.exists(MICRO_BASELINE):
+        return None
+    with open(MICRO_BASELINE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    for profile in MICRO_PROFILES:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile '{profile}', expected one of {tuple(PROFILES)}")
+
+    print("=" * 70)
+    print("🎵 MUSIC STREAMING ANALYTICS — KERNEL MICRO-BENCHMARKS")
+    print("=" * 70)
+    cal = calibration()
+    baseline = None if MICRO_UPDATE_BASELINE else load_baseline()
+    scale = cal / baseline["calibration_seconds"] if baseline else 1.0
+    expected = baseline["benchmarks"] if baseline else {}
+    print(f"Calibration: {cal * 1000:.2f} ms"
+          + (f" (baseline {baseline['calibration_seconds'] * 1000:.2f} ms, scale {scale:.2f})" if baseline else ""))
+    print(f"{'benchmark':<52}{'best':>11}{'median':>11}{'records/s':>13}{'baseline':>11}{'ratio':>7}  status")
+
+    results, regressions, mismatches = {}, [], []
+    with tempfile.TemporaryDirectory(prefix="micro-") as directory:
+        for profile in MICRO_PROFILES:
+            dataset = generate_dataset(profile, max(MICRO_SIZES), directory)
+            for size in MICRO_SIZES:
+                data = KernelInput(dataset.batch(0, size))
+                for kernel, variants in KERNELS.items():
+                    selected = {v: fn for v, fn in variants.items() if MICRO_FILTER in f"{kernel}/{v}/{profile}/{size}"}
+                    answers = {v: fn(data) for v, fn in selected.items()}
+                    if len({json.dumps(a, sort_keys=True) for a in answers.values()}) > 1:
+                        mismatches.append(f"{kernel}/{profile}/{size}: {sorted(answers)} disagree")
+                    for variant, fn in selected.items():
+                        name = f"{kernel}/{variant}/{profile}/{size}"
+                        best, median = time_call(lambda: fn(data))
+                        reference = expected.get(name, {}).get("best")
+                        for _ in range(MICRO_RETRIES if reference else 0):
+                            if best <= reference * scale * (1 + MICRO_TOLERANCE):
+                                break
+                            # the machine may have slowed down since the run started
+                            scale = calibration() / baseline["calibration_seconds"]
+                            best, median = min((best, median), time_call(lambda: fn(data)))
+                        results[name] = {"best": best, "median": median, "records": size}
+                        status, ratio = "new", None
+                        if reference:
+                            ratio = best / (reference * scale)
+                            status = "REGRESSION" if ratio > 1 + MICRO_TOLERANCE else "ok"
+                            if status == "REGRESSION":
+                                regressions.append(name)
+                        print(f"{name:<52}{best * 1000:>9.3f}ms{median * 1000:>9.3f}ms{size / best:>13,.0f}"
+                              f"{'-' if reference is None else format(reference * scale * 1000, '.3f') + 'ms':>11}"
+                              f"{'-' if ratio is None else format(ratio, '.2f'):>7}  {status}", flush=True)
+
+    print("-" * 70)
+    print("Fastest variant per kernel:")
+    for kernel, variants in KERNELS.items():
+        for profile in MICRO_PROFILES:
+            for size in MICRO_SIZES:
+                timed = {v: results[f"{kernel}/{v}/{profile}/{size}"]["best"]
+                         for v in variants if f"{kernel}/{v}/{profile}/{size}" in results}
+                if len(timed) < 2:
+                    continue
+                fastest = min(timed, key=timed.get)
+                others = ", ".join(f"{v} x{timed[v] / timed[fastest]:.1f}" for v in timed if v != fastest)
+                print(f"  {kernel:<15}{profile:<6}{size:>8}  {fastest} ({others})")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "calibration_seconds": cal,
+        "benchmarks": results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, "micro_benchmarks.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if MICRO_UPDATE_BASELINE:
+        stored, previous = report, load_baseline()
+        if MICRO_FILTER and previous:
+            # a filtered run only refreshes its own entries, rescaled to the stored calibration
+            factor = previous["calibration_seconds"] / cal
+            previous["benchmarks"].update({
+                name: dict(r, best=r["best"] * factor, median=r["median"] * factor) for name, r in results.items()
+            })
+            stored = previous
+        with open(MICRO_BASELINE, "w", encoding="utf-8") as f:
+            json.dump(stored, f, indent=2)
+        print(f"✅ Baseline saved to {MICRO_BASELINE}")
+
+    print("=" * 70)
+    for mismatch in mismatches:
+        print(f"✗ Variants disagree: {mismatch}")
+    for name in regressions:
+        print(f"✗ Regression: {name}")
+    if mismatches or regressions:
+        sys.exit(1)
+    print(f"✅ {len(results)} benchmarks, no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Cross-Protocol Benchmark
+Launches each transport's services locally, sweeps dataset size x client
+concurrency for every analytics call and writes one normalized report:
+
+  latency p50/p95/p99 (ms), throughput (calls/s, records/s), request and
+  response body bytes and CPU / peak RSS of every service process, plus the
+  client's CPU
+
+Each scenario runs BENCH_WARMUP untimed calls, then BENCH_CONCURRENCY client
+threads issue BENCH_REPEATS calls each. The dataset is produced once by
+data/data_generator.py (its NUM_USERS, NUM_SONGS, SEED... settings apply)
+unless BENCH_DATA points at an existing CSV or .mscol file.
+
+  BENCH_TRANSPORTS=grpc,rest BENCH_SIZES=1000,100000 python benchmarks/run_benchmarks.py
+"""
+import os
+import sys
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+import xmlrpc.client
+from datetime import datetime
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "workflow"))
+
+from service_launcher import ResourceMonitor, ServiceGroup, ServiceUnavailable, service_specs
+from transports import make_transport
+from services import stream_loader
+
+# ───────────────────────────────────────────────
+# Environment Variables
+# ───────────────────────────────────────────────
+def _list(name, default, cast=str):
+    return [cast(v.strip()) for v in os.getenv(name, default).split(",") if v.strip()]
+
+
+BENCH_TRANSPORTS = _list("BENCH_TRANSPORTS", "grpc,grpc_mixed,rest,xmlrpc")
+BENCH_OPERATIONS = _list("BENCH_OPERATIONS", "mapreduce,userbehavior,genre,recommendation")
+BENCH_SIZES = _list("BENCH_SIZES", "1000,10000", int)
+BENCH_CONCURRENCY = _list("BENCH_CONCURRENCY", "1,4", int)
+BENCH_WARMUP = int(os.getenv("BENCH_WARMUP", "1"))
+BENCH_REPEATS = int(os.getenv("BENCH_REPEATS", "5"))
+# 0 benchmarks services that are already running (e.g. docker compose); no CPU/RSS then
+BENCH_LAUNCH = os.getenv("BENCH_LAUNCH", "1") == "1"
+BENCH_DATA = os.getenv("BENCH_DATA")
+BENCH_DIR = os.getenv("BENCH_DIR", os.path.join(tempfile.gettempdir(), "music-benchmarks"))
+RESULTS_DIR = os.getenv("RESULTS_DIR", os.path.join(PROJECT_ROOT, "results"))
+BENCH_REPORT = os.getenv("BENCH_REPORT", os.path.join(RESULTS_DIR, "benchmark_report.json"))
+
+# gRPC-mixed speaks the same protobuf services as gRPC
+CLIENTS = {"grpc": "grpc", "grpc_mixed": "grpc", "rest": "rest", "xmlrpc": "xmlrpc"}
+OPERATIONS = ("mapreduce", "userbehavior", "genre", "recommendation")
+
+
+def load_dataset(max_records):
+    """Path of the benchmark dataset, generated with data/data_generator.py when BENCH_DATA is unset."""
+    if BENCH_DATA:
+        return BENCH_DATA
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"bench_{max_records}.mscol")
+    env = dict(os.environ, NUM_RECORDS=str(max_records))
+    subprocess.run([sys.executable, os.path.join(PROJECT_ROOT, "data", "data_generator.py"), path],
+                   env=env, check=True)
+    return path
+
+
+def first_records(path, n):
+    """The first n records of the dataset as record dicts."""
+    for batch in stream_loader.iter_batches(path, n):
+        return stream_loader.batch_records(batch)
+    return []
+
+
+def latency_summary(latencies):
+    ms = np.asarray(latencies) * 1000
+    if not len(ms):
+        return None
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "mean": round(float(ms.mean()), 3),
+        "min": round(float(ms.min()), 3),
+        "max": round(float(ms.max()), 3),
+        "stdev": round(statistics.pstdev(ms.tolist()), 3),
+    }
+
+
+def payload_sizes(kind, client, operation, batch, upstream):
+    """(request, response) body bytes of one untimed call, as they go over the wire."""
+    if kind == "grpc":
+        if operation == "recommendation":
+            request = client.recommendation_request(*upstream)
+            response = client.recommendation_stub.Recommend(request, timeout=client.timeout)
+        else:
+            stub_call = {
+                "mapreduce": client.mapreduce_stub.AggregateStream,
+                "userbehavior": client.userbehavior_stub.AnalyzeUsers,
+                "genre": client.genre_stub.AnalyzeGenres,
+            }[operation]
+            request, response = batch, stub_call(batch, timeout=client.timeout)
+        return request.ByteSize(), response.ByteSize()
+
+    url = getattr(client, f"{operation}_url")
+    if kind == "rest":
+        payload = client.recommendation_request(*upstream) if operation == "recommendation" else batch
+        body = json.dumps(payload).encode("utf-8")
+        resp = client.requests.post(url, data=body, headers={"Content-Type": "application/json"},
+                                    stream=True, timeout=client.timeout)
+        resp.raise_for_status()
+        # raw read keeps a compressed response compressed
+        return len(body), len(resp.raw.read(decode_content=False))
+
+    if operation == "recommendation":
+        params, method = (None, client.recommendation_request(*upstream)), "process"
+    else:
+        params, method = (batch,), "analyze"
+    body = xmlrpc.client.dumps(params, method, allow_none=True).encode("utf-8")
+    request = urllib.request.Request(url.rstrip("/") + "/RPC2", data=body, headers={"Content-Type": "text/xml"})
+    with urllib.request.urlopen(request, timeout=client.timeout) as resp:
+        return len(body), len(resp.read())
+
+
+# ───────────────────────────────────────────────
+# Scenario
+# ───────────────────────────────────────────────
+def run_scenario(call, concurrency, warmup, repeats):
+    """
+    Untimed warmup calls, then concurrency threads each issuing repeats calls.
+    Returns (latencies, server processing times, errors, wall seconds).
+    """
+    for _ in range(warmup):
+        call()
+
+    latencies, server_times, errors = [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(repeats):
+            start = time.perf_counter()
+            try:
+                result = call()
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if isinstance(result, dict) and "processing_time" in result:
+                    server_times.append(result["processing_time"])
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return latencies, server_times, errors, time.perf_counter() - start
+
+
+def benchmark_transport(name, dataset, monitor=None):
+    """All size x concurrency x operation scenarios for one transport."""
+    kind = CLIENTS[name]
+    client = make_transport(kind)
+    rows = []
+    try:
+        for size in BENCH_SIZES:
+            records = first_records(dataset, size)
+            batch = client.encode(records)
+            # recommendation consumes the other stages' answers, computed once and untimed
+            upstream = (client.mapreduce(batch), client.userbehavior(batch))
+            calls = {
+                "mapreduce": lambda: client.mapreduce(batch),
+                "userbehavior": lambda: client.userbehavior(batch),
+                "genre": lambda: client.genre(batch),
+                "recommendation": lambda: client.recommendation(*upstream),
+            }
+            sizes = {op: payload_sizes(kind, client, op, batch, upstream) for op in BENCH_OPERATIONS}
+            for concurrency in BENCH_CONCURRENCY:
+                for operation in BENCH_OPERATIONS:
+                    if monitor:
+                        monitor.begin()
+                    cpu_start = time.process_time()
+                    latencies, server_times, errors, wall = run_scenario(
+                        calls[operation], concurrency, BENCH_WARMUP, BENCH_REPEATS)
+                    client_cpu = time.process_time() - cpu_start
+                    services = monitor.end() if monitor else {}
+
+                    ok = len(latencies)
+                    rows.append({
+                        "transport": name,
+                        "operation": operation,
+                        "records": len(records),
+                        "concurrency": concurrency,
+                        "calls": ok,
+                        "errors": len(errors),
+                        "error_sample": errors[0] if errors else None,
+                        "wall_seconds": round(wall, 4),
+                        "latency_ms": latency_summary(latencies),
+                        "server_time_ms_p50": round(float(np.median(server_times)) * 1000, 3) if server_times else None,
+                        "throughput_rps": round(ok / wall, 2) if wall else None,
+                        "records_per_second": round(ok * len(records) / wall, 1) if wall else None,
+                        "request_bytes": sizes[operation][0],
+                        "response_bytes": sizes[operation][1],
+                        "client_cpu_seconds": round(client_cpu, 4),
+                        "services": services,
+                    })
+                    print_row(rows[-1])
+    finally:
+        client.close()
+    return rows
+
+
+# ───────────────────────────────────────────────
+# Report
+# ───────────────────────────────────────────────
+HEADER = (f"{'transport':<11}{'operation':<15}{'records':>9}{'conc':>5}{'calls':>6}{'err':>4}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/s':>9}{'records/s':>12}"
+          f"{'req bytes':>11}{'resp bytes':>11}{'svc CPU%':>9}{'RSS MB':>8}")
+
+
+def print_row(row):
+    def fmt(value, width, spec=""):
+        return f"{'-' if value is None else format(value, spec):>{width}}"
+
+    latency = row["latency_ms"] or {}
+    service = row["services"].get(row["operation"]) or {}
+    print(f"{row['transport']:<11}{row['operation']:<15}{row['records']:>9}{row['concurrency']:>5}"
+          f"{row['calls']:>6}{row['errors']:>4}"
+          f"{fmt(latency.get('p50'), 10, '.2f')}{fmt(latency.get('p95'), 10, '.2f')}{fmt(latency.get('p99'), 10, '.2f')}"
+          f"{fmt(row['throughput_rps'], 9, '.1f')}{fmt(row['records_per_second'], 12, ',.0f')}"
+          f"{fmt(row['request_bytes'], 11)}{fmt(row['response_bytes'], 11)}"
+          f"{fmt(service.get('cpu_percent'), 9, '.1f')}{fmt(service.get('rss_peak_mb'), 8, '.1f')}", flush=True)
+
+
+def main():
+    for name in BENCH_TRANSPORTS:
+        if name not in CLIENTS:
+            raise ValueError(f"Unknown transport '{name}', expected one of {tuple(CLIENTS)}")
+        service_specs(name)
+    unknown = set(BENCH_OPERATIONS) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operation(s) {sorted(unknown)}, expected {OPERATIONS}")
+
+    print("=" * 70)
+    print("🎵 MUSIC STREAMING ANALYTICS — CROSS-PROTOCOL BENCHMARK")
+    print("=" * 70)
+    dataset = load_dataset(max(BENCH_SIZES))
+    print(f"Dataset: {dataset}")
+    print(f"Sizes: {BENCH_SIZES}  Concurrency: {BENCH_CONCURRENCY}  Warmup: {BENCH_WARMUP}  Repeats: {BENCH_REPEATS}")
+    print(HEADER)
+
+    rows, failures, skipped = [], {}, {}
+    for name in BENCH_TRANSPORTS:
+        try:
+            if not BENCH_LAUNCH:
+                rows.extend(benchmark_transport(name, dataset))
+                continue
+            with ServiceGroup(name, os.path.join(BENCH_DIR, "logs")) as group:
+                monitor = ResourceMonitor(group.pids)
+                try:
+                    rows.extend(benchmark_transport(name, dataset, monitor))
+                finally:
+                    monitor.close()
+        except ServiceUnavailable as e:
+            skipped[name] = str(e)
+            print(f"[Benchmark] - {name} skipped: {e}")
+        except Exception as e:
+            failures[name] = f"{type(e).__name__}: {e}"
+            print(f"[Benchmark] ✗ {name}: {failures[name]}")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "transports": BENCH_TRANSPORTS,
+            "operations": BENCH_OPERATIONS,
+            "sizes": BENCH_SIZES,
+            "concurrency": BENCH_CONCURRENCY,
+            "warmup": BENCH_WARMUP,
+            "repeats": BENCH_REPEATS,
+            "launched_services": BENCH_LAUNCH,
+            "dataset": dataset,
+        },
+        "results": rows,
+        "failures": failures,
+        "skipped": skipped,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(BENCH_REPORT)), exist_ok=True)
+    with open(BENCH_REPORT, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("=" * 70)
+    print(f"✅ {len(rows)} scenarios saved to {BENCH_REPORT}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
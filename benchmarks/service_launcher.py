@@ -0,0 +1,293 @@
+"""
+Benchmark Service Launcher
+Starts a transport's four analytics services as local processes, waits for
+their ports and samples each process tree's CPU time and resident memory
+(psutil when installed, /proc on Linux otherwise).
+"""
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Seconds to wait for a service to accept connections
+BENCH_STARTUP_TIMEOUT = float(os.getenv("BENCH_STARTUP_TIMEOUT", "30"))
+# Seconds between resource samples
+BENCH_SAMPLE_INTERVAL = float(os.getenv("BENCH_SAMPLE_INTERVAL", "0.1"))
+# The gRPC-mixed C++ genre service, built with cmake from grpc_mixed/cpp_service
+MIXED_GENRE_BINARY = os.getenv("MIXED_GENRE_BINARY", os.path.join(
+    PROJECT_ROOT, "grpc_mixed", "cpp_service", "build", "genre_analysis_server"))
+
+# Leading bytes of a native executable on this platform (ELF, Mach-O 64-bit, PE)
+EXECUTABLE_MAGIC = {
+    "linux": (b"\x7fELF",),
+    "darwin": (b"\xcf\xfa\xed\xfe", b"\xca\xfe\xba\xbe"),
+    "win32": (b"MZ",),
+}
+
+
+class ServiceUnavailable(RuntimeError):
+    """A transport's services cannot run on this machine; the benchmark skips it."""
+
+
+class ServiceSpec:
+    def __init__(self, name, command, port_var, default_port, cwd=None):
+        self.name = name
+        self.command = command
+        # the C++ and Go services listen on fixed ports (port_var None)
+        self.port = int(os.getenv(port_var, default_port) if port_var else default_port)
+        self.cwd = cwd
+
+
+def _python(*parts):
+    return [sys.executable, "-u", os.path.join(PROJECT_ROOT, *parts)]
+
+
+def service_specs(transport):
+    """The services a transport's benchmark talks to, in start order."""
+    if transport == "grpc":
+        return [
+            ServiceSpec("mapreduce", _python("grpc", "server", "mapreduce_stream_service.py"), "MAPREDUCE_PORT", "50051"),
+            ServiceSpec("userbehavior", _python("grpc", "server", "user_behavior_service.py"), "USERBEHAVIOR_PORT", "50053"),
+            ServiceSpec("genre", _python("grpc", "server", "genre_analysis_service.py"), "GENRE_ANALYSIS_PORT", "50055"),
+            ServiceSpec("recommendation", _python("grpc", "server", "recommendation_service.py"), "RECOMMENDATION_PORT", "50057"),
+        ]
+    if transport == "grpc_mixed":
+        return [
+            ServiceSpec("mapreduce", _python("grpc_mixed", "server", "mapreduce_stream_service.py"), "MAPREDUCE_PORT", "50051"),
+            ServiceSpec("userbehavior", _python("grpc_mixed", "server", "user_behavior_service.py"), "USERBEHAVIOR_PORT", "50053"),
+            ServiceSpec("genre", [MIXED_GENRE_BINARY], None, "50055"),
+            ServiceSpec("recommendation", ["go", "run", "recommendation_service.go"], None, "50057",
+                        cwd=os.path.join(PROJECT_ROOT, "grpc_mixed", "server")),
+        ]
+    if transport == "rest":
+        return [
+            ServiceSpec("mapreduce", _python("rest", "server", "mapreduce_service_rest.py"), "MAPREDUCE_PORT", "5001"),
+            ServiceSpec("userbehavior", _python("rest", "server", "user_behavior_service.py"), "USERBEHAVIOR_PORT", "5003"),
+            ServiceSpec("genre", _python("rest", "server", "genre_analysis_service.py"), "GENRE_ANALYSIS_PORT", "5005"),
+            ServiceSpec("recommendation", _python("rest", "server", "recommendation_service.py"), "RECOMMENDATION_PORT", "5007"),
+        ]
+    if transport == "xmlrpc":
+        return [
+            ServiceSpec("mapreduce", _python("xmlrpc", "server", "mapreduce.py"), "MAPREDUCE_PORT", "8001"),
+            ServiceSpec("userbehavior", _python("xmlrpc", "server", "user_behavior.py"), "USERBEHAVIOR_PORT", "8003"),
+            ServiceSpec("genre", _python("xmlrpc", "server", "genre_analysis.py"), "GENRE_ANALYSIS_PORT", "8005"),
+            ServiceSpec("recommendation", _python("xmlrpc", "server", "recommendation.py"), "RECOMMENDATION_PORT", "8007"),
+        ]
+    raise ValueError(f"Unknown transport '{transport}', expected grpc, grpc_mixed, rest or xmlrpc")
+
+
+def unavailable_reason(spec):
+    """Why a native (C++ or Go) service cannot start here, None when it can."""
+    program = spec.command[0]
+    if program == sys.executable:
+        return None
+    if program == "go":
+        return None if shutil.which("go") else "the Go toolchain is not on PATH"
+    if not os.access(program, os.X_OK):
+        return f"{program} is not built (cmake -S grpc_mixed/cpp_service -B grpc_mixed/cpp_service/build)"
+    with open(program, "rb") as f:
+        head = f.read(4)
+    magic = EXECUTABLE_MAGIC.get(sys.platform)
+    if magic and not head.startswith(magic):
+        return f"{program} is not a {sys.platform} executable; rebuild it on this machine"
+    return None
+
+
+def port_open(port, host="127.0.0.1"):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(0.5)
+        return s.connect_ex((host, port)) == 0
+
+
+# ───────────────────────────────────────────────
+# Process tree counters
+# ───────────────────────────────────────────────
+def _proc_children():
+    """{ppid: [pid, ...]} from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_counters(pid):
+    """(cpu seconds incl. reaped children, rss bytes) of one process."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = sum(int(v) for v in fields[11:15]) / os.sysconf("SC_CLK_TCK")
+    with open(f"/proc/{pid}/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return cpu, rss
+
+
+def tree_counters(pid):
+    """Summed (cpu, rss) of pid and its descendants, None when unavailable."""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        totals = [0.0, 0]
+        for proc in procs:
+            try:
+                with proc.oneshot():
+                    cpu = proc.cpu_times()
+                    totals[0] += cpu.user + cpu.system + getattr(cpu, "children_user", 0) + getattr(cpu, "children_system", 0)
+                    totals[1] += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return tuple(totals)
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = _proc_children()
+    pending, totals = [pid], [0.0, 0]
+    while pending:
+        current = pending.pop()
+        try:
+            for i, value in enumerate(_proc_counters(current)):
+                totals[i] += value
+        except (OSError, IndexError, ValueError):
+            continue
+        pending.extend(children.get(current, ()))
+    return tuple(totals)
+
+
+class ResourceMonitor:
+    """
+    Samples the services' process trees in a background thread. begin() marks
+    the start of a measured window, end() returns per-service CPU seconds
+    and peak RSS over that window.
+    """
+
+    def __init__(self, pids, interval=BENCH_SAMPLE_INTERVAL):
+        self.pids = pids
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.start_counters = {}
+        self.peak_rss = {}
+        self.started = time.perf_counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            for name, pid in self.pids.items():
+                counters = tree_counters(pid)
+                if counters is not None:
+                    with self.lock:
+                        self.peak_rss[name] = max(self.peak_rss.get(name, 0), counters[1])
+
+    def begin(self):
+        with self.lock:
+            self.start_counters = {name: tree_counters(pid) for name, pid in self.pids.items()}
+            self.peak_rss = {name: c[1] for name, c in self.start_counters.items() if c is not None}
+            self.started = time.perf_counter()
+
+    def end(self):
+        wall = time.perf_counter() - self.started
+        usage = {}
+        with self.lock:
+            for name, pid in self.pids.items():
+                before, after = self.start_counters.get(name), tree_counters(pid)
+                if before is None or after is None:
+                    usage[name] = None
+                    continue
+                cpu = after[0] - before[0]
+                usage[name] = {
+                    "cpu_seconds": round(cpu, 4),
+                    "cpu_percent": round(100 * cpu / wall, 1) if wall else None,
+                    "rss_peak_mb": round(max(self.peak_rss.get(name, 0), after[1]) / 2 ** 20, 1),
+                }
+        return usage
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+# ───────────────────────────────────────────────
+# Service group
+# ───────────────────────────────────────────────
+class ServiceGroup:
+    """Context manager running a transport's services for the duration of a benchmark."""
+
+    def __init__(self, transport, log_dir, env=None):
+        self.transport = transport
+        self.specs = service_specs(transport)
+        self.log_dir = log_dir
+        self.env = dict(os.environ, PYTHONUNBUFFERED="1", **(env or {}))
+        self.procs = {}
+        self.logs = []
+
+    def log_path(self, spec):
+        return os.path.join(self.log_dir, f"{self.transport}_{spec.name}.log")
+
+    def start(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        reasons = [f"{spec.name}: {reason}" for spec in self.specs if (reason := unavailable_reason(spec))]
+        if reasons:
+            raise ServiceUnavailable("mixed stack unavailable (" + "; ".join(reasons) + ")")
+        busy = [f"{spec.name}:{spec.port}" for spec in self.specs if port_open(spec.port)]
+        if busy:
+            raise RuntimeError(f"Port(s) already in use ({', '.join(busy)}); stop the running services "
+                               f"or set BENCH_LAUNCH=0 to benchmark them as they are")
+
+        for spec in self.specs:
+            log = open(self.log_path(spec), "w")
+            self.logs.append(log)
+            self.procs[spec.name] = subprocess.Popen(spec.command, cwd=spec.cwd or self.log_dir, env=self.env,
+                                                     stdout=log, stderr=subprocess.STDOUT)
+        deadline = time.time() + BENCH_STARTUP_TIMEOUT
+        for spec in self.specs:
+            while not port_open(spec.port):
+                if self.procs[spec.name].poll() is not None or time.time() > deadline:
+                    self.stop()
+                    with open(self.log_path(spec)) as f:
+                        tail = f.read()[-2000:]
+                    raise RuntimeError(f"{self.transport} {spec.name} did not start on port {spec.port}:\n{tail}")
+                time.sleep(0.1)
+        return self
+
+    @property
+    def pids(self):
+        return {name: proc.pid for name, proc in self.procs.items()}
+
+    def stop(self):
+        for proc in self.procs.values():
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self.procs.values():
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        for log in self.logs:
+            log.close()
+        self.procs, self.logs = {}, []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,26 @@
+"""
+Convert a play-log CSV to the columnar dataset format (services/columnar_store.py).
+
+  python data/convert_dataset.py [input.csv] [output.mscol]
+
+Every client accepts the .mscol file wherever it takes a CSV (DATA_CSV / CSV_PATH),
+so repeated runs over the same dataset skip CSV parsing entirely.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.columnar_store import EXTENSION, ROW_GROUP_RECORDS, ColumnarDataset, convert_csv
+
+csv_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "stream_data.csv")
+out_file = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(csv_file)[0] + EXTENSION
+
+start = time.time()
+num_records = convert_csv(csv_file, out_file, ROW_GROUP_RECORDS)
+dataset = ColumnarDataset.open(out_file)
+
+print(f"Converted {num_records} records from '{csv_file}' to '{out_file}' in {time.time() - start:.2f}s")
+print(f"  {os.path.getsize(csv_file)} bytes CSV -> {os.path.getsize(out_file)} bytes columnar, "
+      f"{len(dataset.row_groups)} row group(s) of up to {ROW_GROUP_RECORDS} records")
@@ -1,45 +1,188 @@
-import csv
-import random
-from datetime import datetime, timedelta
-
-# Output CSV file
-csv_file = "stream_data.csv"
-
-# Sample data
-users = ["U001", "U002", "U003", "U004", "U005"]
-songs = [
-    {"song_id": "S001", "artist": "Coldplay", "genre": "Pop", "duration": 210},
-    {"song_id": "S002", "artist": "Imagine Dragons", "genre": "Rock", "duration": 200},
-    {"song_id": "S003", "artist": "Ed Sheeran", "genre": "Pop", "duration": 190},
-    {"song_id": "S004", "artist": "Taylor Swift", "genre": "Pop", "duration": 180},
-    {"song_id": "S005", "artist": "Adele", "genre": "Soul", "duration": 240},
-    {"song_id": "S006", "artist": "Drake", "genre": "Hip-Hop", "duration": 250},
-    {"song_id": "S007", "artist": "Billie Eilish", "genre": "Alternative", "duration": 220},
-    {"song_id": "S008", "artist": "Bruno Mars", "genre": "Funk", "duration": 210},
-    {"song_id": "S009", "artist": "The Weeknd", "genre": "R&B", "duration": 230},
-    {"song_id": "S010", "artist": "Drake", "genre": "Hip-Hop", "duration": 250},
-]
-
-# Generate 100 random records
-records = []
-base_time = datetime(2025, 11, 5, 8, 0, 0)
-for i in range(100):
-    user = random.choice(users)
-    song = random.choice(songs)
-    timestamp = base_time + timedelta(minutes=random.randint(0, 600))  # Random time within 10 hours
-    records.append({
-        "user_id": user,
-        "song_id": song["song_id"],
-        "artist": song["artist"],
-        "duration": song["duration"],
-        "timestamp": timestamp.isoformat(),
-        "genre": song["genre"]
-    })
-
-# Write CSV
-with open(csv_file, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=records[0].keys())
-    writer.writeheader()
-    writer.writerows(records)
-
-print(f"CSV file '{csv_file}' with 100 records created successfully!")
+"""
+Synthetic play-log generator
+Writes NUM_RECORDS plays with a realistic skew to CSV or the columnar format
+(services/columnar_store.py, chosen by a .mscol output name):
+
+  - song popularity is Zipfian (SONG_ZIPF), popular songs are spread over the catalog
+  - user activity is heavy-tailed (Pareto, USER_ALPHA): a few users play most of the songs
+  - artists get a Zipfian share of the songs, genres a Zipfian share of the artists
+  - timestamps follow a diurnal curve (quiet around 04:00, busiest around 20:00)
+
+Records are produced in CHUNK_RECORDS chunks by WORKERS processes and written
+in order, so memory stays bounded. Chunk i is drawn from its own seed derived
+from (SEED, i): the output depends on SEED and CHUNK_RECORDS, never on WORKERS.
+
+  NUM_RECORDS=10000000 WORKERS=8 python data/data_generator.py /tmp/plays.mscol
+"""
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.columnar_store import EXTENSION, ColumnarWriter
+from services.record_batch import FIELDS, EncodedColumn, RecordBatch
+
+# ───────────────────────────────────────────────
+# Environment Variables
+# ───────────────────────────────────────────────
+NUM_RECORDS = int(os.getenv("NUM_RECORDS", "100"))
+NUM_USERS = int(os.getenv("NUM_USERS", "5"))
+NUM_SONGS = int(os.getenv("NUM_SONGS", "10"))
+NUM_ARTISTS = int(os.getenv("NUM_ARTISTS", "9"))
+NUM_GENRES = int(os.getenv("NUM_GENRES", "7"))
+SONG_ZIPF = float(os.getenv("SONG_ZIPF", "1.1"))
+USER_ALPHA = float(os.getenv("USER_ALPHA", "1.5"))
+START_DATE = os.getenv("START_DATE", "2025-11-05T00:00:00")
+DAYS = int(os.getenv("DAYS", "1"))
+SEED = int(os.getenv("SEED", "42"))
+CHUNK_RECORDS = int(os.getenv("CHUNK_RECORDS", "1000000"))
+WORKERS = int(os.getenv("WORKERS", str(os.cpu_count() or 1)))
+
+OUTPUT = sys.argv[1] if len(sys.argv) > 1 else os.getenv(
+    "OUTPUT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "stream_data.csv"))
+
+# Names used first, synthetic ones once the catalog is larger
+ARTISTS = ["Coldplay", "Imagine Dragons", "Ed Sheeran", "Taylor Swift", "Adele",
+           "Drake", "Billie Eilish", "Bruno Mars", "The Weeknd"]
+GENRES = ["Pop", "Rock", "Hip-Hop", "Alternative", "Soul", "Funk", "R&B"]
+
+# Relative play volume per hour of day
+DIURNAL = 1.0 + 0.8 * np.cos(2 * np.pi * (np.arange(24) - 20) / 24)
+
+
+def zipf_cdf(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def sample(rng, cdf, size):
+    """Indexes drawn from a cumulative distribution."""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side="right"), len(cdf) - 1)
+
+
+def names(prefix, n, known=()):
+    width = max(3, len(str(n)))
+    return [known[i] if i < len(known) else f"{prefix}{i + 1:0{width}d}" for i in range(n)]
+
+
+# ───────────────────────────────────────────────
+# Catalog (deterministic from SEED, rebuilt in every worker)
+# ───────────────────────────────────────────────
+class Catalog:
+    def __init__(self, seed=SEED):
+        rng = np.random.default_rng(np.random.SeedSequence(seed))
+        self.users = np.array(names("U", NUM_USERS), dtype=str)
+        self.songs = np.array(names("S", NUM_SONGS), dtype=str)
+        self.artists = np.array(names("Artist ", NUM_ARTISTS, ARTISTS), dtype=str)
+        self.genres = np.array(names("Genre ", NUM_GENRES, GENRES), dtype=str)
+
+        self.artist_genre = sample(rng, zipf_cdf(NUM_GENRES, 1.0), NUM_ARTISTS)
+        self.song_artist = rng.permutation(NUM_ARTISTS)[sample(rng, zipf_cdf(NUM_ARTISTS, 1.0), NUM_SONGS)]
+        self.song_duration = np.clip(rng.normal(215, 45, NUM_SONGS), 60, 900).astype(np.int32)
+
+        # popularity rank r plays song song_by_rank[r]
+        self.song_by_rank = rng.permutation(NUM_SONGS)
+        self.song_cdf = zipf_cdf(NUM_SONGS, SONG_ZIPF)
+        activity = rng.pareto(USER_ALPHA, NUM_USERS) + 1.0
+        self.user_cdf = np.cumsum(activity) / activity.sum()
+        self.hour_cdf = np.cumsum(DIURNAL) / DIURNAL.sum()
+        self.start = np.datetime64(START_DATE, "s").astype(np.int64)
+
+    def chunk_codes(self, index, size):
+        """Catalog indexes and epoch timestamps for chunk number index."""
+        rng = np.random.default_rng(np.random.SeedSequence(SEED, spawn_key=(index,)))
+        user = sample(rng, self.user_cdf, size)
+        song = self.song_by_rank[sample(rng, self.song_cdf, size)]
+        day = rng.integers(0, DAYS, size)
+        hour = sample(rng, self.hour_cdf, size)
+        timestamp = self.start + day * 86400 + hour * 3600 + rng.integers(0, 3600, size)
+        return user, song, timestamp
+
+
+_catalog = None
+
+
+def _init_worker():
+    global _catalog
+    _catalog = Catalog()
+
+
+def encoded(codes, table):
+    """EncodedColumn over the values a chunk actually uses."""
+    used, inverse = np.unique(codes, return_inverse=True)
+    return EncodedColumn(inverse.reshape(-1), table[used])
+
+
+def chunk_batch(index, size):
+    catalog = _catalog
+    user, song, timestamp = catalog.chunk_codes(index, size)
+    artist = catalog.song_artist[song]
+    return RecordBatch(
+        user_id=encoded(user, catalog.users),
+        song_id=encoded(song, catalog.songs),
+        artist=encoded(artist, catalog.artists),
+        duration=catalog.song_duration[song],
+        timestamp=timestamp,
+        genre=encoded(catalog.artist_genre[artist], catalog.genres),
+    )
+
+
+def chunk_csv(index, size):
+    catalog = _catalog
+    user, song, timestamp = catalog.chunk_codes(index, size)
+    artist = catalog.song_artist[song]
+    columns = (
+        catalog.users[user].tolist(),
+        catalog.songs[song].tolist(),
+        catalog.artists[artist].tolist(),
+        catalog.song_duration[song].tolist(),
+        np.datetime_as_string(timestamp.astype("datetime64[s]")).tolist(),
+        catalog.genres[catalog.artist_genre[artist]].tolist(),
+    )
+    return "".join(f"{u},{s},{a},{d},{t},{g}\n" for u, s, a, d, t, g in zip(*columns)).encode("utf-8")
+
+
+def generate(make_chunk, workers=WORKERS):
+    """Chunks in order; at most 2 x workers are in flight."""
+    sizes = [min(CHUNK_RECORDS, NUM_RECORDS - start) for start in range(0, NUM_RECORDS, CHUNK_RECORDS)]
+    if workers <= 1 or len(sizes) <= 1:
+        _init_worker()
+        for index, size in enumerate(sizes):
+            yield make_chunk(index, size)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        in_flight = deque()
+        for index, size in enumerate(sizes):
+            in_flight.append(pool.submit(make_chunk, index, size))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def main():
+    start = time.time()
+    if OUTPUT.endswith(EXTENSION):
+        with ColumnarWriter(os.path.dirname(os.path.abspath(OUTPUT))) as writer:
+            for batch in generate(chunk_batch):
+                writer.write_batch(batch)
+            writer.save(OUTPUT)
+    else:
+        with open(OUTPUT, "wb") as f:
+            f.write((",".join(FIELDS) + "\n").encode("utf-8"))
+            for data in generate(chunk_csv):
+                f.write(data)
+
+    elapsed = time.time() - start
+    print(f"'{OUTPUT}': {NUM_RECORDS} records ({NUM_USERS} users, {NUM_SONGS} songs, {NUM_ARTISTS} artists, "
+          f"{NUM_GENRES} genres) in {elapsed:.2f}s, {os.path.getsize(OUTPUT)} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,19 @@
 import os
 import sys
 import time
-import csv
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import grpc
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "generated"))
 from generated import music_service_pb2, music_service_pb2_grpc
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from services import stream_loader
+from services.thread_output import capture_threads, run_captured
+
 # ───────────────────────────────────────────────
 # Environment Variables (works for local + Docker)
 # ───────────────────────────────────────────────
@@ -20,35 +25,99 @@ GENRE_ANALYSIS_HOST = os.getenv("GENRE_ANALYSIS_HOST", "localhost")
 GENRE_ANALYSIS_PORT = os.getenv("GENRE_ANALYSIS_PORT", "50055")
 RECOMMENDATION_HOST = os.getenv("RECOMMENDATION_HOST", "localhost")
 RECOMMENDATION_PORT = os.getenv("RECOMMENDATION_PORT", "50057")
-
-
-DATA_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "stream_data.csv")
+ANALYTICS_HOST = os.getenv("ANALYTICS_HOST", "localhost")
+ANALYTICS_PORT = os.getenv("ANALYTICS_PORT", "50059")
+
+# "separate" calls MapReduce, UserBehavior and GenreAnalysis one by one,
+# "fused" sends the records once to AnalyticsService.AnalyzeAll
+WORKFLOW_MODE = os.getenv("WORKFLOW_MODE", "separate")
+
+# Stream the CSV to MapReduce in chunks (AggregateStreamChunks) instead of one StreamList
+MAPREDUCE_STREAMING = os.getenv("MAPREDUCE_STREAMING", "0") == "1"
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "10000"))
+# Stream chunks to AnalyzeUsersStream / AnalyzeGenresStream and merge the partial results
+ANALYSIS_STREAMING = os.getenv("ANALYSIS_STREAMING", "0") == "1"
+
+# Call MapReduce, UserBehavior and GenreAnalysis concurrently (0 = one after another)
+CONCURRENT_CALLS = os.getenv("CONCURRENT_CALLS", "1") == "1"
+
+# Repeat the workflow N times over the same pooled channels
+WORKFLOW_RUNS = int(os.getenv("WORKFLOW_RUNS", "1"))
+MAX_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_MESSAGE_MB", "64")) * 1024 * 1024
+CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", MAX_MESSAGE_BYTES),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_BYTES),
+    ("grpc.keepalive_time_ms", int(os.getenv("GRPC_KEEPALIVE_MS", "30000"))),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.max_pings_without_data", 0),
+]
+
+
+# a play-log CSV or a columnar dataset file (data/convert_dataset.py)
+DATA_CSV = os.getenv("DATA_CSV", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "stream_data.csv"))
 RESULTS_DIR = os.getenv(
     "RESULTS_DIR",
     os.path.join(os.path.dirname(os.path.dirname(__file__)), "results")
 )
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
+# ───────────────────────────────────────────────
+# Channel Pool
+# ───────────────────────────────────────────────
+class ChannelPool:
+    """One channel per address for the client's lifetime; stubs are cached per (stub class, address)."""
+
+    def __init__(self, options):
+        self.options = options
+        self.channels = {}
+        self.stubs = {}
+
+        self.lock = threading.Lock()
+
+    def stub(self, stub_cls, addr):
+        key = (stub_cls, addr)
+        with self.lock:
+            if key not in self.stubs:
+                if addr not in self.channels:
+                    self.channels[addr] = grpc.insecure_channel(addr, options=self.options)
+                self.stubs[key] = stub_cls(self.channels[addr])
+            return self.stubs[key]
+
+    def close(self):
+        for channel in self.channels.values():
+            channel.close()
+        self.channels.clear()
+        self.stubs.clear()
+
+
+CHANNELS = ChannelPool(CHANNEL_OPTIONS)
+
+
 # ───────────────────────────────────────────────
 # Utility Functions
 # ───────────────────────────────────────────────
+def records_from_columns(columns):
+    StreamRecord = music_service_pb2.StreamRecord
+    return [
+        StreamRecord(user_id=u, song_id=s, artist=a, duration=d, timestamp=t, genre=g)
+        for u, s, a, d, t, g in zip(*(columns[name] for name in stream_loader.FIELDS))
+    ]
+
+
 def load_data(csv_path):
     records = []
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rec = music_service_pb2.StreamRecord(
-                user_id=r["user_id"],
-                song_id=r["song_id"],
-                artist=r["artist"],
-                duration=int(r["duration"]),
-                timestamp=r["timestamp"],
-                genre=r.get("genre", "")
-            )
-            records.append(rec)
+    for columns in stream_loader.iter_columns(csv_path):
+        records.extend(records_from_columns(columns))
     return records
 
 
+def iter_record_chunks(csv_path, chunk_size):
+    """Yield StreamList messages of at most chunk_size records, reading the CSV lazily."""
+    for columns in stream_loader.iter_columns(csv_path, chunk_size):
+        yield music_service_pb2.StreamList(records=records_from_columns(columns))
+
+
 # ───────────────────────────────────────────────
 # MapReduce Service
 # ───────────────────────────────────────────────
@@ -58,9 +127,28 @@ def call_mapreduce(records):
     print("[MapReduce Service] Global Song Play Analysis")
     print("=" * 70)
     start = time.time()
-    with grpc.insecure_channel(addr) as channel:
-        stub = music_service_pb2_grpc.MapReduceServiceStub(channel)
-        resp = stub.AggregateStream(music_service_pb2.StreamList(records=records))
+    stub = CHANNELS.stub(music_service_pb2_grpc.MapReduceServiceStub, addr)
+    resp = stub.AggregateStream(music_service_pb2.StreamList(records=records))
+    elapsed = time.time() - start
+
+    print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s)")
+    print("-" * 70)
+    print("Top Song Play Counts:")
+    sorted_counts = sorted(resp.play_counts.items(), key=lambda x: x[1], reverse=True)
+    for i, (song, count) in enumerate(sorted_counts[:10], 1):
+        print(f"  {i}. {song}: {count} plays")
+    print()
+    return resp
+
+
+def call_mapreduce_streaming(csv_path, chunk_size=CHUNK_SIZE):
+    addr = f"{MAPREDUCE_HOST}:{MAPREDUCE_PORT}"
+    print("=" * 70)
+    print(f"[MapReduce Service] Global Song Play Analysis (streamed, {chunk_size} records/chunk)")
+    print("=" * 70)
+    start = time.time()
+    stub = CHANNELS.stub(music_service_pb2_grpc.MapReduceServiceStub, addr)
+    resp = stub.AggregateStreamChunks(iter_record_chunks(csv_path, chunk_size))
     elapsed = time.time() - start
 
     print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s)")
@@ -82,9 +170,8 @@ def call_userbehavior(records):
     print("[UserBehavior Service] User Listening Analytics")
     print("=" * 70)
     start = time.time()
-    with grpc.insecure_channel(addr) as channel:
-        stub = music_service_pb2_grpc.UserBehaviorServiceStub(channel)
-        resp = stub.AnalyzeUsers(music_service_pb2.StreamList(records=records))
+    stub = CHANNELS.stub(music_service_pb2_grpc.UserBehaviorServiceStub, addr)
+    resp = stub.AnalyzeUsers(music_service_pb2.StreamList(records=records))
     elapsed = time.time() - start
 
     print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s)")
@@ -106,6 +193,41 @@ def call_userbehavior(records):
     return resp
 
 
+def call_userbehavior_streaming(csv_path, chunk_size=CHUNK_SIZE):
+    addr = f"{USERBEHAVIOR_HOST}:{USERBEHAVIOR_PORT}"
+    print("=" * 70)
+    print(f"[UserBehavior Service] User Listening Analytics (streamed, {chunk_size} records/chunk)")
+    print("=" * 70)
+    start = time.time()
+    user_stats = {}
+    updates = 0
+    stub = CHANNELS.stub(music_service_pb2_grpc.UserBehaviorServiceStub, addr)
+    for delta in stub.AnalyzeUsersStream(iter_record_chunks(csv_path, chunk_size)):
+        # each delta carries cumulative stats for the users that changed
+        for stat in delta.user_stats:
+            user_stats[stat.user_id] = stat
+        updates += 1
+        print(f"  [partial {updates}] {len(user_stats)} users, top: {', '.join(delta.top_users)} "
+              f"(+{time.time() - start:.4f}s)")
+    elapsed = time.time() - start
+
+    resp = music_service_pb2.UserStatsList(
+        user_stats=list(user_stats.values()),
+        top_users=delta.top_users,
+        processing_time=delta.processing_time
+    )
+    print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s, {updates} updates)")
+    print("-" * 70)
+    print("User Activity Summary:")
+    for stat in resp.user_stats:
+        print(
+            f"  • User {stat.user_id}: "
+            f"Total Time {stat.total_time}s, Top Artist: {stat.top_artist}"
+        )
+    print()
+    return resp
+
+
 # ───────────────────────────────────────────────
 # Genre Analysis Service
 # ───────────────────────────────────────────────
@@ -115,9 +237,8 @@ def call_genre_analysis(records):
     print("[Genre Analysis Service] Global Genre Play Analysis")
     print("=" * 70)
     start = time.time()
-    with grpc.insecure_channel(addr) as channel:
-        stub = music_service_pb2_grpc.GenreAnalysisServiceStub(channel)
-        resp = stub.AnalyzeGenres(music_service_pb2.StreamList(records=records))
+    stub = CHANNELS.stub(music_service_pb2_grpc.GenreAnalysisServiceStub, addr)
+    resp = stub.AnalyzeGenres(music_service_pb2.StreamList(records=records))
     elapsed = time.time() - start
 
     print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s)")
@@ -129,6 +250,67 @@ def call_genre_analysis(records):
     return resp
 
 
+def call_genre_analysis_streaming(csv_path, chunk_size=CHUNK_SIZE):
+    addr = f"{GENRE_ANALYSIS_HOST}:{GENRE_ANALYSIS_PORT}"
+    print("=" * 70)
+    print(f"[Genre Analysis Service] Global Genre Play Analysis (streamed, {chunk_size} records/chunk)")
+    print("=" * 70)
+    start = time.time()
+    genre_counts = {}
+    updates = 0
+    stub = CHANNELS.stub(music_service_pb2_grpc.GenreAnalysisServiceStub, addr)
+    for delta in stub.AnalyzeGenresStream(iter_record_chunks(csv_path, chunk_size)):
+        genre_counts.update(delta.genre_counts)
+        updates += 1
+        print(f"  [partial {updates}] top: {', '.join(delta.top_genres[:5])} (+{time.time() - start:.4f}s)")
+    elapsed = time.time() - start
+
+    resp = music_service_pb2.GenreAnalysisResponse(
+        genre_counts=genre_counts,
+        top_genres=delta.top_genres,
+        processing_time=delta.processing_time
+    )
+    print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s, {updates} updates)")
+    print("-" * 70)
+    print("Top Genres:")
+    for i, genre in enumerate(resp.top_genres, 1):
+        print(f"  {i}. {genre} ({resp.genre_counts[genre]} plays)")
+    print()
+    return resp
+
+
+# ───────────────────────────────────────────────
+# Fused Analytics Service
+# ───────────────────────────────────────────────
+def call_analyze_all(records):
+    addr = f"{ANALYTICS_HOST}:{ANALYTICS_PORT}"
+    print("=" * 70)
+    print("[Analytics Service] Play Counts + User Behavior + Genres (single pass)")
+    print("=" * 70)
+    start = time.time()
+    stub = CHANNELS.stub(music_service_pb2_grpc.AnalyticsServiceStub, addr)
+    resp = stub.AnalyzeAll(music_service_pb2.StreamList(records=records))
+    elapsed = time.time() - start
+
+    print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s)")
+    print("-" * 70)
+    print("Top Song Play Counts:")
+    sorted_counts = sorted(resp.play_counts.play_counts.items(), key=lambda x: x[1], reverse=True)
+    for i, (song, count) in enumerate(sorted_counts[:10], 1):
+        print(f"  {i}. {song}: {count} plays")
+    print("\nUser Activity Summary:")
+    for stat in resp.user_stats.user_stats:
+        print(
+            f"  • User {stat.user_id}: "
+            f"Total Time {stat.total_time}s, Top Artist: {stat.top_artist}"
+        )
+    print("\nTop Genres:")
+    for i, genre in enumerate(resp.genre_analysis.top_genres, 1):
+        print(f"  {i}. {genre} ({resp.genre_analysis.genre_counts[genre]} plays)")
+    print()
+    return resp
+
+
 # ───────────────────────────────────────────────
 # Recommendation Service
 # ───────────────────────────────────────────────
@@ -138,16 +320,15 @@ def call_recommendation(play_counts, user_stats):
     print("[Recommendation Service] Personalized Song Suggestions")
     print("=" * 70)
     start = time.time()
-    with grpc.insecure_channel(addr) as channel:
-        stub = music_service_pb2_grpc.RecommendationServiceStub(channel)
+    stub = CHANNELS.stub(music_service_pb2_grpc.RecommendationServiceStub, addr)
 
-        # Build PlayCounts message properly
-        pc = music_service_pb2.PlayCounts(processing_time=play_counts.processing_time)
-        for k, v in play_counts.play_counts.items():
-            pc.play_counts[k] = v
+    # Build PlayCounts message properly
+    pc = music_service_pb2.PlayCounts(processing_time=play_counts.processing_time)
+    for k, v in play_counts.play_counts.items():
+        pc.play_counts[k] = v
 
-        req = music_service_pb2.RecommendationRequest(play_counts=pc, user_stats=user_stats)
-        resp = stub.Recommend(req)
+    req = music_service_pb2.RecommendationRequest(play_counts=pc, user_stats=user_stats)
+    resp = stub.Recommend(req)
     elapsed = time.time() - start
 
     print(f"Processing Time: {resp.processing_time:.4f}s (Roundtrip {elapsed:.4f}s)")
@@ -181,7 +362,11 @@ def main():
     print("=" * 70)
     print("🎵 MUSIC STREAMING ANALYTICS CLIENT")
     print("=" * 70)
-    print("Workflow: Client → MapReduce → UserBehavior → Genre Analysis → Recommendation → Client")
+    if WORKFLOW_MODE == "fused":
+        workflow = "Client → Analytics (MapReduce + UserBehavior + Genre Analysis) → Recommendation → Client"
+    else:
+        workflow = "Client → MapReduce → UserBehavior → Genre Analysis → Recommendation → Client"
+    print(f"Workflow: {workflow}")
     print("=" * 70)
     print()
 
@@ -190,20 +375,78 @@ def main():
     print(f"[Client] ✓ Loaded {len(records)} streaming records")
     print()
 
-    total_start = time.time()
+    try:
+        for run in range(1, WORKFLOW_RUNS + 1):
+            if WORKFLOW_RUNS > 1:
+                print(f"[Client] Workflow run {run}/{WORKFLOW_RUNS}")
+            run_workflow(records, workflow, run)
+    finally:
+        CHANNELS.close()
 
-    # 1️⃣ MapReduce
-    mapreduce_resp = call_mapreduce(records)
 
-    # 2️⃣ UserBehavior
-    userbehavior_resp = call_userbehavior(records)
+def run_concurrent(records):
+    """
+    MapReduce, UserBehavior and GenreAnalysis are independent: dispatch them together
+    and start Recommendation as soon as MapReduce and UserBehavior have answered.
+    """
+    mapreduce_fn, mapreduce_arg = (call_mapreduce_streaming, DATA_CSV) if MAPREDUCE_STREAMING else (call_mapreduce, records)
+    if ANALYSIS_STREAMING:
+        (userbehavior_fn, genre_fn), analysis_arg = (call_userbehavior_streaming, call_genre_analysis_streaming), DATA_CSV
+    else:
+        (userbehavior_fn, genre_fn), analysis_arg = (call_userbehavior, call_genre_analysis), records
 
-    # 3️⃣ Genre Analysis
-    genre_resp = call_genre_analysis(records)
+    with capture_threads(), ThreadPoolExecutor(max_workers=3) as ex:
+        mapreduce_f = ex.submit(run_captured, mapreduce_fn, mapreduce_arg)
+        userbehavior_f = ex.submit(run_captured, userbehavior_fn, analysis_arg)
+        genre_f = ex.submit(run_captured, genre_fn, analysis_arg)
 
-    # 4️⃣ Recommendation
-    recommendation_resp = call_recommendation(mapreduce_resp, userbehavior_resp)
+        mapreduce_resp, mapreduce_out, mapreduce_t = mapreduce_f.result()
+        userbehavior_resp, userbehavior_out, userbehavior_t = userbehavior_f.result()
+        recommendation_f = ex.submit(run_captured, call_recommendation, mapreduce_resp, userbehavior_resp)
 
+        genre_resp, genre_out, genre_t = genre_f.result()
+        recommendation_resp, recommendation_out, recommendation_t = recommendation_f.result()
+
+    for out in (mapreduce_out, userbehavior_out, genre_out, recommendation_out):
+        print(out, end="")
+
+    critical_path = max(max(mapreduce_t, userbehavior_t) + recommendation_t, genre_t)
+    sequential = mapreduce_t + userbehavior_t + genre_t + recommendation_t
+    return mapreduce_resp, userbehavior_resp, genre_resp, recommendation_resp, critical_path, sequential
+
+
+def run_workflow(records, workflow, run=1):
+    total_start = time.time()
+    critical_path = sequential = recommendation_resp = None
+
+    if WORKFLOW_MODE != "fused" and CONCURRENT_CALLS:
+        (mapreduce_resp, userbehavior_resp, genre_resp, recommendation_resp,
+         critical_path, sequential) = run_concurrent(records)
+    elif WORKFLOW_MODE == "fused":
+        # 1️⃣-3️⃣ One upload, one scan
+        analysis_resp = call_analyze_all(records)
+        mapreduce_resp = analysis_resp.play_counts
+        userbehavior_resp = analysis_resp.user_stats
+        genre_resp = analysis_resp.genre_analysis
+    else:
+        # 1️⃣ MapReduce
+        if MAPREDUCE_STREAMING:
+            mapreduce_resp = call_mapreduce_streaming(DATA_CSV)
+        else:
+            mapreduce_resp = call_mapreduce(records)
+
+        # 2️⃣ UserBehavior
+        # 3️⃣ Genre Analysis
+        if ANALYSIS_STREAMING:
+            userbehavior_resp = call_userbehavior_streaming(DATA_CSV)
+            genre_resp = call_genre_analysis_streaming(DATA_CSV)
+        else:
+            userbehavior_resp = call_userbehavior(records)
+            genre_resp = call_genre_analysis(records)
+
+    if recommendation_resp is None:
+        # 4️⃣ Recommendation
+        recommendation_resp = call_recommendation(mapreduce_resp, userbehavior_resp)
 
     total_time = time.time() - total_start
 
@@ -214,21 +457,27 @@ def main():
     print(f"UserBehavior Time:   {userbehavior_resp.processing_time:.4f}s")
     print(f"Genre Analysis Time: {genre_resp.processing_time:.4f}s")
     print(f"Recommendation Time: {recommendation_resp.processing_time:.4f}s")
+    if critical_path is not None:
+        print(f"Critical Path Time:  {critical_path:.4f}s")
+        print(f"Sequential Sum:      {sequential:.4f}s")
     print(f"Total Workflow Time: {total_time:.4f}s")
     print("=" * 70)
     print("✓ All services completed successfully!")
     print("=" * 70)
 
- # ================== SAVE DETAILED METRICS ==================
+    # ================== SAVE DETAILED METRICS ==================
     metrics = {
         "timestamp": datetime.now().isoformat(),
-        "workflow": "Client → MapReduce → UserBehavior → Genre Analysis → Recommendation → Client",
+        "workflow": workflow,
+        "run": run,
         "performance": {
             "mapreduce_time": mapreduce_resp.processing_time,
             "userbehavior_time": userbehavior_resp.processing_time,
             "genre_time": genre_resp.processing_time,
             "recommendation_time": recommendation_resp.processing_time,
             "total_workflow_time": total_time,
+            "critical_path_time": critical_path,
+            "sequential_roundtrip_sum": sequential,
         },
         "mapreduce_results": {
             "top_songs": dict(sorted(mapreduce_resp.play_counts.items(), key=lambda x: x[1], reverse=True)[:10]),
@@ -0,0 +1,87 @@
+import os,sys
+import time
+import asyncio
+from concurrent import futures
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+grpc_dir = os.path.dirname(current_dir)
+project_root = os.path.dirname(grpc_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(current_dir, 'generated'))
+
+import grpc
+from generated import music_service_pb2, music_service_pb2_grpc
+from services.analytics_service import FusedAnalyticsService
+from server_metrics import MetricsInterceptor, AioMetricsInterceptor, serve_metrics
+from server_options import SERVER_OPTIONS
+
+def now():
+    return time.time()
+
+PORT = int(os.getenv("ANALYTICS_PORT", "50059"))
+# "threads" (grpc.server + thread pool) or "aio" (grpc.aio event loop, CPU work in an executor)
+SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "threads")
+AIO_EXECUTOR_WORKERS = int(os.getenv("AIO_EXECUTOR_WORKERS", "0")) or os.cpu_count()
+
+# Fused MapReduce + UserBehavior + GenreAnalysis over one upload
+class AnalyticsHandler(music_service_pb2_grpc.AnalyticsServiceServicer):
+
+    def AnalyzeAll(self, request, context):
+        start = now()
+        result = FusedAnalyticsService.analyze_all(request.records)
+        kernel_time = result["processing_time"]
+
+        resp = music_service_pb2.AnalysisResponse()
+        # PlayCounts
+        resp.play_counts.processing_time = kernel_time
+        for k, v in result["play_counts"].items():
+            resp.play_counts.play_counts[k] = v
+        # UserStatsList
+        resp.user_stats.processing_time = kernel_time
+        for us in result["user_stats"]:
+            resp.user_stats.user_stats.append(music_service_pb2.UserStat(**us))
+        for us in result["top_users"]:
+            resp.user_stats.top_users.append(us["user_id"])
+        # GenreAnalysisResponse
+        resp.genre_analysis.processing_time = kernel_time
+        resp.genre_analysis.top_genres.extend(result["top_genres"])
+        for g, c in result["genre_counts"].items():
+            resp.genre_analysis.genre_counts[g] = c
+
+        processing_time = now() - start
+        resp.processing_time = processing_time
+        return resp
+
+# grpc.aio variant: the event loop only does I/O, the handler runs in the executor
+class AioAnalyticsHandler(music_service_pb2_grpc.AnalyticsServiceServicer):
+
+    def __init__(self, executor):
+        self.handler = AnalyticsHandler()
+        self.executor = executor
+
+    async def AnalyzeAll(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.handler.AnalyzeAll, request, context)
+
+def serve():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8), interceptors=[MetricsInterceptor()], options=SERVER_OPTIONS)
+    music_service_pb2_grpc.add_AnalyticsServiceServicer_to_server(AnalyticsHandler(), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    server.start()
+    server.wait_for_termination()
+
+async def serve_aio():
+    executor = futures.ThreadPoolExecutor(max_workers=AIO_EXECUTOR_WORKERS)
+    server = grpc.aio.server(interceptors=[AioMetricsInterceptor()], options=SERVER_OPTIONS)
+    music_service_pb2_grpc.add_AnalyticsServiceServicer_to_server(AioAnalyticsHandler(executor), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    await server.wait_for_termination()
+
+if __name__ == "__main__":
+    metrics_port = serve_metrics("analytics", PORT)
+    print(f"[Analytics] gRPC server ({SERVER_MODE}) started on port {PORT}, metrics on port {metrics_port}")
+    if SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
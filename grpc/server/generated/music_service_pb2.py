@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13music_service.proto\x12\x05music\"t\n\x0cStreamRecord\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x0f\n\x07song_id\x18\x02 \x01(\t\x12\x0e\n\x06\x61rtist\x18\x03 \x01(\t\x12\x10\n\x08\x64uration\x18\x04 \x01(\x05\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\r\n\x05genre\x18\x06 \x01(\t\"2\n\nStreamList\x12$\n\x07records\x18\x01 \x03(\x0b\x32\x13.music.StreamRecord\"\x90\x01\n\nPlayCounts\x12\x36\n\x0bplay_counts\x18\x01 \x03(\x0b\x32!.music.PlayCounts.PlayCountsEntry\x12\x17\n\x0fprocessing_time\x18\x02 \x01(\x01\x1a\x31\n\x0fPlayCountsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"C\n\x08UserStat\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x12\n\ntotal_time\x18\x02 \x01(\x05\x12\x12\n\ntop_artist\x18\x03 \x01(\t\"`\n\rUserStatsList\x12#\n\nuser_stats\x18\x01 \x03(\x0b\x32\x0f.music.UserStat\x12\x11\n\ttop_users\x18\x02 \x03(\t\x12\x17\n\x0fprocessing_time\x18\x03 \x01(\x01\"i\n\x15RecommendationRequest\x12&\n\x0bplay_counts\x18\x01 \x01(\x0b\x32\x11.music.PlayCounts\x12(\n\nuser_stats\x18\x02 \x01(\x0b\x32\x14.music.UserStatsList\"\xe6\x01\n\x16RecommendationResponse\x12\x16\n\x0etrending_songs\x18\x01 \x03(\t\x12K\n\x0frecommendations\x18\x02 \x03(\x0b\x32\x32.music.RecommendationResponse.RecommendationsEntry\x12\x17\n\x0fprocessing_time\x18\x03 \x01(\x01\x1aN\n\x14RecommendationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12%\n\x05value\x18\x02 \x01(\x0b\x32\x16.music.repeated_string:\x02\x38\x01\"\xbd\x01\n\x15GenreAnalysisResponse\x12\x43\n\x0cgenre_counts\x18\x01 \x03(\x0b\x32-.music.GenreAnalysisResponse.GenreCountsEntry\x12\x12\n\ntop_genres\x18\x02 \x03(\t\x12\x17\n\x0fprocessing_time\x18\x03 \x01(\x01\x1a\x32\n\x10GenreCountsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"!\n\x0frepeated_string\x12\x0e\n\x06values\x18\x01 \x03(\t2M\n\x10MapReduceService\x12\x39\n\x0f\x41ggregateStream\x12\x11.music.StreamList\x1a\x11.music.PlayCounts\"\x00\x32P\n\x13UserBehaviorService\x12\x39\n\x0c\x41nalyzeUsers\x12\x11.music.StreamList\x1a\x14.music.UserStatsList\"\x00\x32Z\n\x14GenreAnalysisService\x12\x42\n\rAnalyzeGenres\x12\x11.music.StreamList\x1a\x1c.music.GenreAnalysisResponse\"\x00\x32\x63\n\x15RecommendationService\x12J\n\tRecommend\x12\x1c.music.RecommendationRequest\x1a\x1d.music.RecommendationResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13music_service.proto\x12\x05music\"t\n\x0cStreamRecord\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x0f\n\x07song_id\x18\x02 \x01(\t\x12\x0e\n\x06\x61rtist\x18\x03 \x01(\t\x12\x10\n\x08\x64uration\x18\x04 \x01(\x05\x12\x11\n\ttimestamp\x18\x05 \x01(\t\x12\r\n\x05genre\x18\x06 \x01(\t\"2\n\nStreamList\x12$\n\x07records\x18\x01 \x03(\x0b\x32\x13.music.StreamRecord\"\x90\x01\n\nPlayCounts\x12\x36\n\x0bplay_counts\x18\x01 \x03(\x0b\x32!.music.PlayCounts.PlayCountsEntry\x12\x17\n\x0fprocessing_time\x18\x02 \x01(\x01\x1a\x31\n\x0fPlayCountsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"C\n\x08UserStat\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\x12\n\ntotal_time\x18\x02 \x01(\x05\x12\x12\n\ntop_artist\x18\x03 \x01(\t\"`\n\rUserStatsList\x12#\n\nuser_stats\x18\x01 \x03(\x0b\x32\x0f.music.UserStat\x12\x11\n\ttop_users\x18\x02 \x03(\t\x12\x17\n\x0fprocessing_time\x18\x03 \x01(\x01\"i\n\x15RecommendationRequest\x12&\n\x0bplay_counts\x18\x01 \x01(\x0b\x32\x11.music.PlayCounts\x12(\n\nuser_stats\x18\x02 \x01(\x0b\x32\x14.music.UserStatsList\"\xe6\x01\n\x16RecommendationResponse\x12\x16\n\x0etrending_songs\x18\x01 \x03(\t\x12K\n\x0frecommendations\x18\x02 \x03(\x0b\x32\x32.music.RecommendationResponse.RecommendationsEntry\x12\x17\n\x0fprocessing_time\x18\x03 \x01(\x01\x1aN\n\x14RecommendationsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12%\n\x05value\x18\x02 \x01(\x0b\x32\x16.music.repeated_string:\x02\x38\x01\"\xbd\x01\n\x15GenreAnalysisResponse\x12\x43\n\x0cgenre_counts\x18\x01 \x03(\x0b\x32-.music.GenreAnalysisResponse.GenreCountsEntry\x12\x12\n\ntop_genres\x18\x02 \x03(\t\x12\x17\n\x0fprocessing_time\x18\x03 \x01(\x01\x1a\x32\n\x10GenreCountsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"\xb3\x01\n\x10\x41nalysisResponse\x12&\n\x0bplay_counts\x18\x01 \x01(\x0b\x32\x11.music.PlayCounts\x12(\n\nuser_stats\x18\x02 \x01(\x0b\x32\x14.music.UserStatsList\x12\x34\n\x0egenre_analysis\x18\x03 \x01(\x0b\x32\x1c.music.GenreAnalysisResponse\x12\x17\n\x0fprocessing_time\x18\x04 \x01(\x01\"!\n\x0frepeated_string\x12\x0e\n\x06values\x18\x01 \x03(\t2\x90\x01\n\x10MapReduceService\x12\x39\n\x0f\x41ggregateStream\x12\x11.music.StreamList\x1a\x11.music.PlayCounts\"\x00\x12\x41\n\x15\x41ggregateStreamChunks\x12\x11.music.StreamList\x1a\x11.music.PlayCounts\"\x00(\x01\x32\x95\x01\n\x13UserBehaviorService\x12\x39\n\x0c\x41nalyzeUsers\x12\x11.music.StreamList\x1a\x14.music.UserStatsList\"\x00\x12\x43\n\x12\x41nalyzeUsersStream\x12\x11.music.StreamList\x1a\x14.music.UserStatsList\"\x00(\x01\x30\x01\x32\xa8\x01\n\x14GenreAnalysisService\x12\x42\n\rAnalyzeGenres\x12\x11.music.StreamList\x1a\x1c.music.GenreAnalysisResponse\"\x00\x12L\n\x13\x41nalyzeGenresStream\x12\x11.music.StreamList\x1a\x1c.music.GenreAnalysisResponse\"\x00(\x01\x30\x01\x32\x63\n\x15RecommendationService\x12J\n\tRecommend\x12\x1c.music.RecommendationRequest\x1a\x1d.music.RecommendationResponse\"\x00\x32N\n\x10\x41nalyticsService\x12:\n\nAnalyzeAll\x12\x11.music.StreamList\x1a\x17.music.AnalysisResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -59,14 +59,18 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_GENREANALYSISRESPONSE']._serialized_end=1044
   _globals['_GENREANALYSISRESPONSE_GENRECOUNTSENTRY']._serialized_start=994
   _globals['_GENREANALYSISRESPONSE_GENRECOUNTSENTRY']._serialized_end=1044
-  _globals['_REPEATED_STRING']._serialized_start=1046
-  _globals['_REPEATED_STRING']._serialized_end=1079
-  _globals['_MAPREDUCESERVICE']._serialized_start=1081
-  _globals['_MAPREDUCESERVICE']._serialized_end=1158
-  _globals['_USERBEHAVIORSERVICE']._serialized_start=1160
-  _globals['_USERBEHAVIORSERVICE']._serialized_end=1240
-  _globals['_GENREANALYSISSERVICE']._serialized_start=1242
-  _globals['_GENREANALYSISSERVICE']._serialized_end=1332
-  _globals['_RECOMMENDATIONSERVICE']._serialized_start=1334
-  _globals['_RECOMMENDATIONSERVICE']._serialized_end=1433
+  _globals['_ANALYSISRESPONSE']._serialized_start=1047
+  _globals['_ANALYSISRESPONSE']._serialized_end=1226
+  _globals['_REPEATED_STRING']._serialized_start=1228
+  _globals['_REPEATED_STRING']._serialized_end=1261
+  _globals['_MAPREDUCESERVICE']._serialized_start=1264
+  _globals['_MAPREDUCESERVICE']._serialized_end=1408
+  _globals['_USERBEHAVIORSERVICE']._serialized_start=1411
+  _globals['_USERBEHAVIORSERVICE']._serialized_end=1560
+  _globals['_GENREANALYSISSERVICE']._serialized_start=1563
+  _globals['_GENREANALYSISSERVICE']._serialized_end=1731
+  _globals['_RECOMMENDATIONSERVICE']._serialized_start=1733
+  _globals['_RECOMMENDATIONSERVICE']._serialized_end=1832
+  _globals['_ANALYTICSSERVICE']._serialized_start=1834
+  _globals['_ANALYTICSSERVICE']._serialized_end=1912
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,11 @@ class MapReduceServiceStub(object):
                 request_serializer=music__service__pb2.StreamList.SerializeToString,
                 response_deserializer=music__service__pb2.PlayCounts.FromString,
                 _registered_method=True)
+        self.AggregateStreamChunks = channel.stream_unary(
+                '/music.MapReduceService/AggregateStreamChunks',
+                request_serializer=music__service__pb2.StreamList.SerializeToString,
+                response_deserializer=music__service__pb2.PlayCounts.FromString,
+                _registered_method=True)
 
 
 class MapReduceServiceServicer(object):
@@ -50,6 +55,13 @@ class MapReduceServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AggregateStreamChunks(self, request_iterator, context):
+        """client-streaming: records arrive as StreamList chunks, counts are folded as they come
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_MapReduceServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +70,11 @@ def add_MapReduceServiceServicer_to_server(servicer, server):
                     request_deserializer=music__service__pb2.StreamList.FromString,
                     response_serializer=music__service__pb2.PlayCounts.SerializeToString,
             ),
+            'AggregateStreamChunks': grpc.stream_unary_rpc_method_handler(
+                    servicer.AggregateStreamChunks,
+                    request_deserializer=music__service__pb2.StreamList.FromString,
+                    response_serializer=music__service__pb2.PlayCounts.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'music.MapReduceService', rpc_method_handlers)
@@ -96,6 +113,33 @@ class MapReduceService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def AggregateStreamChunks(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/music.MapReduceService/AggregateStreamChunks',
+            music__service__pb2.StreamList.SerializeToString,
+            music__service__pb2.PlayCounts.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class UserBehaviorServiceStub(object):
     """Missing associated documentation comment in .proto file."""
@@ -111,6 +155,11 @@ class UserBehaviorServiceStub(object):
                 request_serializer=music__service__pb2.StreamList.SerializeToString,
                 response_deserializer=music__service__pb2.UserStatsList.FromString,
                 _registered_method=True)
+        self.AnalyzeUsersStream = channel.stream_stream(
+                '/music.UserBehaviorService/AnalyzeUsersStream',
+                request_serializer=music__service__pb2.StreamList.SerializeToString,
+                response_deserializer=music__service__pb2.UserStatsList.FromString,
+                _registered_method=True)
 
 
 class UserBehaviorServiceServicer(object):
@@ -122,6 +171,14 @@ class UserBehaviorServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AnalyzeUsersStream(self, request_iterator, context):
+        """bidirectional: each response carries the users changed since the previous one
+        (cumulative values) plus the current top_users
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_UserBehaviorServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -130,6 +187,11 @@ def add_UserBehaviorServiceServicer_to_server(servicer, server):
                     request_deserializer=music__service__pb2.StreamList.FromString,
                     response_serializer=music__service__pb2.UserStatsList.SerializeToString,
             ),
+            'AnalyzeUsersStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.AnalyzeUsersStream,
+                    request_deserializer=music__service__pb2.StreamList.FromString,
+                    response_serializer=music__service__pb2.UserStatsList.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'music.UserBehaviorService', rpc_method_handlers)
@@ -168,6 +230,33 @@ class UserBehaviorService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def AnalyzeUsersStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/music.UserBehaviorService/AnalyzeUsersStream',
+            music__service__pb2.StreamList.SerializeToString,
+            music__service__pb2.UserStatsList.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class GenreAnalysisServiceStub(object):
     """Missing associated documentation comment in .proto file."""
@@ -183,6 +272,11 @@ class GenreAnalysisServiceStub(object):
                 request_serializer=music__service__pb2.StreamList.SerializeToString,
                 response_deserializer=music__service__pb2.GenreAnalysisResponse.FromString,
                 _registered_method=True)
+        self.AnalyzeGenresStream = channel.stream_stream(
+                '/music.GenreAnalysisService/AnalyzeGenresStream',
+                request_serializer=music__service__pb2.StreamList.SerializeToString,
+                response_deserializer=music__service__pb2.GenreAnalysisResponse.FromString,
+                _registered_method=True)
 
 
 class GenreAnalysisServiceServicer(object):
@@ -194,6 +288,14 @@ class GenreAnalysisServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def AnalyzeGenresStream(self, request_iterator, context):
+        """bidirectional: each response carries the genres changed since the previous one
+        (cumulative counts) plus the current top_genres
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_GenreAnalysisServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -202,6 +304,11 @@ def add_GenreAnalysisServiceServicer_to_server(servicer, server):
                     request_deserializer=music__service__pb2.StreamList.FromString,
                     response_serializer=music__service__pb2.GenreAnalysisResponse.SerializeToString,
             ),
+            'AnalyzeGenresStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.AnalyzeGenresStream,
+                    request_deserializer=music__service__pb2.StreamList.FromString,
+                    response_serializer=music__service__pb2.GenreAnalysisResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'music.GenreAnalysisService', rpc_method_handlers)
@@ -240,6 +347,33 @@ class GenreAnalysisService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def AnalyzeGenresStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/music.GenreAnalysisService/AnalyzeGenresStream',
+            music__service__pb2.StreamList.SerializeToString,
+            music__service__pb2.GenreAnalysisResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class RecommendationServiceStub(object):
     """Missing associated documentation comment in .proto file."""
@@ -311,3 +445,78 @@ class RecommendationService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+
+class AnalyticsServiceStub(object):
+    """play counts, user stats and genre counts from a single upload
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.AnalyzeAll = channel.unary_unary(
+                '/music.AnalyticsService/AnalyzeAll',
+                request_serializer=music__service__pb2.StreamList.SerializeToString,
+                response_deserializer=music__service__pb2.AnalysisResponse.FromString,
+                _registered_method=True)
+
+
+class AnalyticsServiceServicer(object):
+    """play counts, user stats and genre counts from a single upload
+    """
+
+    def AnalyzeAll(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_AnalyticsServiceServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'AnalyzeAll': grpc.unary_unary_rpc_method_handler(
+                    servicer.AnalyzeAll,
+                    request_deserializer=music__service__pb2.StreamList.FromString,
+                    response_serializer=music__service__pb2.AnalysisResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'music.AnalyticsService', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('music.AnalyticsService', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class AnalyticsService(object):
+    """play counts, user stats and genre counts from a single upload
+    """
+
+    @staticmethod
+    def AnalyzeAll(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/music.AnalyticsService/AnalyzeAll',
+            music__service__pb2.StreamList.SerializeToString,
+            music__service__pb2.AnalysisResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -1,9 +1,8 @@
 import os
 import sys
 import time
+import asyncio
 from concurrent import futures
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
 import grpc
 
 # ───────────────────────────────────────────────
@@ -20,12 +19,23 @@ sys.path.insert(0, os.path.join(current_dir, 'generated'))  # <-- gRPC generated
 # Imports
 # ───────────────────────────────────────────────
 from generated import music_service_pb2, music_service_pb2_grpc
-from services.genre_analysis_service import GenreAnalysisStreamService
+from services.genre_analysis_service import GenreAnalysisStreamService, GenreCountAccumulator
+from services.record_batch import RecordBatch
+from server_metrics import MetricsInterceptor, AioMetricsInterceptor, serve_metrics
+from server_options import SERVER_OPTIONS
+from stream_emit import chunks_or_ticks
 
 # ───────────────────────────────────────────────
 # Server port
 # ───────────────────────────────────────────────
 PORT = int(os.getenv("GENRE_ANALYSIS_PORT", "50055"))
+# AnalyzeGenresStream emits a delta every N records or T milliseconds, whichever comes first
+# (threads mode checks T as chunks arrive; aio mode also emits on a timer between chunks)
+EMIT_EVERY_RECORDS = int(os.getenv("STREAM_EMIT_RECORDS", "10000"))
+EMIT_INTERVAL_MS = int(os.getenv("STREAM_EMIT_MS", "500"))
+# "threads" (grpc.server + thread pool) or "aio" (grpc.aio event loop, CPU work in an executor)
+SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "threads")
+AIO_EXECUTOR_WORKERS = int(os.getenv("AIO_EXECUTOR_WORKERS", "0")) or os.cpu_count()
 
 # ───────────────────────────────────────────────
 # Utility
@@ -40,41 +50,85 @@ class GenreAnalysisHandler(music_service_pb2_grpc.GenreAnalysisServiceServicer):
 
     def AnalyzeGenres(self, request, context):
         start = now()
-        records = request.records
-
-        # Map phase in parallel
-        def map_fn(rec):
-            return (rec.genre, 1)
-
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            mapped = list(ex.map(map_fn, records))
-
-        # Reduce
-        result = defaultdict(int)
-        for genre, count in mapped:
-            result[genre] += count
-
-        # Top genres sorted
-        top_genres = sorted(result.items(), key=lambda x: x[1], reverse=True)
-        top_genres_list = [g for g, _ in top_genres]
+        batch = RecordBatch.from_records(request.records, GenreAnalysisStreamService.BATCH_FIELDS)
+        result = GenreAnalysisStreamService.perform_genre_analysis(batch)
 
         processing_time = now() - start
 
         # Build gRPC response
         resp = music_service_pb2.GenreAnalysisResponse(
             processing_time=processing_time,
-            top_genres=top_genres_list
+            top_genres=result["top_genres"]
         )
-        for g, c in result.items():
+        for g, c in result["genre_counts"].items():
             resp.genre_counts[g] = c
 
         return resp
 
+    def AnalyzeGenresStream(self, request_iterator, context):
+        start = now()
+        acc = GenreCountAccumulator()
+        pending = 0
+        last_emit = start
+
+        for chunk in request_iterator:
+            acc.update(chunk.records)
+            pending += len(chunk.records)
+            if pending >= EMIT_EVERY_RECORDS or (now() - last_emit) * 1000 >= EMIT_INTERVAL_MS:
+                yield self.genre_delta(acc, start)
+                pending = 0
+                last_emit = now()
+        # final message: whatever changed since the last delta
+        yield self.genre_delta(acc, start)
+
+    def genre_delta(self, acc, start):
+        delta = music_service_pb2.GenreAnalysisResponse(
+            processing_time=now() - start,
+            top_genres=acc.top_genres()
+        )
+        for g, c in acc.delta().items():
+            delta.genre_counts[g] = c
+        return delta
+
+# ───────────────────────────────────────────────
+# grpc.aio Handler (event loop does I/O, analysis runs in the executor)
+# ───────────────────────────────────────────────
+class AioGenreAnalysisHandler(music_service_pb2_grpc.GenreAnalysisServiceServicer):
+
+    def __init__(self, executor):
+        self.handler = GenreAnalysisHandler()
+        self.executor = executor
+
+    async def AnalyzeGenres(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.handler.AnalyzeGenres, request, context)
+
+    async def AnalyzeGenresStream(self, request_iterator, context):
+        loop = asyncio.get_running_loop()
+        start = now()
+        acc = GenreCountAccumulator()
+        pending = 0
+        last_emit = start
+
+        def due():
+            # seconds until unsent records are due, None while there are none
+            return max(EMIT_INTERVAL_MS / 1000 - (now() - last_emit), 0) if pending else None
+
+        async for chunk in chunks_or_ticks(request_iterator, due):
+            if chunk is not None:
+                await loop.run_in_executor(self.executor, acc.update, chunk.records)
+                pending += len(chunk.records)
+            if pending and (pending >= EMIT_EVERY_RECORDS or (now() - last_emit) * 1000 >= EMIT_INTERVAL_MS):
+                yield await loop.run_in_executor(self.executor, self.handler.genre_delta, acc, start)
+                pending = 0
+                last_emit = now()
+        yield await loop.run_in_executor(self.executor, self.handler.genre_delta, acc, start)
+
 # ───────────────────────────────────────────────
 # Serve
 # ───────────────────────────────────────────────
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8), interceptors=[MetricsInterceptor()], options=SERVER_OPTIONS)
     music_service_pb2_grpc.add_GenreAnalysisServiceServicer_to_server(GenreAnalysisHandler(), server)
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
@@ -82,5 +136,20 @@ def serve():
     server.wait_for_termination()
 
 
+async def serve_aio():
+    executor = futures.ThreadPoolExecutor(max_workers=AIO_EXECUTOR_WORKERS)
+    server = grpc.aio.server(interceptors=[AioMetricsInterceptor()], options=SERVER_OPTIONS)
+    music_service_pb2_grpc.add_GenreAnalysisServiceServicer_to_server(AioGenreAnalysisHandler(executor), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    print(f"[GenreAnalysis] gRPC server (aio) started on port {PORT}")
+    await server.wait_for_termination()
+
+
 if __name__ == "__main__":
-    serve()
+    metrics_port = serve_metrics("genre", PORT)
+    print(f"[GenreAnalysis] metrics on port {metrics_port}")
+    if SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
@@ -1,9 +1,7 @@
 import os,sys
 import time
-import json
+import asyncio
 from concurrent import futures
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 grpc_dir = os.path.dirname(current_dir)
@@ -13,16 +11,20 @@ sys.path.insert(0, os.path.join(current_dir, 'generated'))
 
 import grpc
 from generated import music_service_pb2, music_service_pb2_grpc
+from services.mapreduce_service import MapReduceStreamService, PlayCountAccumulator
+from server_metrics import MetricsInterceptor, AioMetricsInterceptor, serve_metrics
+from server_options import SERVER_OPTIONS
 
 def now():
     return time.time()
 
-def save_metrics(path, metrics):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(metrics, f, indent=2)
-
 PORT = int(os.getenv("MAPREDUCE_PORT", "50051"))
+# "threads" (default), "vectorized" or "processes"; worker count for the latter
+ENGINE = os.getenv("MAPREDUCE_ENGINE", "threads")
+WORKERS = int(os.getenv("MAPREDUCE_WORKERS", "0")) or None
+# "threads" (grpc.server + thread pool) or "aio" (grpc.aio event loop, CPU work in an executor)
+SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "threads")
+AIO_EXECUTOR_WORKERS = int(os.getenv("AIO_EXECUTOR_WORKERS", "0")) or os.cpu_count()
 
 # MapReduce logic (in-memory)
 class MapReduceHandler(music_service_pb2_grpc.MapReduceServiceServicer):
@@ -30,35 +32,68 @@ class MapReduceHandler(music_service_pb2_grpc.MapReduceServiceServicer):
     def AggregateStream(self, request, context):
         start = now()
         records = request.records
-        # Map phase in parallel
-        def map_fn(rec):
-            key = f"{rec.artist} - {rec.song_id}"
-            return (key, 1)
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            mapped = list(ex.map(map_fn, records))
-        # Reduce
-        result = defaultdict(int)
-        for k, v in mapped:
-            result[k] += v
+        # Map + reduce with the configured engine
+        result = MapReduceStreamService.perform_mapreduce(records, engine=ENGINE, max_workers=WORKERS)["play_counts"]
         processing_time = now() - start
         # Build PlayCounts message
         play_counts = music_service_pb2.PlayCounts(processing_time=processing_time)
         for k, v in result.items():
             play_counts.play_counts[k] = v
-        # Optionally save metrics
-        try:
-            save_metrics("/tmp/results_mapreduce.json", {"processing_time": processing_time, "count_keys": len(result)})
-        except Exception:
-            pass
         return play_counts
 
+    def AggregateStreamChunks(self, request_iterator, context):
+        start = now()
+        # Fold each chunk into the running counts as soon as it arrives
+        acc = PlayCountAccumulator(engine=ENGINE, max_workers=WORKERS)
+        for chunk in request_iterator:
+            acc.update(chunk.records)
+        return self.finish_chunks(acc, start)
+
+    def finish_chunks(self, acc, start):
+        processing_time = now() - start
+        play_counts = music_service_pb2.PlayCounts(processing_time=processing_time)
+        for k, v in acc.play_counts.items():
+            play_counts.play_counts[k] = v
+        return play_counts
+
+# grpc.aio variant: the event loop only does I/O, counting runs in the executor
+class AioMapReduceHandler(music_service_pb2_grpc.MapReduceServiceServicer):
+
+    def __init__(self, executor):
+        self.handler = MapReduceHandler()
+        self.executor = executor
+
+    async def AggregateStream(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.handler.AggregateStream, request, context)
+
+    async def AggregateStreamChunks(self, request_iterator, context):
+        loop = asyncio.get_running_loop()
+        start = now()
+        acc = PlayCountAccumulator(engine=ENGINE, max_workers=WORKERS)
+        async for chunk in request_iterator:
+            await loop.run_in_executor(self.executor, acc.update, chunk.records)
+        return await loop.run_in_executor(self.executor, self.handler.finish_chunks, acc, start)
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8), interceptors=[MetricsInterceptor()], options=SERVER_OPTIONS)
     music_service_pb2_grpc.add_MapReduceServiceServicer_to_server(MapReduceHandler(), server)
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
     server.wait_for_termination()
 
+async def serve_aio():
+    executor = futures.ThreadPoolExecutor(max_workers=AIO_EXECUTOR_WORKERS)
+    server = grpc.aio.server(interceptors=[AioMetricsInterceptor()], options=SERVER_OPTIONS)
+    music_service_pb2_grpc.add_MapReduceServiceServicer_to_server(AioMapReduceHandler(executor), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    await server.wait_for_termination()
+
 if __name__ == "__main__":
-    print(f"[MapReduce] gRPC server started on port {PORT}")
-    serve()
+    metrics_port = serve_metrics("mapreduce", PORT)
+    print(f"[MapReduce] gRPC server ({SERVER_MODE}) started on port {PORT}, metrics on port {metrics_port}")
+    if SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
@@ -1,6 +1,6 @@
 import os,sys
 import time
-import json
+import asyncio
 from collections import Counter
 from concurrent import futures
 
@@ -12,16 +12,17 @@ sys.path.insert(0, os.path.join(current_dir, 'generated'))
 
 import grpc
 from generated import music_service_pb2, music_service_pb2_grpc
+from services import metrics
+from server_metrics import MetricsInterceptor, AioMetricsInterceptor, serve_metrics
+from server_options import SERVER_OPTIONS
 
 def now():
     return time.time()
 
-def save_metrics(path, metrics):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(metrics, f, indent=2)
-
 PORT = int(os.getenv("RECOMMENDATION_PORT", "50057"))
+# "threads" (grpc.server + thread pool) or "aio" (grpc.aio event loop, CPU work in an executor)
+SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "threads")
+AIO_EXECUTOR_WORKERS = int(os.getenv("AIO_EXECUTOR_WORKERS", "0")) or os.cpu_count()
 
 class RecommendationHandler(music_service_pb2_grpc.RecommendationServiceServicer):
     def Recommend(self, request, context):
@@ -29,14 +30,15 @@ class RecommendationHandler(music_service_pb2_grpc.RecommendationServiceServicer
         play_counts = request.play_counts.play_counts  # map<string, int>
         # play_counts is a map<string, int>
         # Convert to Counter
-        counter = Counter(play_counts)
-        top5 = [k for k, _ in counter.most_common(5)]
-        # Build recommendations: for each user in user_stats, recommend top songs not associated with their top_artist
-        recommendations_map = {}
-        for us in request.user_stats.user_stats:
-            fav = us.top_artist
-            recs = [s for s in top5 if fav and fav not in s]
-            recommendations_map[us.user_id] = recs
+        with metrics.phase("compute"):
+            counter = Counter(play_counts)
+            top5 = [k for k, _ in counter.most_common(5)]
+            # Build recommendations: for each user in user_stats, recommend top songs not associated with their top_artist
+            recommendations_map = {}
+            for us in request.user_stats.user_stats:
+                fav = us.top_artist
+                recs = [s for s in top5 if fav and fav not in s]
+                recommendations_map[us.user_id] = recs
 
         # Build response
         resp = music_service_pb2.RecommendationResponse(processing_time=0.0)
@@ -50,20 +52,38 @@ class RecommendationHandler(music_service_pb2_grpc.RecommendationServiceServicer
 
         processing_time = now() - start
         resp.processing_time = processing_time
-
-        try:
-            save_metrics("/tmp/results_recommendation.json", {"processing_time": processing_time, "num_trending": len(top5)})
-        except Exception:
-            pass
         return resp
 
+# grpc.aio variant: the event loop only does I/O, the handler runs in the executor
+class AioRecommendationHandler(music_service_pb2_grpc.RecommendationServiceServicer):
+
+    def __init__(self, executor):
+        self.handler = RecommendationHandler()
+        self.executor = executor
+
+    async def Recommend(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.handler.Recommend, request, context)
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8), interceptors=[MetricsInterceptor()], options=SERVER_OPTIONS)
     music_service_pb2_grpc.add_RecommendationServiceServicer_to_server(RecommendationHandler(), server)
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
     server.wait_for_termination()
 
+async def serve_aio():
+    executor = futures.ThreadPoolExecutor(max_workers=AIO_EXECUTOR_WORKERS)
+    server = grpc.aio.server(interceptors=[AioMetricsInterceptor()], options=SERVER_OPTIONS)
+    music_service_pb2_grpc.add_RecommendationServiceServicer_to_server(AioRecommendationHandler(executor), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    await server.wait_for_termination()
+
 if __name__ == "__main__":
-    print(f"[Recommendation] gRPC server started on port {PORT}")
-    serve()
+    metrics_port = serve_metrics("recommendation", PORT)
+    print(f"[Recommendation] gRPC server ({SERVER_MODE}) started on port {PORT}, metrics on port {metrics_port}")
+    if SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
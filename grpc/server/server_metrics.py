@@ -0,0 +1,150 @@
+"""
+gRPC service metrics
+Server interceptors feeding services/metrics.py: request counts by status
+code, in-flight gauge and latency per RPC, plus the deserialize / serialize
+phases and payload bytes measured in the message (de)serializers. The
+registry is scraped from a small HTTP endpoint next to the gRPC port.
+"""
+import asyncio
+
+import grpc
+
+from services import metrics
+
+
+def _status(context, default="OK"):
+    code = context.code()
+    return code.name if isinstance(code, grpc.StatusCode) else default
+
+
+def _deserializer(fn, method):
+    if fn is None:
+        return None
+
+    def deserialize(data):
+        with metrics.phase("deserialize"):
+            message = fn(data)
+        metrics.BYTES_IN.inc(method, amount=len(data))
+        return message
+    return deserialize
+
+
+def _serializer(fn, method):
+    if fn is None:
+        return None
+
+    def serialize(message):
+        with metrics.phase("serialize"):
+            data = fn(message)
+        metrics.BYTES_OUT.inc(method, amount=len(data))
+        return data
+    return serialize
+
+
+def _unary(fn, method):
+    def behavior(request, context):
+        timer = metrics.RequestTimer(method)
+        try:
+            response = fn(request, context)
+        except Exception:
+            timer.finish(_status(context, "UNKNOWN"))
+            raise
+        timer.finish(_status(context))
+        return response
+    return behavior
+
+
+def _streaming(fn, method):
+    def behavior(request, context):
+        timer = metrics.RequestTimer(method)
+        status = None
+        try:
+            yield from fn(request, context)
+        except GeneratorExit:
+            status = "CANCELLED"
+            raise
+        except Exception:
+            status = _status(context, "UNKNOWN")
+            raise
+        finally:
+            timer.finish(status or _status(context))
+    return behavior
+
+
+def _aio_unary(fn, method):
+    async def behavior(request, context):
+        timer = metrics.RequestTimer(method)
+        try:
+            response = await fn(request, context)
+        except asyncio.CancelledError:
+            timer.finish("CANCELLED")
+            raise
+        except Exception:
+            timer.finish(_status(context, "UNKNOWN"))
+            raise
+        timer.finish(_status(context))
+        return response
+    return behavior
+
+
+def _aio_streaming(fn, method):
+    async def behavior(request, context):
+        timer = metrics.RequestTimer(method)
+        status = None
+        try:
+            async for response in fn(request, context):
+                yield response
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "CANCELLED"
+            raise
+        except Exception:
+            status = _status(context, "UNKNOWN")
+            raise
+        finally:
+            timer.finish(status or _status(context))
+    return behavior
+
+
+def instrument(handler, method, aio=False):
+    """Copy of an RpcMethodHandler with timed behavior and (de)serializers."""
+    unary, streaming = (_aio_unary, _aio_streaming) if aio else (_unary, _streaming)
+    kwargs = {
+        "request_deserializer": _deserializer(handler.request_deserializer, method),
+        "response_serializer": _serializer(handler.response_serializer, method),
+    }
+    if handler.request_streaming and handler.response_streaming:
+        return grpc.stream_stream_rpc_method_handler(streaming(handler.stream_stream, method), **kwargs)
+    if handler.request_streaming:
+        return grpc.stream_unary_rpc_method_handler(unary(handler.stream_unary, method), **kwargs)
+    if handler.response_streaming:
+        return grpc.unary_stream_rpc_method_handler(streaming(handler.unary_stream, method), **kwargs)
+    return grpc.unary_unary_rpc_method_handler(unary(handler.unary_unary, method), **kwargs)
+
+
+def _method_name(handler_call_details):
+    # "/music.MapReduceService/AggregateStream" -> "AggregateStream"
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        return instrument(handler, _method_name(handler_call_details))
+
+
+class AioMetricsInterceptor(grpc.aio.ServerInterceptor):
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        return instrument(handler, _method_name(handler_call_details), aio=True)
+
+
+def serve_metrics(service, grpc_port):
+    """Label this process and start the scrape endpoint; returns its port (0 when disabled)."""
+    metrics.configure(service, "grpc")
+    port = metrics.metrics_port(grpc_port)
+    metrics.start_http_server(port)
+    return port
@@ -0,0 +1,23 @@
+"""
+gRPC server options
+Channel arguments shared by every service, for grpc.server and grpc.aio.server
+alike. They mirror the client's CHANNEL_OPTIONS: the same message size limit
+(large batches are rejected with RESOURCE_EXHAUSTED above gRPC's 4 MB default)
+and keepalive pings accepted as often as the client sends them (otherwise the
+server answers idle pings with GOAWAY too_many_pings).
+"""
+import os
+
+# ───────────────────────────────────────────────
+# Environment Variables
+# ───────────────────────────────────────────────
+MAX_MESSAGE_BYTES = int(os.getenv("GRPC_MAX_MESSAGE_MB", "64")) * 1024 * 1024
+# Shortest ping interval tolerated from a client; keep at or below the client's GRPC_KEEPALIVE_MS
+MIN_PING_INTERVAL_MS = int(os.getenv("GRPC_MIN_PING_INTERVAL_MS", "10000"))
+
+SERVER_OPTIONS = [
+    ("grpc.max_send_message_length", MAX_MESSAGE_BYTES),
+    ("grpc.max_receive_message_length", MAX_MESSAGE_BYTES),
+    ("grpc.keepalive_permit_without_calls", 1),
+    ("grpc.http2.min_ping_interval_without_data_ms", MIN_PING_INTERVAL_MS),
+]
@@ -0,0 +1,31 @@
+"""
+Streaming emit timer
+Lets grpc.aio bidi handlers emit their STREAM_EMIT_MS deltas on time even when
+the client pauses between chunks. The threads handlers iterate a blocking
+request iterator and can only check the interval when a chunk arrives.
+"""
+import asyncio
+
+
+async def chunks_or_ticks(request_iterator, due):
+    """
+    Yield each chunk as it arrives, and None when due() seconds pass without one.
+    due() is re-read before every wait; None means wait for the next chunk only.
+    The pending read is kept across ticks, never cancelled mid-message.
+    """
+    chunks = request_iterator.__aiter__()
+    next_chunk = asyncio.ensure_future(chunks.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_chunk}, timeout=due())
+            if not done:
+                yield None
+                continue
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                return
+            next_chunk = asyncio.ensure_future(chunks.__anext__())
+            yield chunk
+    finally:
+        next_chunk.cancel()
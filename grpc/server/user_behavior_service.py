@@ -1,7 +1,6 @@
 import os,sys
 import time
-import json
-from collections import defaultdict, Counter
+import asyncio
 from concurrent import futures
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -12,58 +11,114 @@ sys.path.insert(0, os.path.join(current_dir, 'generated'))
 
 import grpc
 from generated import music_service_pb2, music_service_pb2_grpc
+from services.record_batch import RecordBatch
+from services.user_behavior_service import UserBehaviorService, UserBehaviorAccumulator
+from server_metrics import MetricsInterceptor, AioMetricsInterceptor, serve_metrics
+from server_options import SERVER_OPTIONS
+from stream_emit import chunks_or_ticks
 
 def now():
     return time.time()
 
-def save_metrics(path, metrics):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(metrics, f, indent=2)
-
 PORT = int(os.getenv("USERBEHAVIOR_PORT", "50053"))
+# AnalyzeUsersStream emits a delta every N records or T milliseconds, whichever comes first
+# (threads mode checks T as chunks arrive; aio mode also emits on a timer between chunks)
+EMIT_EVERY_RECORDS = int(os.getenv("STREAM_EMIT_RECORDS", "10000"))
+EMIT_INTERVAL_MS = int(os.getenv("STREAM_EMIT_MS", "500"))
+# "threads" (grpc.server + thread pool) or "aio" (grpc.aio event loop, CPU work in an executor)
+SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "threads")
+AIO_EXECUTOR_WORKERS = int(os.getenv("AIO_EXECUTOR_WORKERS", "0")) or os.cpu_count()
 
 class UserBehaviorHandler(music_service_pb2_grpc.UserBehaviorServiceServicer):
     def AnalyzeUsers(self, request, context):
         start = now()
-        records = request.records
-        user_time = defaultdict(int)
-        user_artists = defaultdict(list)
-
-        for r in records:
-            user_time[r.user_id] += r.duration
-            user_artists[r.user_id].append(r.artist)
+        batch = RecordBatch.from_records(request.records, UserBehaviorService.BATCH_FIELDS)
+        result = UserBehaviorService.analyze_behavior(batch)
 
         user_stats_list = music_service_pb2.UserStatsList(processing_time=0.0)
-        for uid, t in user_time.items():
-            top_artist = Counter(user_artists[uid]).most_common(1)[0][0] if user_artists[uid] else ""
-            us = music_service_pb2.UserStat(
-                user_id=uid,
-                total_time=t,
-                top_artist=top_artist
-            )
-            user_stats_list.user_stats.append(us)
+        for us in result["user_stats"]:
+            user_stats_list.user_stats.append(music_service_pb2.UserStat(**us))
         # top users (ids) sorted by total_time desc, limit 5
-        top_users_sorted = sorted(user_time.items(), key=lambda x: x[1], reverse=True)[:5]
-        for uid, _ in top_users_sorted:
-            user_stats_list.top_users.append(uid)
+        user_stats_list.top_users.extend(u["user_id"] for u in result["top_users"])
 
         processing_time = now() - start
         user_stats_list.processing_time = processing_time
-
-        try:
-            save_metrics("/tmp/results_userbehavior.json", {"processing_time": processing_time, "num_users": len(user_time)})
-        except Exception:
-            pass
         return user_stats_list
 
+    def AnalyzeUsersStream(self, request_iterator, context):
+        start = now()
+        acc = UserBehaviorAccumulator()
+        pending = 0
+        last_emit = start
+
+        for chunk in request_iterator:
+            acc.update(chunk.records)
+            pending += len(chunk.records)
+            if pending >= EMIT_EVERY_RECORDS or (now() - last_emit) * 1000 >= EMIT_INTERVAL_MS:
+                yield self.user_stats_delta(acc, start)
+                pending = 0
+                last_emit = now()
+        # final message: whatever changed since the last delta
+        yield self.user_stats_delta(acc, start)
+
+    def user_stats_delta(self, acc, start):
+        delta = music_service_pb2.UserStatsList(processing_time=now() - start)
+        for us in acc.delta():
+            delta.user_stats.append(music_service_pb2.UserStat(**us))
+        delta.top_users.extend(acc.top_users())
+        return delta
+
+# grpc.aio variant: the event loop only does I/O, analysis runs in the executor
+class AioUserBehaviorHandler(music_service_pb2_grpc.UserBehaviorServiceServicer):
+
+    def __init__(self, executor):
+        self.handler = UserBehaviorHandler()
+        self.executor = executor
+
+    async def AnalyzeUsers(self, request, context):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.handler.AnalyzeUsers, request, context)
+
+    async def AnalyzeUsersStream(self, request_iterator, context):
+        loop = asyncio.get_running_loop()
+        start = now()
+        acc = UserBehaviorAccumulator()
+        pending = 0
+        last_emit = start
+
+        def due():
+            # seconds until unsent records are due, None while there are none
+            return max(EMIT_INTERVAL_MS / 1000 - (now() - last_emit), 0) if pending else None
+
+        async for chunk in chunks_or_ticks(request_iterator, due):
+            if chunk is not None:
+                await loop.run_in_executor(self.executor, acc.update, chunk.records)
+                pending += len(chunk.records)
+            if pending and (pending >= EMIT_EVERY_RECORDS or (now() - last_emit) * 1000 >= EMIT_INTERVAL_MS):
+                yield await loop.run_in_executor(self.executor, self.handler.user_stats_delta, acc, start)
+                pending = 0
+                last_emit = now()
+        yield await loop.run_in_executor(self.executor, self.handler.user_stats_delta, acc, start)
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8), interceptors=[MetricsInterceptor()], options=SERVER_OPTIONS)
     music_service_pb2_grpc.add_UserBehaviorServiceServicer_to_server(UserBehaviorHandler(), server)
     server.add_insecure_port(f"[::]:{PORT}")
     server.start()
     server.wait_for_termination()
 
+async def serve_aio():
+    executor = futures.ThreadPoolExecutor(max_workers=AIO_EXECUTOR_WORKERS)
+    server = grpc.aio.server(interceptors=[AioMetricsInterceptor()], options=SERVER_OPTIONS)
+    music_service_pb2_grpc.add_UserBehaviorServiceServicer_to_server(AioUserBehaviorHandler(executor), server)
+    server.add_insecure_port(f"[::]:{PORT}")
+    await server.start()
+    await server.wait_for_termination()
+
 if __name__ == "__main__":
-    print(f"[UserBehavior] gRPC server started on port {PORT}")
-    serve()
+    metrics_port = serve_metrics("userbehavior", PORT)
+    print(f"[UserBehavior] gRPC server ({SERVER_MODE}) started on port {PORT}, metrics on port {metrics_port}")
+    if SERVER_MODE == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
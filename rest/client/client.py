@@ -2,10 +2,19 @@
 import os
 import sys
 import time
-import csv
 import json
-from datetime import datetime
+import random
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 # ───────────────────────────────────────────────
 # Environment Variables
@@ -18,10 +27,44 @@ GENRE_ANALYSIS_HOST = os.getenv("GENRE_ANALYSIS_HOST", "localhost")
 GENRE_ANALYSIS_PORT = os.getenv("GENRE_ANALYSIS_PORT", "5005")
 RECOMMENDATION_HOST = os.getenv("RECOMMENDATION_HOST", "localhost")
 RECOMMENDATION_PORT = os.getenv("RECOMMENDATION_PORT", "5007")
+ANALYTICS_HOST = os.getenv("ANALYTICS_HOST", "localhost")
+ANALYTICS_PORT = os.getenv("ANALYTICS_PORT", "5009")
+
+# "separate" calls MapReduce, UserBehavior and GenreAnalysis one by one,
+# "fused" posts the records once to /analyze
+WORKFLOW_MODE = os.getenv("WORKFLOW_MODE", "separate")
+
+# Stream the CSV as chunked NDJSON to the /stream endpoints instead of posting one JSON body
+REST_STREAMING = os.getenv("REST_STREAMING", "0") == "1"
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "10000"))
+
+# Call MapReduce, UserBehavior and GenreAnalysis concurrently (0 = one after another)
+CONCURRENT_CALLS = os.getenv("CONCURRENT_CALLS", "1") == "1"
+# Run that fan-out on asyncio with aiohttp instead of threads (requires aiohttp)
+REST_ASYNC = os.getenv("REST_ASYNC", "0") == "1"
+
+# Keep-alive connection pool, timeouts and retry backoff for every call
+REST_POOL_SIZE = int(os.getenv("REST_POOL_SIZE", "8"))
+REST_CONNECT_TIMEOUT = float(os.getenv("REST_CONNECT_TIMEOUT", "5"))
+REST_READ_TIMEOUT = float(os.getenv("REST_READ_TIMEOUT", "120"))
+REST_RETRIES = int(os.getenv("REST_RETRIES", "5"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+
+MAPREDUCE_URL = f"http://{MAPREDUCE_HOST}:{MAPREDUCE_PORT}/mapreduce"
+USERBEHAVIOR_URL = f"http://{USERBEHAVIOR_HOST}:{USERBEHAVIOR_PORT}/userbehavior"
+GENRE_ANALYSIS_URL = f"http://{GENRE_ANALYSIS_HOST}:{GENRE_ANALYSIS_PORT}/genre_analysis"
+RECOMMENDATION_URL = f"http://{RECOMMENDATION_HOST}:{RECOMMENDATION_PORT}/recommend"
+ANALYTICS_URL = f"http://{ANALYTICS_HOST}:{ANALYTICS_PORT}/analyze"
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 DATA_CSV = os.getenv('DATA_CSV', os.path.join(PROJECT_ROOT, 'data', 'stream_data.csv'))
+sys.path.append(os.path.join(PROJECT_ROOT, 'rest'))
+
+import rest_codec
+from services import stream_loader
+from services.thread_output import capture_threads, run_captured
 
 RESULTS_DIR = os.getenv(
     "RESULTS_DIR",
@@ -33,71 +76,174 @@ os.makedirs(RESULTS_DIR, exist_ok=True)
 # Utility Functions
 # ───────────────────────────────────────────────
 def load_data(csv_path):
-    records = []
-    with open(csv_path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            records.append({
-                "user_id": r["user_id"],
-                "song_id": r["song_id"],
-                "artist": r["artist"],
-                "duration": int(r["duration"]),
-                "timestamp": r["timestamp"],
-                "genre": r.get("genre", "")
-            })
-    return records
-
-
-def post_with_retry(url, payload, retries=5, delay=1):
+    return stream_loader.load_records(csv_path)
+
+
+def iter_record_chunks(csv_path, chunk_size):
+    """Yield lists of at most chunk_size record dicts, reading the CSV lazily."""
+    return stream_loader.iter_records(csv_path, chunk_size)
+
+
+# ───────────────────────────────────────────────
+# HTTP (pooled keep-alive session, timeouts, backoff)
+# ───────────────────────────────────────────────
+def make_session(pool_size=REST_POOL_SIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Shared by every call and fan-out thread: connections to each service stay open between requests
+SESSION = make_session()
+TIMEOUT = (REST_CONNECT_TIMEOUT, REST_READ_TIMEOUT)
+
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, cap=RETRY_MAX_DELAY):
+    """Exponential backoff with full jitter: uniform in [0, min(cap, base * 2^(attempt-1))]."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def retryable_status(status):
+    """Only overload (429) and server errors (5xx) are worth another attempt; other 4xx fail fast."""
+    return status == 429 or status >= 500
+
+
+def retry_delay(attempt, retry_after=None):
+    """Seconds before the next attempt: the server's Retry-After (seconds or HTTP date) when given, else backoff."""
+    if retry_after:
+        try:
+            return max(float(retry_after), 0.0)
+        except ValueError:
+            try:
+                return max((parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    return backoff_delay(attempt)
+
+
+def post_stream_with_retry(url, csv_path, chunk_size, retries=REST_RETRIES):
+    """POST the CSV as chunked NDJSON (one mini-batch per line), re-reading the file on retry."""
+    headers = {"Content-Type": "application/x-ndjson", "Accept-Encoding": rest_codec.ACCEPT_ENCODING}
+    if rest_codec.REST_COMPRESSION != "none":
+        headers["Content-Encoding"] = rest_codec.REST_COMPRESSION
+    for attempt in range(1, retries + 1):
+        try:
+            lines = rest_codec.ndjson_lines(iter_record_chunks(csv_path, chunk_size))
+            resp = SESSION.post(url, data=rest_codec.compress_stream(lines, rest_codec.REST_COMPRESSION),
+                                headers=headers, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            error, delay = e, retry_delay(attempt)
+        else:
+            if resp.ok:
+                return rest_codec.loads(resp.content)
+            if not retryable_status(resp.status_code):
+                resp.raise_for_status()
+            error, delay = f"HTTP {resp.status_code}", retry_delay(attempt, resp.headers.get("Retry-After"))
+        if attempt == retries:
+            break
+        print(f"[Warning] Stream to {url} failed: {error}, retrying in {delay:.2f}s ({attempt}/{retries})...")
+        time.sleep(delay)
+    raise RuntimeError(f"Failed to stream to {url} after {retries} attempts")
+
+
+def encode_request(payload):
+    # encode once: JSON codec + optional Content-Encoding (see rest/rest_codec.py)
+    body, headers = rest_codec.encode_body(payload, rest_codec.REST_COMPRESSION)
+    headers["Accept-Encoding"] = rest_codec.ACCEPT_ENCODING
+    return body, headers
+
+
+def post_with_retry(url, payload, retries=REST_RETRIES):
+    body, headers = encode_request(payload)
     for attempt in range(1, retries + 1):
         try:
-            resp = requests.post(url, json=payload)
-            resp.raise_for_status()
-            return resp.json()
+            resp = SESSION.post(url, data=body, headers=headers, timeout=TIMEOUT)
         except requests.RequestException as e:
-            print(f"[Warning] Request to {url} failed: {e}, retrying ({attempt}/{retries})...")
-            time.sleep(delay)
+            error, delay = e, retry_delay(attempt)
+        else:
+            if resp.ok:
+                return rest_codec.loads(resp.content)
+            if not retryable_status(resp.status_code):
+                resp.raise_for_status()
+            error, delay = f"HTTP {resp.status_code}", retry_delay(attempt, resp.headers.get("Retry-After"))
+        if attempt == retries:
+            break
+        print(f"[Warning] Request to {url} failed: {error}, retrying in {delay:.2f}s ({attempt}/{retries})...")
+        time.sleep(delay)
     raise RuntimeError(f"Failed to connect to {url} after {retries} attempts")
 
 
+async def post_async(session, url, body, headers, retries=REST_RETRIES):
+    """aiohttp counterpart of post_with_retry for an already encoded body."""
+    for attempt in range(1, retries + 1):
+        try:
+            async with session.post(url, data=body, headers=headers) as resp:
+                if resp.status < 400:
+                    content = await resp.read()
+                    return rest_codec.loads(rest_codec.decompress(content, resp.headers.get("Content-Encoding")))
+                if not retryable_status(resp.status):
+                    resp.raise_for_status()
+                error, delay = f"HTTP {resp.status}", retry_delay(attempt, resp.headers.get("Retry-After"))
+        except aiohttp.ClientResponseError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error, delay = repr(e), retry_delay(attempt)
+        if attempt == retries:
+            break
+        print(f"[Warning] Request to {url} failed: {error}, retrying in {delay:.2f}s ({attempt}/{retries})...")
+        await asyncio.sleep(delay)
+    raise RuntimeError(f"Failed to connect to {url} after {retries} attempts")
+
+
+def timing_line(resp, roundtrip):
+    extra = f", {resp['num_records']} records" if "num_records" in resp else ""
+    return f"Processing Time: {resp['processing_time']:.4f}s (Roundtrip {roundtrip:.4f}s{extra})"
+
+
+def stream_note(chunk_size):
+    return f" (NDJSON stream, {chunk_size} records/line)"
+
+
 # ───────────────────────────────────────────────
 # MapReduce Service
 # ───────────────────────────────────────────────
-def call_mapreduce(records):
-    url = f"http://{MAPREDUCE_HOST}:{MAPREDUCE_PORT}/mapreduce"
+def report_mapreduce(resp, roundtrip, note=""):
     print("=" * 70)
-    print("[MapReduce REST] Global Song Play Analysis")
+    print(f"[MapReduce REST] Global Song Play Analysis{note}")
     print("=" * 70)
-
-    payload = {"records": records}
-    start = time.time()
-    resp = post_with_retry(url, payload)
-    roundtrip = time.time() - start
-
-    print(f"Processing Time: {resp['processing_time']:.4f}s (Roundtrip {roundtrip:.4f}s)")
+    print(timing_line(resp, roundtrip))
     print("-" * 70)
     print("Top Song Play Counts:")
     for i, (song, count) in enumerate(sorted(resp["play_counts"].items(), key=lambda x: x[1], reverse=True)[:10], 1):
         print(f"  {i}. {song}: {count} plays")
     print()
+
+
+def call_mapreduce(records):
+    payload = rest_codec.records_payload(records)
+    start = time.time()
+    resp = post_with_retry(MAPREDUCE_URL, payload)
+    report_mapreduce(resp, time.time() - start)
+    return resp
+
+
+def call_mapreduce_streaming(csv_path, chunk_size=CHUNK_SIZE):
+    start = time.time()
+    resp = post_stream_with_retry(f"{MAPREDUCE_URL}/stream", csv_path, chunk_size)
+    report_mapreduce(resp, time.time() - start, stream_note(chunk_size))
     return resp
 
 
 # ───────────────────────────────────────────────
 # UserBehavior Service
 # ───────────────────────────────────────────────
-def call_userbehavior(records):
-    url = f"http://{USERBEHAVIOR_HOST}:{USERBEHAVIOR_PORT}/userbehavior"
+def report_userbehavior(resp, roundtrip, note=""):
     print("=" * 70)
-    print("[UserBehavior REST] User Listening Analytics")
+    print(f"[UserBehavior REST] User Listening Analytics{note}")
     print("=" * 70)
-
-    payload = {"records": records}
-    start = time.time()
-    resp = post_with_retry(url, payload)
-    roundtrip = time.time() - start
-
-    print(f"Processing Time: {resp['processing_time']:.4f}s (Roundtrip {roundtrip:.4f}s)")
+    print(timing_line(resp, roundtrip))
     print("-" * 70)
     print("User Activity Summary:")
     for stat in resp.get("user_stats", []):
@@ -107,52 +253,96 @@ def call_userbehavior(records):
         for u in resp["top_users"]:
             print(f"  - {u}")
     print()
+
+
+def call_userbehavior(records):
+    payload = rest_codec.records_payload(records)
+    start = time.time()
+    resp = post_with_retry(USERBEHAVIOR_URL, payload)
+    report_userbehavior(resp, time.time() - start)
+    return resp
+
+
+def call_userbehavior_streaming(csv_path, chunk_size=CHUNK_SIZE):
+    start = time.time()
+    resp = post_stream_with_retry(f"{USERBEHAVIOR_URL}/stream", csv_path, chunk_size)
+    report_userbehavior(resp, time.time() - start, stream_note(chunk_size))
     return resp
 
 
 # ───────────────────────────────────────────────
 # GenreAnalysis Service
 # ───────────────────────────────────────────────
-def call_genre_analysis(records):
-    url = f"http://{GENRE_ANALYSIS_HOST}:{GENRE_ANALYSIS_PORT}/genre_analysis"
+def report_genre_analysis(resp, roundtrip, note=""):
     print("=" * 70)
-    print("[GenreAnalysis REST] Top Genre Analytics")
+    print(f"[GenreAnalysis REST] Top Genre Analytics{note}")
     print("=" * 70)
-
-    payload = {"records": records}
-    start = time.time()
-    resp = post_with_retry(url, payload)
-    roundtrip = time.time() - start
-
-    print(f"Processing Time: {resp['processing_time']:.4f}s (Roundtrip {roundtrip:.4f}s)")
+    print(timing_line(resp, roundtrip))
     print("-" * 70)
     print("Top Genres:")
     for i, g in enumerate(resp.get("top_genres", []), 1):
         print(f"  {i}. {g}")
     print()
+
+
+def call_genre_analysis(records):
+    payload = rest_codec.records_payload(records)
+    start = time.time()
+    resp = post_with_retry(GENRE_ANALYSIS_URL, payload)
+    report_genre_analysis(resp, time.time() - start)
+    return resp
+
+
+def call_genre_analysis_streaming(csv_path, chunk_size=CHUNK_SIZE):
+    start = time.time()
+    resp = post_stream_with_retry(f"{GENRE_ANALYSIS_URL}/stream", csv_path, chunk_size)
+    report_genre_analysis(resp, time.time() - start, stream_note(chunk_size))
     return resp
 
 
 # ───────────────────────────────────────────────
-# Recommendation Service
+# Fused Analytics Service
 # ───────────────────────────────────────────────
-def call_recommendation(play_counts, userbehavior_resp, genre_analysis_resp):
-    url = f"http://{RECOMMENDATION_HOST}:{RECOMMENDATION_PORT}/recommend"
+def call_analyze_all(records):
+    payload = rest_codec.records_payload(records)
+    start = time.time()
+    resp = post_with_retry(ANALYTICS_URL, payload)
+    roundtrip = time.time() - start
+
     print("=" * 70)
-    print("[Recommendation REST] Personalized Song Suggestions")
+    print("[Analytics REST] Play Counts + User Behavior + Genres (single pass)")
     print("=" * 70)
+    print(timing_line(resp, roundtrip))
+    print("-" * 70)
+    print("Top Song Play Counts:")
+    for i, (song, count) in enumerate(sorted(resp["mapreduce"]["play_counts"].items(), key=lambda x: x[1], reverse=True)[:10], 1):
+        print(f"  {i}. {song}: {count} plays")
+    print("\nUser Activity Summary:")
+    for stat in resp["userbehavior"].get("user_stats", []):
+        print(f"  • User {stat['user_id']}: Total {stat['total_time']}s, Top Artist = {stat['top_artist']}")
+    print("\nTop Genres:")
+    for i, g in enumerate(resp["genre_analysis"].get("top_genres", []), 1):
+        print(f"  {i}. {g}")
+    print()
+    return resp
+
 
-    payload = {
+# ───────────────────────────────────────────────
+# Recommendation Service
+# ───────────────────────────────────────────────
+def recommendation_payload(play_counts, userbehavior_resp, genre_analysis_resp):
+    return {
         "play_counts": play_counts,
         "user_stats": userbehavior_resp.get("user_stats", []),
         "top_genres": genre_analysis_resp.get("top_genres", [])  # optional extra info
     }
 
-    start = time.time()
-    resp = post_with_retry(url, payload)
-    roundtrip = time.time() - start
 
-    print(f"Processing Time: {resp['processing_time']:.4f}s (Roundtrip {roundtrip:.4f}s)")
+def report_recommendation(resp, roundtrip):
+    print("=" * 70)
+    print("[Recommendation REST] Personalized Song Suggestions")
+    print("=" * 70)
+    print(timing_line(resp, roundtrip))
     print("-" * 70)
     print("Trending Songs:")
     for i, song in enumerate(resp.get("trending_songs", []), 1):
@@ -163,9 +353,94 @@ def call_recommendation(play_counts, userbehavior_resp, genre_analysis_resp):
         for user, recs in resp["recommendations"].items():
             print(f"  • {user}: {', '.join(recs)}")
     print()
+
+
+def call_recommendation(play_counts, userbehavior_resp, genre_analysis_resp):
+    payload = recommendation_payload(play_counts, userbehavior_resp, genre_analysis_resp)
+    start = time.time()
+    resp = post_with_retry(RECOMMENDATION_URL, payload)
+    report_recommendation(resp, time.time() - start)
     return resp
 
 
+# ───────────────────────────────────────────────
+# Concurrent fan-out
+# ───────────────────────────────────────────────
+def stage_calls():
+    """MapReduce / UserBehavior / GenreAnalysis callers; in streaming mode they take the CSV path."""
+    if REST_STREAMING:
+        return call_mapreduce_streaming, call_userbehavior_streaming, call_genre_analysis_streaming
+    return call_mapreduce, call_userbehavior, call_genre_analysis
+
+
+def run_concurrent(records):
+    """
+    MapReduce, UserBehavior and GenreAnalysis are independent: dispatch them together
+    and start Recommendation as soon as MapReduce and UserBehavior have answered.
+    """
+    mapreduce_fn, userbehavior_fn, genre_fn = stage_calls()
+    with capture_threads(), ThreadPoolExecutor(max_workers=3) as ex:
+        mapreduce_f = ex.submit(run_captured, mapreduce_fn, records)
+        userbehavior_f = ex.submit(run_captured, userbehavior_fn, records)
+        genre_f = ex.submit(run_captured, genre_fn, records)
+
+        mapreduce_resp, mapreduce_out, mapreduce_t = mapreduce_f.result()
+        userbehavior_resp, userbehavior_out, userbehavior_t = userbehavior_f.result()
+        # top_genres is optional for Recommendation, so it does not wait for GenreAnalysis
+        recommendation_f = ex.submit(run_captured, call_recommendation, mapreduce_resp["play_counts"], userbehavior_resp, {})
+
+        genre_analysis_resp, genre_out, genre_t = genre_f.result()
+        recommendation_resp, recommendation_out, recommendation_t = recommendation_f.result()
+
+    for out in (mapreduce_out, userbehavior_out, genre_out, recommendation_out):
+        print(out, end="")
+
+    critical_path = max(max(mapreduce_t, userbehavior_t) + recommendation_t, genre_t)
+    sequential = mapreduce_t + userbehavior_t + genre_t + recommendation_t
+    return mapreduce_resp, userbehavior_resp, genre_analysis_resp, recommendation_resp, critical_path, sequential
+
+
+async def run_concurrent_async(records):
+    """
+    Same fan-out as run_concurrent on one event loop: the records body is encoded once
+    and shared by the three stage requests, which go out over aiohttp's keep-alive pool.
+    """
+    if aiohttp is None:
+        raise RuntimeError("REST_ASYNC=1 requires the 'aiohttp' package")
+    body, headers = encode_request(rest_codec.records_payload(records))
+    timeout = aiohttp.ClientTimeout(sock_connect=REST_CONNECT_TIMEOUT, sock_read=REST_READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit_per_host=REST_POOL_SIZE)
+
+    # responses are decoded by rest_codec, which also knows zstd
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=False) as session:
+        async def timed(url, body, headers):
+            start = time.time()
+            resp = await post_async(session, url, body, headers)
+            return resp, time.time() - start
+
+        mapreduce_task = asyncio.create_task(timed(MAPREDUCE_URL, body, headers))
+        userbehavior_task = asyncio.create_task(timed(USERBEHAVIOR_URL, body, headers))
+        genre_task = asyncio.create_task(timed(GENRE_ANALYSIS_URL, body, headers))
+
+        (mapreduce_resp, mapreduce_t), (userbehavior_resp, userbehavior_t) = await asyncio.gather(
+            mapreduce_task, userbehavior_task)
+        # top_genres is optional for Recommendation, so it does not wait for GenreAnalysis
+        payload = recommendation_payload(mapreduce_resp["play_counts"], userbehavior_resp, {})
+        recommendation_task = asyncio.create_task(timed(RECOMMENDATION_URL, *encode_request(payload)))
+
+        genre_analysis_resp, genre_t = await genre_task
+        recommendation_resp, recommendation_t = await recommendation_task
+
+    report_mapreduce(mapreduce_resp, mapreduce_t)
+    report_userbehavior(userbehavior_resp, userbehavior_t)
+    report_genre_analysis(genre_analysis_resp, genre_t)
+    report_recommendation(recommendation_resp, recommendation_t)
+
+    critical_path = max(max(mapreduce_t, userbehavior_t) + recommendation_t, genre_t)
+    sequential = mapreduce_t + userbehavior_t + genre_t + recommendation_t
+    return mapreduce_resp, userbehavior_resp, genre_analysis_resp, recommendation_resp, critical_path, sequential
+
+
 # ───────────────────────────────────────────────
 # Save Results
 # ───────────────────────────────────────────────
@@ -181,21 +456,50 @@ def main():
     print("=" * 70)
     print("🎵 MUSIC STREAMING ANALYTICS CLIENT (REST)")
     print("=" * 70)
-    print("Workflow: Client → MapReduce → UserBehavior → GenreAnalysis → Recommendation → Client")
+    if WORKFLOW_MODE == "fused":
+        workflow = "Client → Analytics (MapReduce + UserBehavior + GenreAnalysis) → Recommendation → Client"
+    else:
+        workflow = "Client → MapReduce → UserBehavior → GenreAnalysis → Recommendation → Client"
+    print(f"Workflow: {workflow}")
+    print(f"Codec: {rest_codec.JSON_LIBRARY}, records shape {rest_codec.REST_RECORDS_SHAPE}, "
+          f"compression {rest_codec.REST_COMPRESSION}")
+    use_async = REST_ASYNC and CONCURRENT_CALLS and not REST_STREAMING and WORKFLOW_MODE != "fused"
+    http_client = "aiohttp" if use_async else "requests"
+    print(f"HTTP: {http_client}, pool {REST_POOL_SIZE}, timeouts {REST_CONNECT_TIMEOUT:g}s/{REST_READ_TIMEOUT:g}s, "
+          f"{REST_RETRIES} attempts")
     print("=" * 70)
     print()
 
-    print(f"[Client] Loading data from {DATA_CSV}")
-    records = load_data(DATA_CSV)
-    print(f"[Client] ✓ Loaded {len(records)} streaming records")
+    if REST_STREAMING and WORKFLOW_MODE != "fused":
+        # the stream endpoints read straight from the CSV, nothing is held in memory
+        print(f"[Client] Streaming records from {DATA_CSV} in chunks of {CHUNK_SIZE}")
+        records = DATA_CSV
+    else:
+        print(f"[Client] Loading data from {DATA_CSV}")
+        records = load_data(DATA_CSV)
+        print(f"[Client] ✓ Loaded {len(records)} streaming records")
     print()
 
     total_start = time.time()
-
-    mapreduce_resp = call_mapreduce(records)
-    userbehavior_resp = call_userbehavior(records)
-    genre_analysis_resp = call_genre_analysis(records)
-    recommendation_resp = call_recommendation(mapreduce_resp["play_counts"], userbehavior_resp, genre_analysis_resp)
+    critical_path = sequential = None
+
+    if WORKFLOW_MODE != "fused" and CONCURRENT_CALLS:
+        # the NDJSON uploads are generator bodies, they stay on the threaded fan-out
+        fan_out = asyncio.run(run_concurrent_async(records)) if use_async else run_concurrent(records)
+        (mapreduce_resp, userbehavior_resp, genre_analysis_resp, recommendation_resp,
+         critical_path, sequential) = fan_out
+    else:
+        if WORKFLOW_MODE == "fused":
+            analysis_resp = call_analyze_all(records)
+            mapreduce_resp = analysis_resp["mapreduce"]
+            userbehavior_resp = analysis_resp["userbehavior"]
+            genre_analysis_resp = analysis_resp["genre_analysis"]
+        else:
+            mapreduce_fn, userbehavior_fn, genre_fn = stage_calls()
+            mapreduce_resp = mapreduce_fn(records)
+            userbehavior_resp = userbehavior_fn(records)
+            genre_analysis_resp = genre_fn(records)
+        recommendation_resp = call_recommendation(mapreduce_resp["play_counts"], userbehavior_resp, genre_analysis_resp)
 
     total_time = time.time() - total_start
 
@@ -206,6 +510,9 @@ def main():
     print(f"UserBehavior Time:   {userbehavior_resp['processing_time']:.4f}s")
     print(f"GenreAnalysis Time:  {genre_analysis_resp['processing_time']:.4f}s")
     print(f"Recommendation Time: {recommendation_resp['processing_time']:.4f}s")
+    if critical_path is not None:
+        print(f"Critical Path Time:  {critical_path:.4f}s")
+        print(f"Sequential Sum:      {sequential:.4f}s")
     print(f"Total Workflow Time: {total_time:.4f}s")
     print("=" * 70)
     print("✓ All services completed successfully!")
@@ -214,13 +521,26 @@ def main():
     # ================== SAVE DETAILED METRICS ==================
     metrics = {
         "timestamp": datetime.now().isoformat(),
-        "workflow": "Client → MapReduce → UserBehavior → GenreAnalysis → Recommendation → Client",
+        "workflow": workflow,
+        "codec": {
+            "json": rest_codec.JSON_LIBRARY,
+            "records_shape": rest_codec.REST_RECORDS_SHAPE,
+            "compression": rest_codec.REST_COMPRESSION,
+        },
+        "http": {
+            "client": http_client,
+            "pool_size": REST_POOL_SIZE,
+            "connect_timeout": REST_CONNECT_TIMEOUT,
+            "read_timeout": REST_READ_TIMEOUT,
+        },
         "performance": {
             "mapreduce_time": mapreduce_resp["processing_time"],
             "userbehavior_time": userbehavior_resp["processing_time"],
             "genre_analysis_time": genre_analysis_resp["processing_time"],
             "recommendation_time": recommendation_resp["processing_time"],
             "total_workflow_time": total_time,
+            "critical_path_time": critical_path,
+            "sequential_roundtrip_sum": sequential,
         },
         "mapreduce_results": {
             "top_songs": dict(sorted(mapreduce_resp["play_counts"].items(), key=lambda x: x[1], reverse=True)[:10]),
@@ -0,0 +1,235 @@
+"""
+REST codec layer
+JSON encoding (orjson when installed), gzip/zstd Content-Encoding and the
+row / columnar record payload shapes shared by the REST services and client
+"""
+import gzip
+import io
+import json
+import os
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from services import metrics
+
+FIELDS = ("user_id", "song_id", "artist", "duration", "timestamp", "genre")
+
+# "auto" uses orjson when installed, "json" forces the standard library
+REST_JSON = os.getenv("REST_JSON", "auto")
+# Content-Encoding for request bodies: "none", "gzip" or "zstd"
+REST_COMPRESSION = os.getenv("REST_COMPRESSION", "none")
+# Bodies smaller than this are sent as-is
+REST_COMPRESS_MIN_BYTES = int(os.getenv("REST_COMPRESS_MIN_BYTES", "1024"))
+# "rows" sends {"records": [{...}, ...]}, "columns" sends {"columns": {field: [...]}}
+REST_RECORDS_SHAPE = os.getenv("REST_RECORDS_SHAPE", "rows")
+
+ENCODINGS = ("gzip", "zstd") if zstandard else ("gzip",)
+DECODE_ERRORS = (ValueError, OSError, EOFError) + ((zstandard.ZstdError,) if zstandard else ())
+ACCEPT_ENCODING = ", ".join(ENCODINGS)
+JSON_LIBRARY = "orjson" if orjson is not None and REST_JSON != "json" else "json"
+
+
+# ───────────────────────────────────────────────
+# JSON
+# ───────────────────────────────────────────────
+def dumps(obj):
+    if JSON_LIBRARY == "orjson":
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    if JSON_LIBRARY == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ───────────────────────────────────────────────
+# Content-Encoding
+# ───────────────────────────────────────────────
+def compress(data, encoding):
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=1)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd encoding requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"Unsupported Content-Encoding '{encoding}'")
+
+
+def decompress(data, encoding):
+    if not encoding or encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise ValueError(f"Unsupported Content-Encoding '{encoding}'")
+
+
+def negotiate(accept_encoding):
+    """First encoding we support from an Accept-Encoding header (preferring zstd), or None."""
+    offered = {part.split(";")[0].strip() for part in (accept_encoding or "").split(",")}
+    for encoding in reversed(ENCODINGS):
+        if encoding in offered:
+            return encoding
+    return None
+
+
+def encode_body(obj, encoding=None):
+    """Serialize obj; returns (body, headers)."""
+    body = dumps(obj)
+    headers = {"Content-Type": "application/json"}
+    if encoding and encoding != "none" and len(body) >= REST_COMPRESS_MIN_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return body, headers
+
+
+# ───────────────────────────────────────────────
+# Record payload shapes
+# ───────────────────────────────────────────────
+def to_columns(records):
+    return {name: [r.get(name) for r in records] for name in FIELDS}
+
+
+def records_payload(records, shape=None):
+    shape = shape or REST_RECORDS_SHAPE
+    if shape == "columns":
+        return {"columns": to_columns(records)}
+    if shape != "rows":
+        raise ValueError(f"Unknown records shape '{shape}', expected 'rows' or 'columns'")
+    return {"records": records}
+
+
+def payload_columns(data):
+    """Per-field lists from either payload shape (None when the payload has no records)."""
+    if not isinstance(data, dict):
+        return None
+    if "columns" in data:
+        columns = data["columns"]
+        n = len(next(iter(columns.values()), []))
+        return {name: columns.get(name) or [None] * n for name in FIELDS}
+    if "records" in data:
+        return to_columns(data["records"])
+    return None
+
+
+def payload_records(data):
+    """Record dicts from either payload shape (None when the payload has no records)."""
+    if not isinstance(data, dict):
+        return None
+    if "columns" in data:
+        columns = payload_columns(data)
+        return [dict(zip(FIELDS, values)) for values in zip(*(columns[name] for name in FIELDS))]
+    return data.get("records")
+
+
+# ───────────────────────────────────────────────
+# NDJSON streaming
+# ───────────────────────────────────────────────
+def ndjson_lines(chunks, shape=None):
+    """One NDJSON line per mini-batch of record dicts."""
+    shape = shape or REST_RECORDS_SHAPE
+    for chunk in chunks:
+        yield dumps(records_payload(chunk, shape) if shape == "columns" else chunk) + b"\n"
+
+
+def compress_stream(parts, encoding):
+    """Incrementally compress an iterable of bytes (for chunked uploads)."""
+    if not encoding or encoding == "none":
+        yield from parts
+        return
+    if encoding == "gzip":
+        compressor = zlib.compressobj(1, zlib.DEFLATED, 31)
+    elif encoding == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+    else:
+        raise ValueError(f"Unsupported Content-Encoding '{encoding}'")
+    for part in parts:
+        out = compressor.compress(part)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def iter_ndjson(stream, encoding=None):
+    """Parsed values of an NDJSON body, one per line, decompressing on the fly."""
+    if isinstance(stream, io.RawIOBase):
+        # WSGI input streams are raw: readline() would pull the body a byte at a time
+        stream = io.BufferedReader(stream, 1 << 16)
+    if encoding == "gzip":
+        stream = gzip.GzipFile(fileobj=stream)
+    elif encoding == "zstd" and zstandard is not None:
+        stream = io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+    elif encoding and encoding != "identity":
+        raise ValueError(f"Unsupported Content-Encoding '{encoding}'")
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+
+def iter_column_batches(items, batch_records):
+    """
+    Regroup NDJSON items (a record, a list of records or a {"columns": ...}
+    mini-batch) into column dicts of about batch_records records.
+    """
+    buffer = {name: [] for name in FIELDS}
+    pending = 0
+    for item in items:
+        if isinstance(item, dict) and "columns" in item:
+            columns = payload_columns(item)
+        elif isinstance(item, (dict, list)):
+            columns = to_columns(item if isinstance(item, list) else [item])
+        else:
+            raise ValueError("NDJSON lines must be a record, a list of records or a columns batch")
+        for name in FIELDS:
+            buffer[name].extend(columns[name])
+        pending += len(columns[FIELDS[0]])
+        if pending >= batch_records:
+            yield buffer
+            buffer = {name: [] for name in FIELDS}
+            pending = 0
+    if pending:
+        yield buffer
+
+
+# ───────────────────────────────────────────────
+# Flask helpers
+# ───────────────────────────────────────────────
+def read_json(request):
+    """Decode a Flask request body honouring Content-Encoding; None if empty or malformed."""
+    body = request.get_data(cache=False)
+    if not body:
+        return None
+    try:
+        with metrics.phase("deserialize"):
+            return loads(decompress(body, request.headers.get("Content-Encoding")))
+    except DECODE_ERRORS:
+        return None
+
+
+def request_column_batches(request, batch_records):
+    """Column batches from a (chunked, optionally compressed) NDJSON request body."""
+    items = iter_ndjson(request.stream, request.headers.get("Content-Encoding"))
+    return iter_column_batches(items, batch_records)
+
+
+def json_response(request, obj, status=200):
+    """Encode obj as a Flask response, compressed when the client accepts it."""
+    from flask import Response
+
+    with metrics.phase("serialize"):
+        body, headers = encode_body(obj, negotiate(request.headers.get("Accept-Encoding")))
+    headers["Vary"] = "Accept-Encoding"
+    return Response(body, status=status, headers=headers)
@@ -0,0 +1,171 @@
+"""
+REST serving layer
+Runs a service's Flask app on the development server, a pre-fork gunicorn
+master (threaded workers, Linux/macOS) or waitress (pure Python, also Windows),
+and instruments it with the shared service metrics (GET /metrics)
+"""
+import io
+import os
+
+from werkzeug.exceptions import HTTPException
+
+from services import metrics
+
+# "dev" is Flask's built-in server, "gunicorn" and "waitress" are production WSGI servers
+REST_SERVER = os.getenv("REST_SERVER", "dev")
+# gunicorn worker processes (waitress is single-process)
+REST_WORKERS = int(os.getenv("REST_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Request threads per worker process
+REST_THREADS = int(os.getenv("REST_THREADS", "4"))
+# Seconds before a silent worker is restarted / an idle keep-alive connection is dropped
+REST_WORKER_TIMEOUT = int(os.getenv("REST_WORKER_TIMEOUT", "120"))
+REST_KEEPALIVE = int(os.getenv("REST_KEEPALIVE", "5"))
+
+SERVERS = ("dev", "gunicorn", "waitress")
+
+
+def describe(mode=None):
+    mode = mode or REST_SERVER
+    if mode == "gunicorn":
+        return f"gunicorn, {REST_WORKERS} workers x {REST_THREADS} threads"
+    if mode == "waitress":
+        return f"waitress, {REST_THREADS} threads"
+    return "Flask development server"
+
+
+# ───────────────────────────────────────────────
+# Metrics
+# ───────────────────────────────────────────────
+class CountingInput(io.RawIOBase):
+    """
+    wsgi.input wrapper adding the body bytes read to the request byte counter.
+    A raw stream, so readers that buffer raw WSGI input (rest_codec.iter_ndjson)
+    still read the body in large blocks instead of byte by byte.
+    """
+
+    def __init__(self, stream, method):
+        super().__init__()
+        self.stream = stream
+        self.method = method
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        readinto = getattr(self.stream, "readinto", None)
+        if readinto is not None:
+            n = readinto(buffer) or 0
+        else:
+            data = self.stream.read(len(buffer))
+            n = len(data)
+            buffer[:n] = data
+        metrics.BYTES_IN.inc(self.method, amount=n)
+        return n
+
+
+class MetricsMiddleware:
+    """
+    WSGI wrapper counting every request by route and HTTP status. The request
+    stays in flight until its (possibly streamed) response body is fully sent.
+    """
+
+    def __init__(self, wsgi_app, url_map):
+        self.wsgi_app = wsgi_app
+        self.url_map = url_map
+
+    def route(self, environ):
+        try:
+            rule, _ = self.url_map.bind_to_environ(environ).match(return_rule=True)
+            return rule.rule
+        except HTTPException:
+            return "unmatched"
+
+    def __call__(self, environ, start_response):
+        method = self.route(environ)
+        if method == "/metrics":
+            return self.wsgi_app(environ, start_response)
+        timer = metrics.RequestTimer(method)
+        environ["wsgi.input"] = CountingInput(environ["wsgi.input"], method)
+        status = []
+
+        def counting_start_response(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(" ", 1)[0]]
+            return start_response(status_line, headers, exc_info)
+
+        try:
+            body = self.wsgi_app(environ, counting_start_response)
+        except Exception:
+            timer.finish("500")
+            raise
+        return self.iter_body(body, method, timer, status)
+
+    @staticmethod
+    def iter_body(body, method, timer, status):
+        try:
+            for chunk in body:
+                metrics.BYTES_OUT.inc(method, amount=len(chunk))
+                yield chunk
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+            timer.finish(status[0] if status else "500")
+
+
+def instrument(app, service):
+    """
+    Count the app's requests and serve the registry on GET /metrics. Under
+    gunicorn each worker keeps its own registry, a scrape sees the worker that answers it.
+    """
+    from flask import Response
+
+    metrics.configure(service, "rest")
+    app.add_url_rule("/metrics", "metrics", lambda: Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE))
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, app.url_map)
+    return app
+
+
+def run_gunicorn(app, host, port):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise RuntimeError("REST_SERVER=gunicorn requires the 'gunicorn' package (not available on Windows)")
+
+    class EmbeddedApplication(BaseApplication):
+        """gunicorn master for an already imported app, so `python service.py` still works."""
+
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", REST_WORKERS)
+            # gthread workers keep connections alive; the plain sync worker closes after every request
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", REST_THREADS)
+            self.cfg.set("timeout", REST_WORKER_TIMEOUT)
+            self.cfg.set("keepalive", REST_KEEPALIVE)
+            self.cfg.set("accesslog", None)
+
+        def load(self):
+            return app
+
+    EmbeddedApplication().run()
+
+
+def run_waitress(app, host, port):
+    try:
+        import waitress
+    except ImportError:
+        raise RuntimeError("REST_SERVER=waitress requires the 'waitress' package")
+    waitress.serve(app, host=host, port=port, threads=REST_THREADS,
+                   channel_timeout=REST_WORKER_TIMEOUT, ident=None)
+
+
+def serve(app, port, host="0.0.0.0", mode=None):
+    """Block serving app on host:port with the configured server."""
+    mode = mode or REST_SERVER
+    if mode not in SERVERS:
+        raise ValueError(f"Unknown REST server '{mode}', expected one of {SERVERS}")
+    if mode == "gunicorn":
+        run_gunicorn(app, host, port)
+    elif mode == "waitress":
+        run_waitress(app, host, port)
+    else:
+        app.run(host=host, port=port)
@@ -0,0 +1,62 @@
+# analytics_service_rest.py
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import time
+from flask import Flask, request
+
+from rest_codec import read_json, json_response, payload_columns
+from rest_server import serve, describe, instrument
+from services.analytics_service import FusedAnalyticsService
+from services.genre_analysis_service import GenreAnalysisStreamService
+from services.record_batch import RecordBatch
+
+app = instrument(Flask(__name__), "analytics")
+PORT = int(os.getenv("ANALYTICS_PORT", 5009))
+
+
+def now():
+    return time.time()
+
+
+@app.route("/analyze", methods=["POST"])
+def analyze():
+    start = now()
+    columns = payload_columns(read_json(request))
+    if columns is None:
+        return json_response(request, {"error": "Missing 'records' in request"}, 400)
+
+    # One scan for play counts, user stats and genre counts
+    result = FusedAnalyticsService.analyze_all(RecordBatch.from_columns(columns))
+    kernel_time = result["processing_time"]
+    # same genre shape as /genre_analysis
+    genre_counts, top_genres = GenreAnalysisStreamService.summarize(result["genre_counts"])
+
+    processing_time = now() - start
+
+    resp = {
+        "processing_time": processing_time,
+        "mapreduce": {
+            "processing_time": kernel_time,
+            "play_counts": result["play_counts"]
+        },
+        "userbehavior": {
+            "processing_time": kernel_time,
+            "user_stats": result["user_stats"],
+            "top_users": [u["user_id"] for u in result["top_users"]]
+        },
+        "genre_analysis": {
+            "processing_time": kernel_time,
+            "top_genres": top_genres,
+            "genre_counts": genre_counts
+        }
+    }
+
+    return json_response(request, resp)
+
+
+if __name__ == "__main__":
+    print(f"[Analytics REST] server starting on port {PORT} ({describe()})")
+    serve(app, PORT)
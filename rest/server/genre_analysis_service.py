@@ -2,15 +2,21 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 import time
 import json
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor
-from flask import Flask, request, jsonify
+from flask import Flask, request
 
-app = Flask(__name__)
+from rest_codec import read_json, json_response, payload_columns, request_column_batches, DECODE_ERRORS
+from rest_server import serve, describe, instrument
+from services.genre_analysis_service import GenreAnalysisStreamService, GenreCountAccumulator
+from services.record_batch import RecordBatch
+
+app = instrument(Flask(__name__), "genre")
 PORT = int(os.getenv("GENRE_ANALYSIS_PORT", 5005))
+# Records buffered from an NDJSON upload before they are folded into the running counts
+STREAM_BATCH_RECORDS = int(os.getenv("STREAM_BATCH_RECORDS", "10000"))
 
 
 def now():
@@ -20,33 +26,49 @@ def now():
 @app.route("/genre_analysis", methods=["POST"])
 def genre_analysis():
     start = now()
-    data = request.get_json()
-    if not data or "records" not in data:
-        return jsonify({"error": "Missing 'records' in request"}), 400
-
-    records = data["records"]
-
-    # Count how many times each genre appears
-    genre_counter = Counter()
-    for r in records:
-        genre = r.get("genre")
-        if genre:
-            genre_counter[genre] += 1
+    columns = payload_columns(read_json(request))
+    if columns is None:
+        return json_response(request, {"error": "Missing 'records' in request"}, 400)
 
-    # Top genres
-    top_genres = [g for g, _ in genre_counter.most_common(10)]
+    # Count how many times each genre appears (records without a genre are skipped), top 10 genres
+    batch = RecordBatch.from_columns(columns, GenreAnalysisStreamService.BATCH_FIELDS)
+    result = GenreAnalysisStreamService.perform_genre_analysis(batch)
+    genre_counts, top_genres = GenreAnalysisStreamService.summarize(result["genre_counts"])
 
     processing_time = now() - start
 
     resp = {
         "processing_time": processing_time,
         "top_genres": top_genres,
-        "genre_counts": dict(genre_counter)
+        "genre_counts": genre_counts
     }
 
-    return jsonify(resp)
+    return json_response(request, resp)
+
+
+@app.route("/genre_analysis/stream", methods=["POST"])
+def genre_analysis_stream():
+    """NDJSON upload (chunked): genre counts are folded in mini-batch by mini-batch as lines arrive."""
+    start = now()
+    acc = GenreCountAccumulator()
+    try:
+        for columns in request_column_batches(request, STREAM_BATCH_RECORDS):
+            acc.update(RecordBatch.from_columns(columns, GenreAnalysisStreamService.BATCH_FIELDS))
+    except DECODE_ERRORS as e:
+        return json_response(request, {"error": f"Malformed NDJSON stream: {e}"}, 400)
+
+    # same shape as /genre_analysis: records without a genre are not counted, top 10 genres
+    genre_counts, top_genres = acc.summary()
+
+    resp = {
+        "processing_time": now() - start,
+        "num_records": acc.num_records,
+        "top_genres": top_genres,
+        "genre_counts": genre_counts
+    }
+    return json_response(request, resp)
 
 
 if __name__ == "__main__":
-    print(f"[GenreAnalysis REST] server starting on port {PORT}")
-    app.run(host="0.0.0.0", port=PORT)
+    print(f"[GenreAnalysis REST] server starting on port {PORT} ({describe()})")
+    serve(app, PORT)
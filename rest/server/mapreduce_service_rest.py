@@ -2,43 +2,47 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 import time
 import json
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
-from flask import Flask, request, jsonify
+from flask import Flask, request
 
+from rest_codec import read_json, json_response, payload_columns, payload_records, request_column_batches, DECODE_ERRORS
+from rest_server import serve, describe, instrument
+from services.mapreduce_service import MapReduceStreamService, PlayCountAccumulator
+from services.record_batch import RecordBatch
 
-app = Flask(__name__)
+app = instrument(Flask(__name__), "mapreduce")
 PORT = int(os.getenv("MAPREDUCE_PORT", 5001))
+# "threads" (default), "vectorized" or "processes"; worker count for the latter
+ENGINE = os.getenv("MAPREDUCE_ENGINE", "threads")
+WORKERS = int(os.getenv("MAPREDUCE_WORKERS", "0")) or None
+# Records buffered from an NDJSON upload before they are folded into the running counts
+STREAM_BATCH_RECORDS = int(os.getenv("STREAM_BATCH_RECORDS", "10000"))
 
 
 def now():
     return time.time()
 
 
+def stream_data(data):
+    """What perform_mapreduce counts for a payload: a batch of the counted columns, or the record dicts (threads)."""
+    if ENGINE in MapReduceStreamService.BATCH_ENGINES:
+        columns = payload_columns(data)
+        return None if columns is None else RecordBatch.from_columns(columns, MapReduceStreamService.BATCH_FIELDS)
+    return payload_records(data)
+
+
 @app.route("/mapreduce", methods=["POST"])
 def aggregate():
     start = now()
-    data = request.get_json()
-    if not data or "records" not in data:
-        return jsonify({"error": "Missing 'records' in request"}), 400
-
-    records = data["records"]
+    records = stream_data(read_json(request))
+    if records is None:
+        return json_response(request, {"error": "Missing 'records' in request"}, 400)
 
-    # Map phase (parallel) -> key = "artist - song_id"
-    def map_fn(rec):
-        key = f"{rec['artist']} - {rec['song_id']}"
-        return (key, 1)
-
-    with ThreadPoolExecutor(max_workers=4) as ex:
-        mapped = list(ex.map(map_fn, records))
-
-    # Reduce
-    result = defaultdict(int)
-    for k, v in mapped:
-        result[k] += v
+    # Map + reduce -> key = "artist - song_id"
+    result = MapReduceStreamService.perform_mapreduce(records, engine=ENGINE, max_workers=WORKERS)["play_counts"]
 
     processing_time = now() - start
 
@@ -47,9 +51,28 @@ def aggregate():
         "play_counts": dict(result)
     }
 
-    return jsonify(resp)
+    return json_response(request, resp)
+
+
+@app.route("/mapreduce/stream", methods=["POST"])
+def aggregate_stream():
+    """NDJSON upload (chunked): play counts are folded in mini-batch by mini-batch as lines arrive."""
+    start = now()
+    acc = PlayCountAccumulator(ENGINE, WORKERS)
+    try:
+        for columns in request_column_batches(request, STREAM_BATCH_RECORDS):
+            acc.update(stream_data({"columns": columns}))
+    except DECODE_ERRORS as e:
+        return json_response(request, {"error": f"Malformed NDJSON stream: {e}"}, 400)
+
+    resp = {
+        "processing_time": now() - start,
+        "num_records": acc.num_records,
+        "play_counts": acc.play_counts
+    }
+    return json_response(request, resp)
 
 
 if __name__ == "__main__":
-    print(f"[MapReduce REST] gRPC-like MapReduce REST server starting on port {PORT}")
-    app.run(host="0.0.0.0", port=PORT)
+    print(f"[MapReduce REST] gRPC-like MapReduce REST server starting on port {PORT} ({describe()})")
+    serve(app, PORT)
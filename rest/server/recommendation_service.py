@@ -2,13 +2,18 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 import time
 import json
 from collections import Counter
-from flask import Flask, request, jsonify
+from flask import Flask, request
 
-app = Flask(__name__)
+from rest_codec import read_json, json_response
+from rest_server import serve, describe, instrument
+from services import metrics
+
+app = instrument(Flask(__name__), "recommendation")
 PORT = int(os.getenv("RECOMMENDATION_PORT", 5007))
 
 
@@ -19,24 +24,25 @@ def now():
 @app.route("/recommend", methods=["POST"])
 def recommend():
     start = now()
-    data = request.get_json()
+    data = read_json(request)
     # Expecting: {"play_counts": {...}, "user_stats": [...]}
     play_counts = data.get("play_counts", {}) if data else {}
     user_stats = data.get("user_stats", []) if data else []
 
-    # top 5 trending songs
-    counter = Counter(play_counts)
-    top5 = [k for k, _ in counter.most_common(5)]
-
-    # recommendations: for each user, pick top5 excluding their top_artist
-    recommendations = {}
-    for us in user_stats:
-        uid = us.get("user_id")
-        fav = us.get("top_artist", "")
-        # recommend songs that do not include fav artist string
-        recs = [s for s in top5 if fav == "" or fav not in s]
-        # keep same ordering as top5
-        recommendations[uid] = recs
+    with metrics.phase("compute"):
+        # top 5 trending songs
+        counter = Counter(play_counts)
+        top5 = [k for k, _ in counter.most_common(5)]
+
+        # recommendations: for each user, pick top5 excluding their top_artist
+        recommendations = {}
+        for us in user_stats:
+            uid = us.get("user_id")
+            fav = us.get("top_artist", "")
+            # recommend songs that do not include fav artist string
+            recs = [s for s in top5 if fav == "" or fav not in s]
+            # keep same ordering as top5
+            recommendations[uid] = recs
 
     processing_time = now() - start
 
@@ -46,9 +52,9 @@ def recommend():
         "recommendations": recommendations
     }
 
-    return jsonify(resp)
+    return json_response(request, resp)
 
 
 if __name__ == "__main__":
-    print(f"[Recommendation REST] server starting on port {PORT}")
-    app.run(host="0.0.0.0", port=PORT)
+    print(f"[Recommendation REST] server starting on port {PORT} ({describe()})")
+    serve(app, PORT)
@@ -2,14 +2,21 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 import time
 import json
-from collections import defaultdict, Counter
-from flask import Flask, request, jsonify
+from flask import Flask, request
 
-app = Flask(__name__)
+from rest_codec import read_json, json_response, payload_columns, request_column_batches, DECODE_ERRORS
+from rest_server import serve, describe, instrument
+from services.record_batch import RecordBatch
+from services.user_behavior_service import UserBehaviorService, UserBehaviorAccumulator
+
+app = instrument(Flask(__name__), "userbehavior")
 PORT = int(os.getenv("USERBEHAVIOR_PORT", 5003))
+# Records buffered from an NDJSON upload before they are folded into the running totals
+STREAM_BATCH_RECORDS = int(os.getenv("STREAM_BATCH_RECORDS", "10000"))
 
 
 def now():
@@ -19,36 +26,15 @@ def now():
 @app.route("/userbehavior", methods=["POST"])
 def analyze():
     start = now()
-    data = request.get_json()
-    if not data or "records" not in data:
-        return jsonify({"error": "Missing 'records' in request"}), 400
-
-    records = data["records"]
-
-    user_time = defaultdict(int)
-    user_artists = defaultdict(list)
-
-    for r in records:
-        # ensure types are correct
-        uid = r.get("user_id")
-        duration = int(r.get("duration", 0))
-        artist = r.get("artist", "")
-        user_time[uid] += duration
-        user_artists[uid].append(artist)
-
-    # Build user_stats list
-    user_stats = []
-    for uid, t in user_time.items():
-        top_artist = Counter(user_artists[uid]).most_common(1)[0][0] if user_artists[uid] else ""
-        user_stats.append({
-            "user_id": uid,
-            "total_time": t,
-            "top_artist": top_artist
-        })
+    columns = payload_columns(read_json(request))
+    if columns is None:
+        return json_response(request, {"error": "Missing 'records' in request"}, 400)
 
+    batch = RecordBatch.from_columns(columns, UserBehaviorService.BATCH_FIELDS)
+    result = UserBehaviorService.analyze_behavior(batch)
+    user_stats = result["user_stats"]
     # Top 5 users by total_time
-    top_users_sorted = sorted(user_time.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_users = [uid for uid, _ in top_users_sorted]
+    top_users = [u["user_id"] for u in result["top_users"]]
 
     processing_time = now() - start
 
@@ -58,9 +44,29 @@ def analyze():
         "top_users": top_users
     }
 
-    return jsonify(resp)
+    return json_response(request, resp)
+
+
+@app.route("/userbehavior/stream", methods=["POST"])
+def analyze_stream():
+    """NDJSON upload (chunked): per-user totals are folded in mini-batch by mini-batch as lines arrive."""
+    start = now()
+    acc = UserBehaviorAccumulator()
+    try:
+        for columns in request_column_batches(request, STREAM_BATCH_RECORDS):
+            acc.update(RecordBatch.from_columns(columns, UserBehaviorService.BATCH_FIELDS))
+    except DECODE_ERRORS as e:
+        return json_response(request, {"error": f"Malformed NDJSON stream: {e}"}, 400)
+
+    resp = {
+        "processing_time": now() - start,
+        "num_records": acc.num_records,
+        "user_stats": [acc.user_stat(uid) for uid in acc.user_time],
+        "top_users": acc.top_users(5)
+    }
+    return json_response(request, resp)
 
 
 if __name__ == "__main__":
-    print(f"[UserBehavior REST] server starting on port {PORT}")
-    app.run(host="0.0.0.0", port=PORT)
+    print(f"[UserBehavior REST] server starting on port {PORT} ({describe()})")
+    serve(app, PORT)
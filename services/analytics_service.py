@@ -0,0 +1,41 @@
+"""
+Fused Analytics Service
+Computes play counts, user behavior and genre counts from one batch
+"""
+import time
+
+from services import metrics
+from services.record_batch import RecordBatch
+from services.mapreduce_service import MapReduceStreamService
+from services.user_behavior_service import UserBehaviorService
+from services.genre_analysis_service import GenreAnalysisStreamService
+
+class FusedAnalyticsService:
+    @staticmethod
+    def analyze_all(stream_data):
+        """
+        Records are scanned once to build the RecordBatch; play counts, per-user
+        stats and genre counts are then all derived from its code arrays.
+        """
+        start = time.time()
+        metrics.records(len(stream_data))
+        batch = RecordBatch.from_records(stream_data)
+
+        # play counts time their own map and reduce phases
+        play_counts = MapReduceStreamService.vectorized_counts(batch)
+        with metrics.phase("compute"):
+            user_stats = UserBehaviorService.batch_user_stats(batch)
+            genre_counts = GenreAnalysisStreamService.batch_genre_counts(batch)
+
+        top_users = sorted(user_stats, key=lambda x: x["total_time"], reverse=True)[:5]
+        top_genres = [g for g, _ in sorted(genre_counts.items(), key=lambda x: x[1], reverse=True)]
+
+        processing_time = time.time() - start
+        return {
+            "play_counts": play_counts,
+            "user_stats": user_stats,
+            "top_users": top_users,
+            "genre_counts": genre_counts,
+            "top_genres": top_genres,
+            "processing_time": processing_time
+        }
@@ -0,0 +1,96 @@
+"""
+Local Blob Store
+Content-addressed, file-backed store for record batches shared by services on one host (or volume)
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+from services.columnar_store import ColumnarDataset, dataset_bytes, is_columnar
+from services.record_batch import RecordBatch
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(tempfile.gettempdir(), "music_blobs"))
+# Blobs (and stray temp files) untouched for this many seconds are removed by the next put (0 keeps them)
+BLOB_TTL_SECONDS = int(os.getenv("BLOB_TTL_SECONDS", "3600"))
+HANDLE_PREFIX = "blob:"
+
+
+def is_handle(value):
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+class BlobStore:
+    """
+    Blobs are stored under their SHA-256 digest, so a handle names exactly one
+    content and uploading the same batch twice writes it only once. Because
+    concurrent uploaders can share a blob, none of them deletes it: a blob is
+    removed by the TTL sweep once nobody has uploaded it for BLOB_TTL_SECONDS.
+    """
+
+    def __init__(self, root=None, ttl=None):
+        self.root = root or BLOB_STORE_DIR
+        self.ttl = BLOB_TTL_SECONDS if ttl is None else ttl
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, handle):
+        if not is_handle(handle):
+            raise ValueError(f"Not a blob handle: {handle!r}")
+        digest = handle[len(HANDLE_PREFIX):]
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Malformed blob handle: {handle!r}")
+        return os.path.join(self.root, digest)
+
+    def put(self, data):
+        self.sweep()
+        handle = HANDLE_PREFIX + hashlib.sha256(data).hexdigest()
+        path = self.path(handle)
+        try:
+            # re-uploading an existing blob restarts its TTL
+            os.utime(path)
+        except FileNotFoundError:
+            # write + rename so readers never see a partial blob
+            fd, tmp = tempfile.mkstemp(dir=self.root)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return handle
+
+    def get(self, handle):
+        try:
+            with open(self.path(handle), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(f"Unknown blob {handle}") from None
+
+    def delete(self, handle):
+        try:
+            os.remove(self.path(handle))
+        except FileNotFoundError:
+            pass
+
+    def sweep(self):
+        """Remove files not modified for longer than the TTL; returns how many were removed."""
+        if not self.ttl:
+            return 0
+        cutoff = time.time() - self.ttl
+        removed = 0
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def put_batch(self, batch):
+        return self.put(dataset_bytes(batch))
+
+    def get_batch(self, handle):
+        """Columnar blobs are memory-mapped (zero-copy), older .npz blobs are still read."""
+        path = self.path(handle)
+        if is_columnar(path):
+            return ColumnarDataset.open(path).batch()
+        return RecordBatch.from_bytes(self.get(handle))
@@ -0,0 +1,253 @@
+"""
+Columnar Dataset Files
+Compact on-disk play log: dictionary-encoded string columns, int arrays and
+per-row-group statistics, memory-mapped for zero-copy column access
+
+Layout (little-endian):
+
+  MAGIC (8 bytes) | header length (uint64) | JSON header | arrays, each 64-byte aligned
+
+The header lists every array ("<field>.codes" / "<field>.values" for the
+string fields, "duration", "timestamp") with its dtype, offset from the start
+of the array section and length, plus the row groups and their statistics.
+"""
+import io
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from services.record_batch import STRING_FIELDS, NO_TIMESTAMP, EncodedColumn, RecordBatch
+
+MAGIC = b"MSCOL\x00\x01\x00"
+FORMAT_VERSION = 1
+EXTENSION = ".mscol"
+ALIGN = 64
+
+# Records per row group when converting a CSV
+ROW_GROUP_RECORDS = int(os.getenv("ROW_GROUP_RECORDS", "65536"))
+
+_PREAMBLE = struct.Struct("<8sQ")
+# per-record arrays, spilled to disk while writing
+RECORD_ARRAYS = tuple(f"{name}.codes" for name in STRING_FIELDS) + ("duration", "timestamp")
+RECORD_DTYPES = dict({f"{name}.codes": np.dtype("<i4") for name in STRING_FIELDS},
+                     duration=np.dtype("<i4"), timestamp=np.dtype("<i8"))
+
+
+def _aligned(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def is_columnar(path):
+    """True when path is a columnar dataset file (checked by its magic bytes)."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, TypeError):
+        return False
+
+
+# ───────────────────────────────────────────────
+# Writer
+# ───────────────────────────────────────────────
+class ColumnarWriter:
+    """
+    Appends RecordBatches as row groups. Codes are remapped onto one dictionary
+    per string field (in first-seen order) and the per-record arrays are spilled
+    to temporary files, so memory stays bounded by the dictionaries.
+    """
+
+    def __init__(self, spill_dir=None):
+        self.dictionaries = {name: {} for name in STRING_FIELDS}
+        self.spill_dir = tempfile.mkdtemp(prefix="mscol-", dir=spill_dir)
+        self.spills = {name: open(os.path.join(self.spill_dir, name), "w+b") for name in RECORD_ARRAYS}
+        self.row_groups = []
+        self.num_records = 0
+
+    def write_batch(self, batch):
+        n = len(batch)
+        if not n:
+            return
+        for name in STRING_FIELDS:
+            column = getattr(batch, name)
+            lookup = self.dictionaries[name]
+            remap = np.fromiter((lookup.setdefault(v, len(lookup)) for v in column.values.tolist()),
+                                dtype=np.int32, count=column.cardinality)
+            self.spills[f"{name}.codes"].write(remap[column.codes].astype("<i4", copy=False).tobytes())
+        self.spills["duration"].write(batch.duration.astype("<i4", copy=False).tobytes())
+        self.spills["timestamp"].write(batch.timestamp.astype("<i8", copy=False).tobytes())
+
+        stamps = batch.timestamp[batch.timestamp != NO_TIMESTAMP]
+        self.row_groups.append({
+            "start": self.num_records,
+            "num_records": n,
+            "duration": [int(batch.duration.min()), int(batch.duration.max())],
+            "timestamp": [int(stamps.min()), int(stamps.max())] if len(stamps) else None,
+        })
+        self.num_records += n
+
+    def write_to(self, f):
+        """Write the complete file to the binary file object f."""
+        arrays = [(name, RECORD_DTYPES[name], self.num_records) for name in RECORD_ARRAYS]
+        values = {}
+        for name in STRING_FIELDS:
+            table = np.array(list(self.dictionaries[name]), dtype=str)
+            values[name] = table.astype(table.dtype.newbyteorder("<"), copy=False)
+            arrays.append((f"{name}.values", values[name].dtype, len(values[name])))
+
+        columns, offset = {}, 0
+        for name, dtype, length in arrays:
+            columns[name] = {"dtype": dtype.str, "offset": offset, "length": length}
+            offset = _aligned(offset + dtype.itemsize * length)
+        header = json.dumps({
+            "format": FORMAT_VERSION,
+            "num_records": self.num_records,
+            "columns": columns,
+            "row_groups": self.row_groups,
+        }).encode("utf-8")
+
+        f.write(_PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        start = _aligned(_PREAMBLE.size + len(header))
+        for name, dtype, length in arrays:
+            f.write(b"\0" * (start + columns[name]["offset"] - f.tell()))
+            if name in self.spills:
+                spill = self.spills[name]
+                spill.seek(0)
+                shutil.copyfileobj(spill, f, 1 << 20)
+            else:
+                f.write(values[name.split(".")[0]].tobytes())
+
+    def save(self, path):
+        """Atomically write the dataset to path."""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                self.write_to(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def to_bytes(self):
+        buf = io.BytesIO()
+        self.write_to(buf)
+        return buf.getvalue()
+
+    def close(self):
+        for spill in self.spills.values():
+            spill.close()
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_dataset(path, batches):
+    """Write an iterable of RecordBatches (one row group each) to path."""
+    with ColumnarWriter(os.path.dirname(os.path.abspath(path))) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+        writer.save(path)
+        return writer.num_records
+
+
+def dataset_bytes(batch):
+    """A single batch as an in-memory columnar file."""
+    with ColumnarWriter() as writer:
+        writer.write_batch(RecordBatch.from_records(batch))
+        return writer.to_bytes()
+
+
+def convert_csv(csv_path, out_path, row_group_records=ROW_GROUP_RECORDS):
+    from services import stream_loader
+
+    return write_dataset(out_path, stream_loader.iter_batches(csv_path, row_group_records))
+
+
+# ───────────────────────────────────────────────
+# Reader
+# ───────────────────────────────────────────────
+class ColumnarDataset:
+    """
+    Read-only view over a columnar file. Columns are NumPy arrays backed
+    directly by the buffer (an mmap for open()), nothing is parsed or copied.
+    """
+
+    def __init__(self, buffer):
+        magic, header_len = _PREAMBLE.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a columnar dataset (bad magic bytes)")
+        self.buffer = buffer
+        self.header = json.loads(bytes(buffer[_PREAMBLE.size:_PREAMBLE.size + header_len]))
+        if self.header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar format version {self.header.get('format')}")
+        self.data_start = _aligned(_PREAMBLE.size + header_len)
+        self.row_groups = self.header["row_groups"]
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __len__(self):
+        return self.header["num_records"]
+
+    def column(self, name):
+        spec = self.header["columns"][name]
+        return np.frombuffer(self.buffer, dtype=spec["dtype"], count=spec["length"],
+                             offset=self.data_start + spec["offset"])
+
+    def batch(self, start=0, stop=None):
+        """Records [start, stop) as a RecordBatch of views (string dictionaries are shared)."""
+        rows = slice(start, stop)
+        encoded = {
+            name: EncodedColumn(self.column(f"{name}.codes")[rows], self.column(f"{name}.values"))
+            for name in STRING_FIELDS
+        }
+        return RecordBatch(duration=self.column("duration")[rows], timestamp=self.column("timestamp")[rows], **encoded)
+
+    def row_group(self, index):
+        group = self.row_groups[index]
+        return self.batch(group["start"], group["start"] + group["num_records"])
+
+    def select_row_groups(self, timestamp=None, duration=None):
+        """
+        Indexes of the row groups whose statistics overlap the given inclusive
+        (low, high) ranges; the others cannot contain a matching record.
+        """
+        def overlaps(stats, bounds):
+            if bounds is None:
+                return True
+            if stats is None:
+                return False
+            low, high = bounds
+            return (low is None or stats[1] >= low) and (high is None or stats[0] <= high)
+
+        return [
+            i for i, group in enumerate(self.row_groups)
+            if overlaps(group["duration"], duration) and overlaps(group["timestamp"], timestamp)
+        ]
+
+    def iter_batches(self, chunk_records=None):
+        """Batches of chunk_records records, or one per row group when not given."""
+        if chunk_records is None:
+            for i in range(len(self.row_groups)):
+                yield self.row_group(i)
+            return
+        for start in range(0, len(self), chunk_records):
+            yield self.batch(start, start + chunk_records)
+
+
+def batch_from_bytes(data):
+    """RecordBatch from a columnar file image or a RecordBatch.to_bytes() blob."""
+    if bytes(data[:len(MAGIC)]) == MAGIC:
+        return ColumnarDataset(data).batch()
+    return RecordBatch.from_bytes(data)
@@ -2,7 +2,17 @@ import time
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
+
+from services import metrics
+from services.record_batch import RecordBatch
+
 class GenreAnalysisStreamService:
+    # genres in the REST responses' top_genres (gRPC and XML-RPC report every genre)
+    TOP_GENRES = 10
+    # the only column batch_genre_counts reads
+    BATCH_FIELDS = ("genre",)
+
     @staticmethod
     def map_genre(record):
         # returns (genre, 1) for counting
@@ -15,14 +25,36 @@ class GenreAnalysisStreamService:
             result[genre] += count
         return dict(result)
 
+    @staticmethod
+    def batch_genre_counts(batch):
+        # bincount over the genre codes, keyed in first-seen order like the dict reduce
+        counts = np.bincount(batch.genre.codes, minlength=batch.genre.cardinality)
+        return {
+            str(batch.genre.values[code]): int(counts[code])
+            for code in batch.genre.first_seen_order().tolist()
+        }
+
+    @staticmethod
+    def summarize(genre_counts):
+        """REST response shape: drop records without a genre; returns (genre_counts, top TOP_GENRES genres)."""
+        counts = {g: c for g, c in genre_counts.items() if g}
+        top_genres = sorted(counts.items(), key=lambda x: x[1], reverse=True)[:GenreAnalysisStreamService.TOP_GENRES]
+        return counts, [g for g, _ in top_genres]
+
     @staticmethod
     def perform_genre_analysis(stream_data):
         start = time.time()
-        # Map in parallel
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            mapped = list(ex.map(GenreAnalysisStreamService.map_genre, stream_data))
-        # Reduce
-        reduced = GenreAnalysisStreamService.reduce_counts(mapped)
+        metrics.records(len(stream_data))
+        if isinstance(stream_data, RecordBatch):
+            with metrics.phase("compute"):
+                reduced = GenreAnalysisStreamService.batch_genre_counts(stream_data)
+        else:
+            # Map in parallel
+            with metrics.phase("map"), ThreadPoolExecutor(max_workers=4) as ex:
+                mapped = list(ex.map(GenreAnalysisStreamService.map_genre, stream_data))
+            # Reduce
+            with metrics.phase("reduce"):
+                reduced = GenreAnalysisStreamService.reduce_counts(mapped)
         processing_time = time.time() - start
 
         # Determine top genres (sorted by count descending)
@@ -34,3 +66,39 @@ class GenreAnalysisStreamService:
             "top_genres": top_genres,
             "processing_time": processing_time
         }
+
+
+class GenreCountAccumulator:
+    """Running genre counts folded in chunk by chunk; reports genres changed since the last delta."""
+
+    def __init__(self):
+        self.genre_counts = {}
+        self.changed = {}
+        self.num_records = 0
+
+    def update(self, stream_data):
+        metrics.records(len(stream_data))
+        with metrics.phase("compute"):
+            if isinstance(stream_data, RecordBatch):
+                counts = GenreAnalysisStreamService.batch_genre_counts(stream_data)
+            else:
+                counts = GenreAnalysisStreamService.reduce_counts(
+                    GenreAnalysisStreamService.map_genre(r) for r in stream_data
+                )
+        for genre, count in counts.items():
+            self.genre_counts[genre] = self.genre_counts.get(genre, 0) + count
+            self.changed[genre] = True
+            self.num_records += count
+
+    def summary(self):
+        """(genre_counts, top_genres) of everything folded in so far, in the REST response shape."""
+        return GenreAnalysisStreamService.summarize(self.genre_counts)
+
+    def top_genres(self):
+        return [g for g, _ in sorted(self.genre_counts.items(), key=lambda x: x[1], reverse=True)]
+
+    def delta(self):
+        """Counts of genres changed since the previous call (cumulative values)."""
+        counts = {g: self.genre_counts[g] for g in self.changed}
+        self.changed = {}
+        return counts
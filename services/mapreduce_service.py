@@ -2,13 +2,89 @@
 MapReduce Service for Music Streaming
 Aggregates play counts per song and artist
 """
+import atexit
+import multiprocessing
+import os
+import threading
 import time
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+from services import metrics
+from services.record_batch import RecordBatch
+
+# Available perform_mapreduce engines
+ENGINES = ("threads", "vectorized", "processes")
+DEFAULT_ENGINE = os.getenv("MAPREDUCE_ENGINE", "threads")
+# Worker processes for the "processes" engine
+DEFAULT_WORKERS = int(os.getenv("MAPREDUCE_WORKERS", "0")) or os.cpu_count() or 1
+
+# Workers are never forked from the (multithreaded) servers: a child could inherit locks held by
+# another thread at fork time (logging, metrics, grpc core) and deadlock on them
+START_METHOD = os.getenv(
+    "MAPREDUCE_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn",
+)
+
+_process_pools = {}
+_process_pools_lock = threading.Lock()
+
+
+def get_process_pool(max_workers):
+    """Long-lived process pool shared by all requests in this service process."""
+    with _process_pools_lock:
+        pool = _process_pools.get(max_workers)
+        if pool is None:
+            pool = _process_pools[max_workers] = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context(START_METHOD)
+            )
+            # non-fork pools start workers on demand; start them all now, so every shard of
+            # the first requests gets its own process
+            for f in [pool.submit(os.getpid) for _ in range(max_workers)]:
+                f.result()
+        return pool
+
+
+@atexit.register
+def shutdown_process_pools():
+    with _process_pools_lock:
+        pools = list(_process_pools.values())
+        _process_pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def combine_shard(artist_codes, song_codes, n_songs, offset):
+    """Map + local combiner for one shard: partial counts per (artist, song) pair code."""
+    pairs, counts, first_idx = MapReduceStreamService.count_pairs(artist_codes, song_codes, n_songs)
+    return pairs, counts, first_idx + offset
+
+
+def merge_partials(left, right):
+    """Merge two partial (pairs, counts, first index) results."""
+    pairs = np.concatenate((left[0], right[0]))
+    merged, inverse = np.unique(pairs, return_inverse=True)
+    counts = np.zeros(len(merged), dtype=np.int64)
+    np.add.at(counts, inverse, np.concatenate((left[1], right[1])))
+    first_idx = np.full(len(merged), np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(first_idx, inverse, np.concatenate((left[2], right[2])))
+    return merged, counts, first_idx
+
+
+def _merge_pair(pair):
+    return merge_partials(*pair)
 
 class MapReduceStreamService:
+    # engines that count over a RecordBatch, and the only columns they read
+    BATCH_ENGINES = ("vectorized", "processes")
+    BATCH_FIELDS = ("artist", "song_id")
+
     @staticmethod
     def map_stream(record):
+        if isinstance(record, dict):
+            return (f"{record.get('artist', '')} - {record.get('song_id', '')}", 1)
         key = f"{record.artist} - {record.song_id}"
         return (key, 1)
 
@@ -20,10 +96,104 @@ class MapReduceStreamService:
         return dict(result)
 
     @staticmethod
-    def perform_mapreduce(stream_data):
+    def count_pairs(artist_codes, song_codes, n_songs):
+        """Count (artist, song) code pairs; returns (pair codes, counts, first index)."""
+        pair = artist_codes.astype(np.int64) * n_songs + song_codes
+        pairs, first_idx, counts = np.unique(pair, return_index=True, return_counts=True)
+        return pairs, counts, first_idx
+
+    @staticmethod
+    def pair_keys(batch, pairs, counts, order=None):
+        """Materialize "Artist - SongID" keys for counted pair codes."""
+        n_songs = max(batch.song_id.cardinality, 1)
+        if order is not None:
+            pairs, counts = pairs[order], counts[order]
+        artists = batch.artist.values[pairs // n_songs].tolist()
+        songs = batch.song_id.values[pairs % n_songs].tolist()
+        result = {}
+        for artist, song, count in zip(artists, songs, counts.tolist()):
+            key = f"{artist} - {song}"
+            # distinct pairs can format to the same key, the string reduce merges them
+            result[key] = result.get(key, 0) + count
+        return result
+
+    @staticmethod
+    def vectorized_counts(batch):
+        n_songs = max(batch.song_id.cardinality, 1)
+        with metrics.phase("map"):
+            pairs, counts, first_idx = MapReduceStreamService.count_pairs(
+                batch.artist.codes, batch.song_id.codes, n_songs
+            )
+        # emit keys in first-seen order, like the dict reduce
+        with metrics.phase("reduce"):
+            return MapReduceStreamService.pair_keys(batch, pairs, counts, np.argsort(first_idx, kind="stable"))
+
+    @staticmethod
+    def sharded_counts(batch, max_workers=None):
+        """
+        Split the batch into one shard per worker, run map + combiner for each
+        shard in the process pool and merge the partial counts with a tree reduce.
+        """
+        max_workers = max_workers or DEFAULT_WORKERS
+        n_songs = max(batch.song_id.cardinality, 1)
+        pool = get_process_pool(max_workers)
+        bounds = np.linspace(0, len(batch), max_workers + 1, dtype=np.int64)
+        with metrics.phase("map"):
+            shard_futures = [
+                pool.submit(combine_shard, batch.artist.codes[lo:hi], batch.song_id.codes[lo:hi], n_songs, int(lo))
+                for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+            ]
+            partials = [f.result() for f in shard_futures]
+            if not partials:
+                partials = [combine_shard(batch.artist.codes, batch.song_id.codes, n_songs, 0)]
+
+        with metrics.phase("reduce"):
+            # Tree reduce: merge neighbouring partials level by level, in parallel
+            while len(partials) > 1:
+                merged = list(pool.map(_merge_pair, zip(partials[0::2], partials[1::2])))
+                if len(partials) % 2:
+                    merged.append(partials[-1])
+                partials = merged
+
+            pairs, counts, first_idx = partials[0]
+            return MapReduceStreamService.pair_keys(batch, pairs, counts, np.argsort(first_idx, kind="stable"))
+
+    @staticmethod
+    def perform_mapreduce(stream_data, engine=None, max_workers=None):
+        engine = engine or DEFAULT_ENGINE
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown MapReduce engine '{engine}', expected one of {ENGINES}")
         start = time.time()
-        with ThreadPoolExecutor(max_workers=4) as ex:
-            mapped = list(ex.map(MapReduceStreamService.map_stream, stream_data))
-        reduced = MapReduceStreamService.reduce_counts(mapped)
+        metrics.records(len(stream_data))
+        if engine in MapReduceStreamService.BATCH_ENGINES:
+            batch = RecordBatch.from_records(stream_data, MapReduceStreamService.BATCH_FIELDS)
+        if engine == "vectorized":
+            reduced = MapReduceStreamService.vectorized_counts(batch)
+        elif engine == "processes":
+            reduced = MapReduceStreamService.sharded_counts(batch, max_workers)
+        else:
+            if isinstance(stream_data, RecordBatch):
+                stream_data = list(stream_data.rows())
+            with metrics.phase("map"), ThreadPoolExecutor(max_workers=max_workers or 4) as ex:
+                mapped = list(ex.map(MapReduceStreamService.map_stream, stream_data))
+            with metrics.phase("reduce"):
+                reduced = MapReduceStreamService.reduce_counts(mapped)
         processing_time = time.time() - start
         return {"play_counts": reduced, "processing_time": processing_time}
+
+
+class PlayCountAccumulator:
+    """Running play counts folded in chunk by chunk (for streamed uploads)."""
+
+    def __init__(self, engine=None, max_workers=None):
+        self.engine = engine
+        self.max_workers = max_workers
+        self.play_counts = {}
+        self.num_records = 0
+
+    def update(self, stream_data):
+        counts = MapReduceStreamService.perform_mapreduce(stream_data, self.engine, self.max_workers)["play_counts"]
+        for key, val in counts.items():
+            self.play_counts[key] = self.play_counts.get(key, 0) + val
+        self.num_records += len(stream_data)
+        return counts
@@ -0,0 +1,175 @@
+"""
+Columnar Record Batch
+Dictionary-encoded, NumPy-backed container for streaming play records
+"""
+import io
+
+import numpy as np
+
+STRING_FIELDS = ("user_id", "song_id", "artist", "genre")
+FIELDS = ("user_id", "song_id", "artist", "duration", "timestamp", "genre")
+
+# Sentinel stored in the timestamp column for missing / unparsable values
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+
+class EncodedColumn:
+    """A string column stored as integer codes into a table of unique values."""
+    __slots__ = ("codes", "values")
+
+    def __init__(self, codes, values):
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.values = np.asarray(values, dtype=str)
+
+    @classmethod
+    def encode(cls, strings):
+        values, codes = np.unique(np.asarray(strings, dtype=str), return_inverse=True)
+        return cls(codes.reshape(-1), values)
+
+    @property
+    def cardinality(self):
+        return len(self.values)
+
+    def first_seen_order(self):
+        """Codes ordered by the position of their first occurrence (dict insertion order)."""
+        present, first_idx = np.unique(self.codes, return_index=True)
+        return present[np.argsort(first_idx, kind="stable")]
+
+    def decode(self):
+        return self.values[self.codes].tolist()
+
+    def __len__(self):
+        return len(self.codes)
+
+
+def _get(record, name):
+    if isinstance(record, dict):
+        return record.get(name)
+    return getattr(record, name)
+
+
+def _parse_timestamp(value):
+    try:
+        return np.datetime64(value, "s")
+    except (ValueError, TypeError):
+        return np.datetime64("NaT")
+
+
+def parse_timestamps(strings):
+    """ISO-8601 strings -> int64 epoch seconds (NO_TIMESTAMP where missing or unparsable)."""
+    values = [s or "NaT" for s in strings]
+    try:
+        stamps = np.asarray(values, dtype="datetime64[s]")
+    except (ValueError, TypeError):
+        # one bad value fails the vectorized parse, fall back to value by value
+        stamps = np.array([_parse_timestamp(v) for v in values], dtype="datetime64[s]")
+    return stamps.astype(np.int64)
+
+
+class RecordBatch:
+    """
+    Columnar batch of stream records.
+
+    user_id / song_id / artist / genre are EncodedColumns, duration is an
+    int32 array and timestamp an int64 array of epoch seconds. Build it once
+    per request (from protobuf StreamRecords or dicts) and hand it to the
+    services instead of the per-record objects.
+
+    `fields` limits a batch to the columns a kernel reads; the others are
+    None (and read as None from rows()), so values a kernel never looks at
+    are neither encoded nor validated.
+    """
+
+    def __init__(self, user_id, song_id, artist, duration, timestamp, genre):
+        self.user_id = user_id
+        self.song_id = song_id
+        self.artist = artist
+        self.duration = None if duration is None else np.asarray(duration, dtype=np.int32)
+        self.timestamp = None if timestamp is None else np.asarray(timestamp, dtype=np.int64)
+        self.genre = genre
+
+    @classmethod
+    def from_records(cls, records, fields=FIELDS):
+        """Build a batch from protobuf StreamRecords or record dicts."""
+        if isinstance(records, RecordBatch):
+            return records
+        records = list(records)
+        columns = {name: [] for name in fields}
+        for r in records:
+            for name in fields:
+                columns[name].append(_get(r, name))
+        return cls.from_columns(columns, fields)
+
+    @classmethod
+    def from_columns(cls, columns, fields=FIELDS):
+        """Build a batch from a dict of equally sized per-field sequences."""
+        encoded = {
+            name: EncodedColumn.encode([v if v is not None else "" for v in columns[name]]) if name in fields else None
+            for name in STRING_FIELDS
+        }
+        duration = None
+        if "duration" in fields:
+            duration = np.asarray([int(v or 0) for v in columns["duration"]], dtype=np.int32)
+        timestamp = parse_timestamps(columns["timestamp"]) if "timestamp" in fields else None
+        return cls(duration=duration, timestamp=timestamp, **encoded)
+
+    def __len__(self):
+        for name in FIELDS:
+            column = getattr(self, name)
+            if column is not None:
+                return len(column)
+        return 0
+
+    def rows(self):
+        """Iterate the batch as StreamRow objects (attribute access like StreamRecord)."""
+        missing = [None] * len(self)
+        decoded = [missing if getattr(self, name) is None else getattr(self, name).decode() for name in STRING_FIELDS]
+        durations = missing if self.duration is None else self.duration.tolist()
+        timestamps = missing if self.timestamp is None else self.timestamp_strings()
+        for user_id, song_id, artist, genre, duration, ts in zip(
+            *decoded, durations, timestamps
+        ):
+            yield StreamRow(user_id, song_id, artist, duration, ts, genre)
+
+    def timestamp_strings(self):
+        stamps = self.timestamp.astype("datetime64[s]")
+        return ["" if t == NO_TIMESTAMP else str(s) for t, s in zip(self.timestamp.tolist(), stamps)]
+
+    def to_records(self):
+        """Expand back to a list of record dicts (for dict-based transports)."""
+        return [row._asdict() for row in self.rows()]
+
+    def to_bytes(self):
+        """Serialize the columns (codes + value tables, no pickling) to an .npz blob."""
+        arrays = {"duration": self.duration, "timestamp": self.timestamp}
+        for name in STRING_FIELDS:
+            column = getattr(self, name)
+            arrays[f"{name}.codes"] = column.codes
+            arrays[f"{name}.values"] = column.values
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            encoded = {
+                name: EncodedColumn(arrays[f"{name}.codes"], arrays[f"{name}.values"])
+                for name in STRING_FIELDS
+            }
+            return cls(duration=arrays["duration"], timestamp=arrays["timestamp"], **encoded)
+
+
+class StreamRow:
+    __slots__ = FIELDS
+
+    def __init__(self, user_id, song_id, artist, duration, timestamp, genre):
+        self.user_id = user_id
+        self.song_id = song_id
+        self.artist = artist
+        self.duration = duration
+        self.timestamp = timestamp
+        self.genre = genre
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in FIELDS}
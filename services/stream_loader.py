@@ -0,0 +1,241 @@
+"""
+Chunked CSV Loader
+Streams a play-log CSV in large byte blocks and parses it into typed column
+chunks (RecordBatch, column dicts or record dicts) with bounded memory.
+Columnar dataset files (services/columnar_store.py) are accepted wherever a
+CSV is and are read straight from the memory map, without parsing.
+"""
+import csv
+import gc
+import mmap
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from services.columnar_store import ColumnarDataset, is_columnar
+from services.record_batch import FIELDS, STRING_FIELDS, EncodedColumn, RecordBatch, parse_timestamps
+
+# Records per yielded chunk
+CSV_CHUNK_RECORDS = int(os.getenv("CSV_CHUNK_RECORDS", "65536"))
+# Bytes read from the file at a time
+CSV_BLOCK_BYTES = int(os.getenv("CSV_BLOCK_BYTES", str(4 * 1024 * 1024)))
+# Threads parsing chunks ahead of the consumer (0 = parse inline)
+CSV_PARSE_WORKERS = int(os.getenv("CSV_PARSE_WORKERS", "0"))
+# Read through a memory map instead of buffered reads
+CSV_MMAP = os.getenv("CSV_MMAP", "0") == "1"
+
+# genre is optional, rows without the first five fields are skipped
+REQUIRED_FIELDS = FIELDS[:5]
+
+
+def iter_blocks(csv_path, block_bytes=CSV_BLOCK_BYTES, use_mmap=CSV_MMAP):
+    """Raw file contents in blocks of about block_bytes."""
+    with open(csv_path, "rb") as f:
+        if use_mmap and os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                for start in range(0, len(mm), block_bytes):
+                    yield mm[start:start + block_bytes]
+            return
+        while True:
+            block = f.read(block_bytes)
+            if not block:
+                return
+            yield block
+
+
+def iter_line_chunks(csv_path, chunk_records=CSV_CHUNK_RECORDS, block_bytes=CSV_BLOCK_BYTES, use_mmap=CSV_MMAP):
+    """
+    (header, lines) pairs: the header row and lists of at most chunk_records raw
+    data lines. Fields must not contain embedded newlines.
+    """
+    header, tail, pending = None, b"", []
+    for block in iter_blocks(csv_path, block_bytes, use_mmap):
+        lines = (tail + block).split(b"\n")
+        tail = lines.pop()
+        if header is None and lines:
+            header = next(csv.reader([lines.pop(0).decode("utf-8-sig")]))
+        pending.extend(lines)
+        while len(pending) >= chunk_records:
+            yield header, pending[:chunk_records]
+            del pending[:chunk_records]
+    if tail.strip():
+        if header is None:
+            header, tail = next(csv.reader([tail.decode("utf-8-sig")])), b""
+        pending.append(tail)
+    if pending:
+        yield header, pending
+
+
+def parse_rows(header, lines):
+    """
+    Raw CSV lines -> (field positions, rows). Rows missing a required field are
+    dropped, rows without a genre get "" so every position in the index is present.
+    """
+    index = {name.strip(): i for i, name in enumerate(header)}
+    missing = [name for name in REQUIRED_FIELDS if name not in index]
+    if missing:
+        raise ValueError(f"CSV header is missing field(s): {', '.join(missing)}")
+    index = {name: index[name] for name in FIELDS if name in index}
+
+    rows = list(csv.reader(b"\n".join(lines).decode("utf-8").splitlines()))
+    width = max(index.values()) + 1
+    if rows and min(map(len, rows)) < width:
+        min_width = max(index[name] for name in REQUIRED_FIELDS) + 1
+        rows = [row if len(row) >= width else row + [""] * (width - len(row))
+                for row in rows if len(row) >= min_width]
+    return index, rows
+
+
+def rows_to_columns(index, rows):
+    """{field: list of str} (per-field comprehensions are much faster than zip(*rows))."""
+    empty = [""] * len(rows)
+    return {name: [row[index[name]] for row in rows] if name in index else empty for name in FIELDS}
+
+
+def batch_from_columns(columns):
+    """Typed RecordBatch from rows_to_columns() output (durations still strings)."""
+    encoded = {name: EncodedColumn.encode(columns[name]) for name in STRING_FIELDS}
+    durations = columns["duration"]
+    duration = np.asarray(durations, dtype=np.str_).astype(np.int32) if len(durations) else []
+    return RecordBatch(duration=duration, timestamp=parse_timestamps(columns["timestamp"]), **encoded)
+
+
+def to_batch(index, rows):
+    """Typed RecordBatch for one chunk."""
+    return batch_from_columns(rows_to_columns(index, rows))
+
+
+def to_columns(index, rows):
+    """{field: list} for one chunk, duration as int (what the dict-based transports send)."""
+    columns = rows_to_columns(index, rows)
+    columns["duration"] = [int(v) for v in columns["duration"]]
+    return columns
+
+
+def to_records(index, rows):
+    """Record dicts for one chunk."""
+    u, s, a, d, t = (index[name] for name in REQUIRED_FIELDS)
+    g = index.get("genre")
+    if g is None:
+        return [{"user_id": r[u], "song_id": r[s], "artist": r[a], "duration": int(r[d]),
+                 "timestamp": r[t], "genre": ""} for r in rows]
+    return [{"user_id": r[u], "song_id": r[s], "artist": r[a], "duration": int(r[d]),
+             "timestamp": r[t], "genre": r[g]} for r in rows]
+
+
+# gc_paused() blocks currently open in any thread, and whether the GC was on before the first
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextmanager
+def gc_paused():
+    """
+    Suspend the cyclic GC around bulk allocation of acyclic objects (a parsed
+    chunk is hundreds of thousands of strings and lists it would keep rescanning).
+    Pauses from parallel parse workers overlap: the first one disables the GC
+    and only the last one to finish restores it.
+    """
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def _parse_chunk(convert, header, lines):
+    with gc_paused():
+        return convert(*parse_rows(header, lines))
+
+
+def _parsed(csv_path, convert, chunk_records, block_bytes, use_mmap, workers):
+    chunks = iter_line_chunks(csv_path, chunk_records, block_bytes, use_mmap)
+    if workers <= 0:
+        for header, lines in chunks:
+            yield _parse_chunk(convert, header, lines)
+        return
+    # keep a bounded number of chunks in flight, yielded in file order
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        in_flight = deque()
+        for header, lines in chunks:
+            in_flight.append(ex.submit(_parse_chunk, convert, header, lines))
+            if len(in_flight) > workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def batch_columns(batch):
+    """{field: list} of a RecordBatch (timestamps as ISO-8601 seconds)."""
+    columns = {name: getattr(batch, name).decode() for name in STRING_FIELDS}
+    columns["duration"] = batch.duration.tolist()
+    columns["timestamp"] = batch.timestamp_strings()
+    return columns
+
+
+def batch_records(batch):
+    """Record dicts of a RecordBatch (faster than batch.to_records() for large batches)."""
+    with gc_paused():
+        columns = batch_columns(batch)
+        return [
+            {"user_id": u, "song_id": s, "artist": a, "duration": d, "timestamp": t, "genre": g}
+            for u, s, a, d, t, g in zip(*(columns[name] for name in FIELDS))
+        ]
+
+
+def iter_batches(csv_path, chunk_records=CSV_CHUNK_RECORDS, block_bytes=CSV_BLOCK_BYTES,
+                 use_mmap=CSV_MMAP, workers=CSV_PARSE_WORKERS):
+    """RecordBatch per chunk of at most chunk_records records."""
+    if is_columnar(csv_path):
+        return ColumnarDataset.open(csv_path).iter_batches(chunk_records)
+    return _parsed(csv_path, to_batch, chunk_records, block_bytes, use_mmap, workers)
+
+
+def iter_columns(csv_path, chunk_records=CSV_CHUNK_RECORDS, block_bytes=CSV_BLOCK_BYTES,
+                 use_mmap=CSV_MMAP, workers=CSV_PARSE_WORKERS):
+    """{field: list} per chunk, duration as int."""
+    if is_columnar(csv_path):
+        return map(batch_columns, ColumnarDataset.open(csv_path).iter_batches(chunk_records))
+    return _parsed(csv_path, to_columns, chunk_records, block_bytes, use_mmap, workers)
+
+
+def iter_records(csv_path, chunk_records=CSV_CHUNK_RECORDS, block_bytes=CSV_BLOCK_BYTES,
+                 use_mmap=CSV_MMAP, workers=CSV_PARSE_WORKERS):
+    """List of record dicts per chunk."""
+    if is_columnar(csv_path):
+        return map(batch_records, ColumnarDataset.open(csv_path).iter_batches(chunk_records))
+    return _parsed(csv_path, to_records, chunk_records, block_bytes, use_mmap, workers)
+
+
+def load_records(csv_path, **kwargs):
+    """Every record of the file as a list of dicts."""
+    records = []
+    for chunk in iter_records(csv_path, **kwargs):
+        records.extend(chunk)
+    return records
+
+
+def load_batch(csv_path, block_bytes=CSV_BLOCK_BYTES, use_mmap=CSV_MMAP, workers=CSV_PARSE_WORKERS):
+    """Every record of the file as one RecordBatch (string columns are encoded once, at the end)."""
+    if is_columnar(csv_path):
+        return ColumnarDataset.open(csv_path).batch()
+    columns = {name: [] for name in FIELDS}
+    for chunk in _parsed(csv_path, rows_to_columns, CSV_CHUNK_RECORDS, block_bytes, use_mmap, workers):
+        for name in FIELDS:
+            columns[name].extend(chunk[name])
+    return batch_from_columns(columns)
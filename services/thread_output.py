@@ -0,0 +1,55 @@
+"""
+Per-thread output capture
+Keeps the reports of concurrently dispatched client calls readable: inside
+capture_threads(), each run_captured() call buffers its own prints, and the
+caller writes the buffers out in order once the calls have returned.
+"""
+import io
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ThreadOutput:
+    """sys.stdout proxy: a thread with a capture buffer writes there, all others to the real stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def capture_threads():
+    """Install the ThreadOutput proxy for the block, then put the original sys.stdout back."""
+    previous = sys.stdout
+    sys.stdout = ThreadOutput(previous)
+    try:
+        yield sys.stdout
+    finally:
+        sys.stdout = previous
+
+
+def run_captured(fn, *args):
+    """Run fn with this thread's prints buffered; returns (result, output, elapsed)."""
+    output = sys.stdout
+    if not isinstance(output, ThreadOutput):
+        # outside capture_threads(): prints go straight to the stream
+        start = time.time()
+        return fn(*args), "", time.time() - start
+    output.local.buffer = io.StringIO()
+    start = time.time()
+    try:
+        return fn(*args), output.local.buffer.getvalue(), time.time() - start
+    finally:
+        output.local.buffer = None
@@ -5,27 +5,108 @@ Finds total time listened and favorite artist per user
 import time
 from collections import defaultdict, Counter
 
+import numpy as np
+
+from services import metrics
+from services.record_batch import RecordBatch
+
 class UserBehaviorService:
+    # the only columns batch_user_stats reads
+    BATCH_FIELDS = ("user_id", "artist", "duration")
+
     @staticmethod
-    def analyze_behavior(stream_data):
-        start = time.time()
-        user_time = defaultdict(int)
-        user_artist = defaultdict(list)
+    def batch_user_stats(batch):
+        """Per-user total time and top artist computed on the encoded columns of a RecordBatch."""
+        users = batch.user_id.codes
+        artists = batch.artist.codes
+        n_artists = max(batch.artist.cardinality, 1)
+        user_time = np.bincount(users, weights=batch.duration, minlength=batch.user_id.cardinality)
 
-        for record in stream_data:
-            user_time[record.user_id] += record.duration
-            user_artist[record.user_id].append(record.artist)
+        # Count (user, artist) pairs; ties go to the artist the user played first, as Counter does
+        pair = users.astype(np.int64) * n_artists + artists
+        pairs, first_idx, counts = np.unique(pair, return_index=True, return_counts=True)
+        pair_user = pairs // n_artists
+        order = np.lexsort((first_idx, -counts, pair_user))
+        sorted_user = pair_user[order]
+        keep = np.ones(len(order), dtype=bool)
+        keep[1:] = sorted_user[1:] != sorted_user[:-1]
+        top_artist = np.zeros(batch.user_id.cardinality, dtype=np.int64)
+        top_artist[sorted_user[keep]] = (pairs % n_artists)[order][keep]
 
         user_stats = []
-        for uid in user_time:
-            fav_artist = Counter(user_artist[uid]).most_common(1)[0][0]
+        for code in batch.user_id.first_seen_order().tolist():
             user_stats.append({
-                "user_id": uid,
-                "total_time": user_time[uid],
-                "top_artist": fav_artist
+                "user_id": str(batch.user_id.values[code]),
+                "total_time": int(user_time[code]),
+                "top_artist": str(batch.artist.values[top_artist[code]])
             })
+        return user_stats
+
+    @staticmethod
+    def analyze_behavior(stream_data):
+        start = time.time()
+        metrics.records(len(stream_data))
+        if isinstance(stream_data, RecordBatch):
+            with metrics.phase("compute"):
+                user_stats = UserBehaviorService.batch_user_stats(stream_data)
+        else:
+            user_time = defaultdict(int)
+            user_artist = defaultdict(list)
+
+            with metrics.phase("map"):
+                for record in stream_data:
+                    user_time[record.user_id] += record.duration
+                    user_artist[record.user_id].append(record.artist)
+
+            user_stats = []
+            with metrics.phase("reduce"):
+                for uid in user_time:
+                    fav_artist = Counter(user_artist[uid]).most_common(1)[0][0]
+                    user_stats.append({
+                        "user_id": uid,
+                        "total_time": user_time[uid],
+                        "top_artist": fav_artist
+                    })
 
         # Top 5 active users
         top_users = sorted(user_stats, key=lambda x: x["total_time"], reverse=True)[:5]
         processing_time = time.time() - start
         return {"user_stats": user_stats, "top_users": top_users, "processing_time": processing_time}
+
+
+class UserBehaviorAccumulator:
+    """Running per-user totals folded in chunk by chunk; reports users changed since the last delta."""
+
+    def __init__(self):
+        self.user_time = {}
+        self.user_artists = {}
+        self.changed = {}
+        self.num_records = 0
+
+    def update(self, stream_data):
+        metrics.records(len(stream_data))
+        if isinstance(stream_data, RecordBatch):
+            stream_data = stream_data.rows()
+        with metrics.phase("compute"):
+            for record in stream_data:
+                uid = record.user_id
+                self.user_time[uid] = self.user_time.get(uid, 0) + record.duration
+                self.user_artists.setdefault(uid, Counter())[record.artist] += 1
+                self.changed[uid] = True
+                self.num_records += 1
+
+    def user_stat(self, uid):
+        return {
+            "user_id": uid,
+            "total_time": self.user_time[uid],
+            "top_artist": self.user_artists[uid].most_common(1)[0][0]
+        }
+
+    def top_users(self, n=5):
+        return [uid for uid, _ in sorted(self.user_time.items(), key=lambda x: x[1], reverse=True)[:n]]
+
+    def delta(self):
+        """Stats of users changed since the previous call (cumulative values)."""
+        stats = [self.user_stat(uid) for uid in self.changed]
+        self.changed = {}
+        return stats
@@ -0,0 +1,11 @@
+"""
+Shared test setup: the project root (services/, workflow/) and rest/ (rest_codec,
+rest_server) importable the way the services import them.
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "rest")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
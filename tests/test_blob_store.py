@@ -0,0 +1,78 @@
+"""BlobStore lifecycle: shared content-addressed blobs, TTL sweep."""
+import os
+import threading
+import time
+
+import pytest
+
+from services.blob_store import BlobStore
+from services.record_batch import RecordBatch
+
+RECORDS = [
+    {"user_id": f"u{i % 7}", "song_id": f"s{i % 11}", "artist": f"a{i % 5}", "duration": i,
+     "timestamp": "2024-01-01T00:00:00", "genre": "Pop" if i % 2 else "Rock"}
+    for i in range(200)
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path), ttl=60)
+
+
+def age(store, handle, seconds):
+    past = time.time() - seconds
+    os.utime(store.path(handle), (past, past))
+
+
+def test_concurrent_clients_share_one_blob(store):
+    batch = RecordBatch.from_records(RECORDS)
+    start = threading.Barrier(8)
+    handles, errors = [], []
+
+    def client():
+        try:
+            start.wait()
+            handle = store.put_batch(batch)
+            handles.append(handle)
+            # downstream services reading the batch while other clients upload or finish
+            for _ in range(5):
+                assert store.get_batch(handle).to_records() == batch.to_records()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=client) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(set(handles)) == 1
+    assert os.listdir(store.root) == [handles[0][len("blob:"):]]
+
+
+def test_sweep_removes_only_expired_blobs(store):
+    old = store.put(b"old batch")
+    age(store, old, 120)
+    new = store.put(b"new batch")
+    assert not os.path.exists(store.path(old))
+    assert store.get(new) == b"new batch"
+    with pytest.raises(KeyError):
+        store.get(old)
+
+
+def test_reupload_restarts_ttl(store):
+    handle = store.put(b"shared batch")
+    age(store, handle, 120)
+    # a second client uploading the same batch keeps it alive for everyone
+    assert store.put(b"shared batch") == handle
+    assert store.sweep() == 0
+    assert store.get(handle) == b"shared batch"
+
+
+def test_zero_ttl_keeps_blobs(tmp_path):
+    store = BlobStore(str(tmp_path), ttl=0)
+    handle = store.put(b"kept")
+    age(store, handle, 10 ** 6)
+    assert store.sweep() == 0
+    assert store.get(handle) == b"kept"
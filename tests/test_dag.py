@@ -0,0 +1,81 @@
+"""Workflow DAG executor: dependency order, cycle detection and retries."""
+import threading
+
+import pytest
+
+from workflow.dag import DagExecutor, Stage, StageError
+
+
+def flaky(failures, result):
+    """A stage function raising ConnectionError for its first `failures` calls."""
+    calls = []
+
+    def fn(*args):
+        calls.append(args)
+        if len(calls) <= failures:
+            raise ConnectionError(f"attempt {len(calls)}")
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def test_stages_receive_their_dependencies():
+    dag = DagExecutor([
+        Stage("total", lambda a, b: a + b, deps=("double", "square")),
+        Stage("double", lambda x: 2 * x, deps=("x",)),
+        Stage("square", lambda x: x * x, deps=("x",)),
+    ])
+    assert dag.order.index("total") == 2
+    results, timings, _ = dag.run({"x": 3})
+    assert results == {"double": 6, "square": 9, "total": 15}
+    assert timings["total"].start >= max(timings["double"].end, timings["square"].end)
+    assert dag.critical_path(timings)[-1] == "total"
+
+
+def test_independent_stages_run_in_parallel():
+    barrier = threading.Barrier(2, timeout=5)
+    dag = DagExecutor([Stage("a", barrier.wait), Stage("b", barrier.wait)])
+    results, _, _ = dag.run({})
+    assert sorted(results.values()) == [0, 1]
+
+
+@pytest.mark.parametrize("stages, path", [
+    ([Stage("a", int, deps=("b",)), Stage("b", int, deps=("a",))], "a -> b -> a"),
+    ([Stage("a", int, deps=("a",))], "a -> a"),
+    ([Stage("x", int), Stage("a", int, deps=("x", "c")), Stage("b", int, deps=("a",)), Stage("c", int, deps=("b",))],
+     "a -> c -> b -> a"),
+])
+def test_cycles_are_rejected(stages, path):
+    with pytest.raises(ValueError, match=f"Cycle in workflow: {path}"):
+        DagExecutor(stages)
+
+
+def test_duplicate_stage_and_unknown_input_are_rejected():
+    with pytest.raises(ValueError, match="Duplicate stage 'a'"):
+        DagExecutor([Stage("a", int), Stage("a", int)])
+    with pytest.raises(ValueError, match="unknown input"):
+        DagExecutor([Stage("a", int, deps=("missing",))]).run({})
+
+
+def test_failed_attempts_are_retried():
+    fn = flaky(2, "ok")
+    dag = DagExecutor([Stage("fetch", fn, deps=("url",), retries=2, retry_delay=0)])
+    results, timings, _ = dag.run({"url": "u"})
+    assert results["fetch"] == "ok"
+    assert timings["fetch"].attempts == 3
+    assert fn.calls == [("u",)] * 3
+
+
+def test_exhausted_retries_raise_stage_error():
+    fn = flaky(5, "ok")
+    downstream = flaky(0, "never")
+    dag = DagExecutor([
+        Stage("fetch", fn, retries=1, retry_delay=0),
+        Stage("report", downstream, deps=("fetch",)),
+    ])
+    with pytest.raises(StageError) as info:
+        dag.run({})
+    assert info.value.stage == "fetch"
+    assert isinstance(info.value.error, ConnectionError)
+    assert len(fn.calls) == 2 and downstream.calls == []
@@ -0,0 +1,32 @@
+"""Genre results: the full analysis (gRPC, XML-RPC) and the REST response shape."""
+from services.genre_analysis_service import GenreAnalysisStreamService, GenreCountAccumulator
+from services.record_batch import RecordBatch
+
+# 12 genres plus records without one; genre g{i} is played i + 1 times
+RECORDS = [{"genre": f"g{i}"} for i in range(12) for _ in range(i + 1)] + [{"genre": ""}] * 3
+
+
+def test_full_analysis_reports_every_genre():
+    for data in (RecordBatch.from_records(RECORDS, GenreAnalysisStreamService.BATCH_FIELDS),
+                 list(RecordBatch.from_records(RECORDS).rows())):
+        result = GenreAnalysisStreamService.perform_genre_analysis(data)
+        assert result["genre_counts"][""] == 3
+        assert len(result["genre_counts"]) == 13
+        assert result["top_genres"][:2] == ["g11", "g10"]
+        assert len(result["top_genres"]) == 13
+
+
+def test_rest_shape_drops_empty_genre_and_keeps_top_ten():
+    counts = GenreAnalysisStreamService.perform_genre_analysis(RecordBatch.from_records(RECORDS))["genre_counts"]
+    genre_counts, top_genres = GenreAnalysisStreamService.summarize(counts)
+    assert "" not in genre_counts and len(genre_counts) == 12
+    assert top_genres == [f"g{i}" for i in range(11, 1, -1)]
+
+
+def test_accumulator_matches_one_shot_analysis():
+    acc = GenreCountAccumulator()
+    for lo in range(0, len(RECORDS), 10):
+        acc.update(RecordBatch.from_records(RECORDS[lo:lo + 10]))
+    result = GenreAnalysisStreamService.perform_genre_analysis(RecordBatch.from_records(RECORDS))
+    assert acc.genre_counts == result["genre_counts"]
+    assert acc.summary() == GenreAnalysisStreamService.summarize(result["genre_counts"])
@@ -0,0 +1,54 @@
+"""MapReduce engines: threads, vectorized and processes agree on counts and key order."""
+import os
+
+import pytest
+
+from services import stream_loader
+from services.mapreduce_service import ENGINES, MapReduceStreamService, PlayCountAccumulator
+from services.record_batch import RecordBatch
+STREAM_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "stream_data.csv")
+
+# repeats spread over every shard, a missing artist, and two pairs that format to the same key
+EDGE_RECORDS = [
+    {"artist": "Drake", "song_id": "S1"},
+    {"artist": "A - B", "song_id": "C"},
+    {"artist": "", "song_id": "S2"},
+    {"artist": "A", "song_id": "B - C"},
+    {"artist": "Adele", "song_id": "S1"},
+] * 7 + [{"artist": "Drake", "song_id": "S9"}]
+
+
+@pytest.fixture(params=["csv", "edge"])
+def records(request):
+    return stream_loader.load_records(STREAM_CSV) if request.param == "csv" else EDGE_RECORDS
+
+
+def play_counts(data, engine):
+    return MapReduceStreamService.perform_mapreduce(data, engine, max_workers=3)["play_counts"]
+
+
+def test_engines_agree_in_first_seen_order(records):
+    expected = list(play_counts(records, "threads").items())
+    for engine in ENGINES:
+        assert list(play_counts(records, engine).items()) == expected, engine
+        assert list(play_counts(RecordBatch.from_records(records), engine).items()) == expected, engine
+
+
+def test_colliding_keys_are_merged():
+    counts = play_counts(EDGE_RECORDS, "vectorized")
+    assert counts["A - B - C"] == 14
+    assert list(counts)[:3] == ["Drake - S1", "A - B - C", " - S2"]
+
+
+def test_accumulator_matches_one_shot_counts():
+    records = stream_loader.load_records(STREAM_CSV)
+    acc = PlayCountAccumulator(engine="processes", max_workers=2)
+    for lo in range(0, len(records), 30):
+        acc.update(records[lo:lo + 30])
+    assert acc.play_counts == play_counts(records, "threads")
+    assert acc.num_records == len(records)
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError, match="Unknown MapReduce engine"):
+        MapReduceStreamService.perform_mapreduce(EDGE_RECORDS, "gpu")
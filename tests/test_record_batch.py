@@ -0,0 +1,41 @@
+"""RecordBatch serialization: to_bytes / from_bytes keep every column and value table."""
+import numpy as np
+
+from services.columnar_store import batch_from_bytes, dataset_bytes
+from services.record_batch import FIELDS, STRING_FIELDS, RecordBatch
+
+RECORDS = [
+    {"user_id": "U1", "song_id": "S1", "artist": "Drake", "duration": 200, "timestamp": "2025-11-05T10:53:00", "genre": "Hip-Hop"},
+    {"user_id": "U2", "song_id": "S2", "artist": "Adele", "duration": 0, "timestamp": "", "genre": ""},
+    {"user_id": "U1", "song_id": "S1", "artist": "Drake", "duration": 180, "timestamp": "not a date", "genre": "Hip-Hop"},
+    {"user_id": "U3", "song_id": "S3", "artist": "Émilie Simon", "duration": 241, "timestamp": "1999-12-31T23:59:59", "genre": "Électro"},
+]
+
+
+def assert_same_batch(left, right):
+    for name in STRING_FIELDS:
+        np.testing.assert_array_equal(getattr(left, name).codes, getattr(right, name).codes)
+        np.testing.assert_array_equal(getattr(left, name).values, getattr(right, name).values)
+    np.testing.assert_array_equal(left.duration, right.duration)
+    np.testing.assert_array_equal(left.timestamp, right.timestamp)
+    assert left.to_records() == right.to_records()
+
+
+def test_bytes_round_trip():
+    batch = RecordBatch.from_records(RECORDS)
+    restored = RecordBatch.from_bytes(batch.to_bytes())
+    assert_same_batch(batch, restored)
+    assert restored.to_records()[1]["timestamp"] == restored.to_records()[2]["timestamp"] == ""
+    assert restored.duration.dtype == np.int32 and restored.timestamp.dtype == np.int64
+
+
+def test_empty_batch_round_trip():
+    batch = RecordBatch.from_columns({name: [] for name in FIELDS})
+    restored = RecordBatch.from_bytes(batch.to_bytes())
+    assert len(restored) == 0 and restored.to_records() == []
+
+
+def test_batch_from_bytes_reads_both_formats():
+    batch = RecordBatch.from_records(RECORDS)
+    assert_same_batch(batch_from_bytes(batch.to_bytes()), batch)
+    assert batch_from_bytes(dataset_bytes(RECORDS)).to_records() == batch.to_records()
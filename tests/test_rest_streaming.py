@@ -0,0 +1,87 @@
+"""NDJSON uploads read from raw WSGI input, as the dev server and gunicorn hand it over."""
+import io
+import json
+
+from flask import Flask, request
+from werkzeug.test import EnvironBuilder
+
+import rest_codec
+from rest_server import CountingInput, instrument
+
+LINES = 3
+RECORDS_PER_LINE = 20000
+
+
+class RawBody(io.RawIOBase):
+    """Raw request body counting readinto calls (a byte-at-a-time reader makes one per byte)."""
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        self.reads += 1
+        return self.data.readinto(buffer)
+
+
+class TrickleBody(RawBody):
+    """Raw body returning at most 7 bytes per read, so lines arrive split across reads."""
+
+    def readinto(self, buffer):
+        return super().readinto(memoryview(buffer)[:7])
+
+
+def ndjson_body():
+    chunk = [{"user_id": f"u{i}", "song_id": f"s{i}", "artist": "A", "duration": 1,
+              "timestamp": "2024-01-01T00:00:00", "genre": "Pop"} for i in range(RECORDS_PER_LINE)]
+    return b"".join(json.dumps(chunk).encode() + b"\n" for _ in range(LINES))
+
+
+def test_counting_input_is_read_in_blocks():
+    body = ndjson_body()
+    raw = RawBody(body)
+    values = list(rest_codec.iter_ndjson(CountingInput(raw, "/test")))
+    assert len(values) == LINES
+    assert all(len(v) == RECORDS_PER_LINE for v in values)
+    # 64 KiB blocks: a few dozen reads for ~3 MB, not one per byte
+    assert raw.reads < len(body) // 4096
+
+
+def test_streamed_upload_through_metrics_middleware():
+    app = instrument(Flask(__name__), "test")
+
+    @app.route("/stream", methods=["POST"])
+    def stream():
+        n = sum(len(columns["user_id"]) for columns in rest_codec.request_column_batches(request, 10000))
+        return rest_codec.json_response(request, {"num_records": n})
+
+    body = ndjson_body()
+    raw = RawBody(body)
+    environ = EnvironBuilder(path="/stream", method="POST", content_type="application/x-ndjson").get_environ()
+    # chunked upload: no Content-Length, the server marks the input as terminated
+    environ.pop("CONTENT_LENGTH", None)
+    environ["wsgi.input"] = raw
+    environ["wsgi.input_terminated"] = True
+    status = []
+    response = b"".join(app.wsgi_app(environ, lambda s, h, exc_info=None: status.append(s)))
+
+    assert status[0].startswith("200")
+    assert rest_codec.loads(response)["num_records"] == LINES * RECORDS_PER_LINE
+    assert raw.reads < len(body) // 4096
+
+
+def test_ndjson_lines_split_across_short_reads():
+    records = [{"user_id": f"u{i}", "song_id": "s", "artist": "A", "duration": i,
+                "timestamp": "2024-01-01T00:00:00", "genre": "Pop"} for i in range(9)]
+    lines = [records[0], records[1:4], rest_codec.records_payload(records[4:], "columns")]
+    body = b"\n".join(rest_codec.dumps(line) for line in lines) + b"\n\n"
+    for encoding in (None, "gzip"):
+        data = b"".join(rest_codec.compress_stream([body], encoding))
+        items = list(rest_codec.iter_ndjson(CountingInput(TrickleBody(data), "/test"), encoding))
+        assert items == [rest_codec.loads(rest_codec.dumps(line)) for line in lines]
+        batches = list(rest_codec.iter_column_batches(items, 4))
+        assert [len(b["user_id"]) for b in batches] == [4, 5]
+        assert [d for batch in batches for d in batch["duration"]] == list(range(9))
@@ -0,0 +1,152 @@
+"""
+Workflow DAG Executor
+Runs analytics stages as soon as their inputs are ready, with retries and per-stage timing
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class StageError(RuntimeError):
+    """A stage failed on every attempt."""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """
+    One node of the workflow.
+
+    fn is called with the results of deps, in order. A dep names either
+    another stage or one of the initial inputs passed to DagExecutor.run().
+    """
+
+    def __init__(self, name, fn, deps=(), retries=0, retry_delay=0.5):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, deps={self.deps})"
+
+
+class StageTiming:
+    __slots__ = ("name", "start", "end", "attempts")
+
+    def __init__(self, name, start, end, attempts):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.attempts = attempts
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def _asdict(self):
+        return {
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "attempts": self.attempts,
+        }
+
+
+class DagExecutor:
+    """Dependency-aware executor: every stage whose deps are done runs in parallel."""
+
+    def __init__(self, stages, max_workers=None):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage '{stage.name}'")
+            self.stages[stage.name] = stage
+        self.max_workers = max_workers or max(len(self.stages), 1)
+        self.order = self.topological_order()
+
+    def topological_order(self):
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Cycle in workflow: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                if dep in self.stages:
+                    visit(dep, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def run_stage(self, stage, args, t0):
+        start = time.time() - t0
+        for attempt in range(1, stage.retries + 2):
+            try:
+                result = stage.fn(*args)
+                return result, StageTiming(stage.name, start, time.time() - t0, attempt)
+            except Exception as e:
+                if attempt > stage.retries:
+                    raise StageError(stage.name, e) from e
+                print(f"[Workflow] Stage {stage.name} failed ({e}), retry {attempt}/{stage.retries}")
+                time.sleep(stage.retry_delay * 2 ** (attempt - 1))
+
+    def run(self, inputs):
+        """Execute the DAG; returns (results by stage, StageTiming by stage, wall time)."""
+        for stage in self.stages.values():
+            missing = [d for d in stage.deps if d not in self.stages and d not in inputs]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown input(s): {', '.join(missing)}")
+
+        values = dict(inputs)
+        results, timings = {}, {}
+        pending = list(self.order)
+        running = {}
+        t0 = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            while pending or running:
+                for name in [n for n in pending if all(d in values for d in self.stages[n].deps)]:
+                    stage = self.stages[name]
+                    args = [values[d] for d in stage.deps]
+                    running[ex.submit(self.run_stage, stage, args, t0)] = name
+                    pending.remove(name)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result, timing = future.result()
+                    except StageError:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    values[name] = results[name] = result
+                    timings[name] = timing
+
+        return results, timings, time.time() - t0
+
+    def critical_path(self, timings):
+        """
+        Chain of stages that bounded the run: start from the last stage to finish
+        and walk back through the dependency that finished last.
+        """
+        if not timings:
+            return []
+        name = max(timings, key=lambda n: timings[n].end)
+        path = [name]
+        while True:
+            deps = [d for d in self.stages[name].deps if d in timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: timings[d].end)
+            path.append(name)
+        return path[::-1]
@@ -0,0 +1,229 @@
+"""
+Workflow Transports
+Call the analytics services over gRPC, REST or XML-RPC and normalize the answers to plain dicts:
+
+  mapreduce      -> {play_counts, processing_time}
+  userbehavior   -> {user_stats: [{user_id, total_time, top_artist}], top_users, processing_time}
+  genre          -> {genre_counts, top_genres, processing_time}
+  recommendation -> {trending_songs, recommendations: {user: [songs]}, processing_time}
+"""
+import os
+import sys
+import threading
+from xmlrpc.client import ServerProxy, Transport
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Seconds before a single service call is abandoned (the stage may then retry)
+STAGE_TIMEOUT = float(os.getenv("STAGE_TIMEOUT", "120"))
+
+
+# ───────────────────────────────────────────────
+# gRPC
+# ───────────────────────────────────────────────
+class GrpcTransport:
+    name = "grpc"
+
+    def __init__(self, timeout=STAGE_TIMEOUT):
+        import grpc
+        sys.path.insert(0, os.path.join(PROJECT_ROOT, "grpc", "client", "generated"))
+        import music_service_pb2
+        import music_service_pb2_grpc
+
+        self.pb2 = music_service_pb2
+        self.timeout = timeout
+        options = [
+            ("grpc.max_send_message_length", 64 * 1024 * 1024),
+            ("grpc.max_receive_message_length", 64 * 1024 * 1024),
+        ]
+
+        def stub(stub_cls, host_var, port_var, default_port):
+            addr = f"{os.getenv(host_var, 'localhost')}:{os.getenv(port_var, default_port)}"
+            channel = grpc.insecure_channel(addr, options=options)
+            self.channels.append(channel)
+            return stub_cls(channel)
+
+        self.channels = []
+        self.mapreduce_stub = stub(music_service_pb2_grpc.MapReduceServiceStub, "MAPREDUCE_HOST", "MAPREDUCE_PORT", "50051")
+        self.userbehavior_stub = stub(music_service_pb2_grpc.UserBehaviorServiceStub, "USERBEHAVIOR_HOST", "USERBEHAVIOR_PORT", "50053")
+        self.genre_stub = stub(music_service_pb2_grpc.GenreAnalysisServiceStub, "GENRE_ANALYSIS_HOST", "GENRE_ANALYSIS_PORT", "50055")
+        self.recommendation_stub = stub(music_service_pb2_grpc.RecommendationServiceStub, "RECOMMENDATION_HOST", "RECOMMENDATION_PORT", "50057")
+
+    def encode(self, records):
+        """Build the StreamList once; every analysis stage sends the same message."""
+        return self.pb2.StreamList(records=[
+            self.pb2.StreamRecord(
+                user_id=r["user_id"], song_id=r["song_id"], artist=r["artist"],
+                duration=int(r["duration"]), timestamp=r["timestamp"], genre=r.get("genre") or ""
+            )
+            for r in records
+        ])
+
+    def mapreduce(self, batch):
+        resp = self.mapreduce_stub.AggregateStream(batch, timeout=self.timeout)
+        return {"play_counts": dict(resp.play_counts), "processing_time": resp.processing_time}
+
+    def userbehavior(self, batch):
+        resp = self.userbehavior_stub.AnalyzeUsers(batch, timeout=self.timeout)
+        return {
+            "user_stats": [
+                {"user_id": s.user_id, "total_time": s.total_time, "top_artist": s.top_artist}
+                for s in resp.user_stats
+            ],
+            "top_users": list(resp.top_users),
+            "processing_time": resp.processing_time,
+        }
+
+    def genre(self, batch):
+        resp = self.genre_stub.AnalyzeGenres(batch, timeout=self.timeout)
+        return {
+            "genre_counts": dict(resp.genre_counts),
+            "top_genres": list(resp.top_genres),
+            "processing_time": resp.processing_time,
+        }
+
+    def recommendation_request(self, mapreduce, userbehavior):
+        pb2 = self.pb2
+        return pb2.RecommendationRequest(
+            play_counts=pb2.PlayCounts(play_counts=mapreduce["play_counts"]),
+            user_stats=pb2.UserStatsList(
+                user_stats=[pb2.UserStat(**s) for s in userbehavior["user_stats"]],
+                top_users=userbehavior["top_users"],
+            ),
+        )
+
+    def recommendation(self, mapreduce, userbehavior):
+        req = self.recommendation_request(mapreduce, userbehavior)
+        resp = self.recommendation_stub.Recommend(req, timeout=self.timeout)
+        return {
+            "trending_songs": list(resp.trending_songs),
+            "recommendations": {u: list(r.values) for u, r in resp.recommendations.items()},
+            "processing_time": resp.processing_time,
+        }
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+
+# ───────────────────────────────────────────────
+# REST
+# ───────────────────────────────────────────────
+class RestTransport:
+    name = "rest"
+
+    def __init__(self, timeout=STAGE_TIMEOUT):
+        import requests
+
+        self.requests = requests
+        self.timeout = timeout
+        self.local = threading.local()
+
+        def url(host_var, port_var, default_port, path):
+            return f"http://{os.getenv(host_var, 'localhost')}:{os.getenv(port_var, default_port)}{path}"
+
+        self.mapreduce_url = url("MAPREDUCE_HOST", "MAPREDUCE_PORT", "5001", "/mapreduce")
+        self.userbehavior_url = url("USERBEHAVIOR_HOST", "USERBEHAVIOR_PORT", "5003", "/userbehavior")
+        self.genre_url = url("GENRE_ANALYSIS_HOST", "GENRE_ANALYSIS_PORT", "5005", "/genre_analysis")
+        self.recommendation_url = url("RECOMMENDATION_HOST", "RECOMMENDATION_PORT", "5007", "/recommend")
+
+    def post(self, url, payload):
+        # requests.Session is not thread-safe, keep one per stage thread
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = self.requests.Session()
+        resp = session.post(url, json=payload, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def encode(self, records):
+        return {"records": records}
+
+    def mapreduce(self, batch):
+        return self.post(self.mapreduce_url, batch)
+
+    def userbehavior(self, batch):
+        return self.post(self.userbehavior_url, batch)
+
+    def genre(self, batch):
+        return self.post(self.genre_url, batch)
+
+    def recommendation_request(self, mapreduce, userbehavior):
+        return {
+            "play_counts": mapreduce["play_counts"],
+            "user_stats": userbehavior["user_stats"],
+        }
+
+    def recommendation(self, mapreduce, userbehavior):
+        return self.post(self.recommendation_url, self.recommendation_request(mapreduce, userbehavior))
+
+    def close(self):
+        pass
+
+
+# ───────────────────────────────────────────────
+# XML-RPC
+# ───────────────────────────────────────────────
+class TimeoutTransport(Transport):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def make_connection(self, host):
+        conn = super().make_connection(host)
+        conn.timeout = self.timeout
+        return conn
+
+
+class XmlRpcTransport:
+    """
+    Calls each service's non-forwarding analyze() method, so the chain order
+    baked into NEXT_URL is bypassed. Recommendation is terminal, process() is used as-is.
+    """
+    name = "xmlrpc"
+
+    def __init__(self, timeout=STAGE_TIMEOUT):
+        self.timeout = timeout
+        self.mapreduce_url = os.getenv("MAPREDUCE_URL", "http://localhost:8001")
+        self.userbehavior_url = os.getenv("USERBEHAVIOR_URL", "http://localhost:8003")
+        self.genre_url = os.getenv("GENRE_ANALYSIS_URL", "http://localhost:8005")
+        self.recommendation_url = os.getenv("RECOMMENDATION_URL", "http://localhost:8007")
+
+    def proxy(self, url):
+        # ServerProxy is not thread-safe, stages get a fresh one per call
+        return ServerProxy(url, allow_none=True, transport=TimeoutTransport(self.timeout))
+
+    def encode(self, records):
+        return records
+
+    def mapreduce(self, batch):
+        return self.proxy(self.mapreduce_url).analyze(batch)
+
+    def userbehavior(self, batch):
+        return self.proxy(self.userbehavior_url).analyze(batch)
+
+    def genre(self, batch):
+        return self.proxy(self.genre_url).analyze(batch)
+
+    def recommendation_request(self, mapreduce, userbehavior):
+        return {"mapreduce": mapreduce, "userbehavior": userbehavior}
+
+    def recommendation(self, mapreduce, userbehavior):
+        final = self.proxy(self.recommendation_url).process(None, self.recommendation_request(mapreduce, userbehavior))
+        return final["recommendation"]
+
+    def close(self):
+        pass
+
+
+TRANSPORTS = {
+    "grpc": GrpcTransport,
+    "rest": RestTransport,
+    "xmlrpc": XmlRpcTransport,
+}
+
+
+def make_transport(name, timeout=STAGE_TIMEOUT):
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown transport '{name}', expected one of {tuple(TRANSPORTS)}")
+    return TRANSPORTS[name](timeout)
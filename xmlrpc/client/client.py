@@ -1,9 +1,11 @@
 """
 XML-RPC Client for Music Streaming chained services:
 Client -> MapReduce(XML-RPC) -> UserBehavior -> GenreAnalysis -> Recommendation -> Client
+or, with XMLRPC_TOPOLOGY=fanout, Client -> {MapReduce, UserBehavior, GenreAnalysis} -> Recommendation -> Client
 Saves detailed metrics similar to gRPC JSON (for fair comparison).
 """
-from xmlrpc.client import ServerProxy
+from xmlrpc.client import ServerProxy, Binary
+from concurrent.futures import ThreadPoolExecutor
 import os
 import sys
 import time
@@ -14,30 +16,29 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 CSV_PATH = os.getenv('CSV_PATH', os.path.join(PROJECT_ROOT, 'data', 'stream_data.csv'))
 MAPREDUCE_URL = os.getenv('MAPREDUCE_URL', 'http://localhost:8001')
+USERBEHAVIOR_URL = os.getenv('USERBEHAVIOR_URL', 'http://localhost:8003')
+GENRE_ANALYSIS_URL = os.getenv('GENRE_ANALYSIS_URL', 'http://localhost:8005')
+RECOMMENDATION_URL = os.getenv('RECOMMENDATION_URL', 'http://localhost:8007')
+# "chain" enters at MapReduce and lets each service forward to the next,
+# "fanout" calls the three independent services concurrently, then Recommendation
+XMLRPC_TOPOLOGY = os.getenv('XMLRPC_TOPOLOGY', 'chain')
+# "records" ships the record list down the chain as <struct>s, "binary" sends the
+# columnar batch as one Binary blob (a services/columnar_store.py file image),
+# "blob" uploads the batch once to the shared BlobStore (BLOB_STORE_DIR) and
+# the chain passes only its handle
+XMLRPC_PAYLOAD = os.getenv('XMLRPC_PAYLOAD', 'records')
 OUTPUT_FILE = os.getenv(
     "OUTPUT_FILE",
     os.path.join(os.path.dirname(os.path.dirname(__file__)), "results")
 )
 os.makedirs(OUTPUT_FILE, exist_ok=True)
 
+from services.blob_store import BlobStore
+from services.columnar_store import dataset_bytes
+from services import stream_loader
+
 def load_stream_csv(csv_path):
-    records = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        lines = f.read().splitlines()
-        if not lines:
-            return []
-        for line in lines[1:]:
-            parts = [p.strip() for p in line.split(',')]
-            if len(parts) >= 5:
-                records.append({
-                    'user_id': parts[0],
-                    'song_id': parts[1],
-                    'artist': parts[2],
-                    'duration': int(parts[3]),
-                    'timestamp': parts[4],
-                    'genre': parts[5] if len(parts) > 5 else None
-                })
-    return records
+    return stream_loader.load_records(csv_path)
 
 class ChainedXMLRPCClient:
     def __init__(self, mapreduce_url):
@@ -53,10 +54,67 @@ class ChainedXMLRPCClient:
         self.proxy = None
         print("[Client] Disconnected")
 
-    def start_workflow(self, records):
+    def start_workflow(self, payload):
+        """payload: the record list, or a blob handle in blob payload mode."""
         accumulated = {}
         start = time.time()
-        final = self.proxy.process(records, accumulated)
+        final = self.proxy.process(payload, accumulated)
+        end = time.time()
+        return final, end - start
+
+class FanOutXMLRPCClient:
+    """
+    Coordinator for the fan-out topology: MapReduce, UserBehavior and GenreAnalysis
+    are called concurrently through their non-forwarding analyze() method and
+    Recommendation starts as soon as MapReduce and UserBehavior have answered.
+    """
+
+    def __init__(self, mapreduce_url, userbehavior_url, genre_analysis_url, recommendation_url):
+        self.urls = {
+            'mapreduce': mapreduce_url,
+            'userbehavior': userbehavior_url,
+            'genre_analysis': genre_analysis_url,
+            'recommendation': recommendation_url,
+        }
+        self.call_times = {}
+
+    def proxy(self, name):
+        # ServerProxy is not thread-safe, each call gets its own
+        return ServerProxy(self.urls[name], allow_none=True)
+
+    def connect(self):
+        for name, url in self.urls.items():
+            self.proxy(name).system.listMethods()
+            print(f"[Client] Connected to {name} at {url}")
+
+    def disconnect(self):
+        print("[Client] Disconnected")
+
+    def timed(self, name, fn, *args):
+        start = time.time()
+        result = fn(*args)
+        self.call_times[name] = time.time() - start
+        return result
+
+    def start_workflow(self, payload):
+        """payload: the record list, or a blob handle in blob payload mode."""
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            futures = {
+                name: ex.submit(self.timed, name, self.proxy(name).analyze, payload)
+                for name in ('mapreduce', 'userbehavior', 'genre_analysis')
+            }
+            accumulated = {
+                'mapreduce': futures['mapreduce'].result(),
+                'userbehavior': futures['userbehavior'].result(),
+            }
+            # Recommendation is terminal and only reads the accumulated results
+            recommendation = ex.submit(
+                self.timed, 'recommendation', self.proxy('recommendation').process, None, accumulated
+            )
+            genre_analysis = futures['genre_analysis'].result()
+            final = recommendation.result()
+        final['genre_analysis'] = genre_analysis
         end = time.time()
         return final, end - start
 
@@ -72,15 +130,23 @@ def main():
     print("=" * 70)
     print("XML-RPC MUSIC STREAMING CLIENT")
     print("=" * 70)
+    print(f"Topology: {XMLRPC_TOPOLOGY}")
     print(f"MapReduce entry: {MAPREDUCE_URL}")
     print("=" * 70)
 
-    records = load_stream_csv(CSV_PATH)
-    if not records:
+    if XMLRPC_PAYLOAD == 'records':
+        records = load_stream_csv(CSV_PATH)
+    else:
+        # compact payloads are built straight from the parsed columns
+        records = stream_loader.load_batch(CSV_PATH)
+    if not len(records):
         print("[Client] No records found. Exiting.")
         return
 
-    client = ChainedXMLRPCClient(MAPREDUCE_URL)
+    if XMLRPC_TOPOLOGY == 'fanout':
+        client = FanOutXMLRPCClient(MAPREDUCE_URL, USERBEHAVIOR_URL, GENRE_ANALYSIS_URL, RECOMMENDATION_URL)
+    else:
+        client = ChainedXMLRPCClient(MAPREDUCE_URL)
     try:
         client.connect()
     except Exception as e:
@@ -88,8 +154,20 @@ def main():
         return
 
     try:
-        print(f"[Client] Launching chained workflow with {len(records)} records...")
-        final_results, workflow_time = client.start_workflow(records)
+        upload_time = 0.0
+        payload = records
+        if XMLRPC_PAYLOAD == 'blob':
+            upload_start = time.time()
+            # not deleted afterwards: clients uploading the same batch share the blob, the store's TTL sweep removes it
+            payload = BlobStore().put_batch(records)
+            upload_time = time.time() - upload_start
+            print(f"[Client] Uploaded batch as {payload} in {upload_time:.4f}s")
+        elif XMLRPC_PAYLOAD == 'binary':
+            payload = Binary(dataset_bytes(records))
+            print(f"[Client] Encoded {len(records)} records as a {len(payload.data)} byte columnar batch")
+
+        print(f"[Client] Launching {XMLRPC_TOPOLOGY} workflow with {len(records)} records...")
+        final_results, workflow_time = client.start_workflow(payload)
         print(f"[Client] Workflow finished in {workflow_time:.4f}s")
 
         mapreduce = final_results.get('mapreduce', {})
@@ -103,7 +181,12 @@ def main():
         rec_time = float(recommendation.get('processing_time', 0.0))
 
         total_processing = map_time + user_time + genre_time + rec_time
-        network_overhead = workflow_time - total_processing
+        if XMLRPC_TOPOLOGY == 'fanout':
+            # services overlap: only the slowest dependency chain adds to the end-to-end time
+            critical_processing = max(max(map_time, user_time) + rec_time, genre_time)
+        else:
+            critical_processing = total_processing
+        network_overhead = workflow_time - critical_processing
         avg_service_time = total_processing / 4 if total_processing > 0 else 0
         overhead_pct = (network_overhead / workflow_time * 100) if workflow_time > 0 else 0
 
@@ -136,6 +219,12 @@ def main():
         print(f"GenreAnalysis Time:  {genre_time:.4f}s")
         print(f"Recommendation Time: {rec_time:.4f}s")
         print(f"Total Processing:    {total_processing:.4f}s")
+        if XMLRPC_TOPOLOGY == 'fanout':
+            print(f"Critical Path:       {critical_processing:.4f}s")
+            for name, t in client.call_times.items():
+                print(f"  {name} roundtrip: {t:.4f}s")
+        if XMLRPC_PAYLOAD == 'blob':
+            print(f"Batch Upload Time:   {upload_time:.4f}s")
         print(f"End-to-End Time:     {workflow_time:.4f}s")
         print(f"Network Overhead:    {network_overhead:.4f}s")
         print("="*70)
@@ -144,12 +233,17 @@ def main():
         metrics = {
             "timestamp": datetime.now().isoformat(),
             "protocol": "XML-RPC",
+            "topology": XMLRPC_TOPOLOGY,
+            "payload_mode": XMLRPC_PAYLOAD,
+            "upload_time": upload_time,
             "workflow_time": workflow_time,
             "mapreduce_time": map_time,
             "userbehavior_time": user_time,
             "genre_analysis_time": genre_time,
             "recommendation_time": rec_time,
             "total_processing_time": total_processing,
+            "critical_path_processing_time": critical_processing,
+            "call_roundtrips": getattr(client, 'call_times', {}),
             "network_overhead": network_overhead,
             "summary": {
                 "total_services": 4,
@@ -2,22 +2,25 @@
 XML-RPC MapReduce Service (Music)
 Counts plays per "Artist - SongID" and forwards to UserBehavior Service
 """
-from xmlrpc.server import SimpleXMLRPCServer
-from xmlrpc.client import ServerProxy
+from server_utils import make_server, downstream_proxy, payload_batch, XMLRPC_SERVER_MODE
 import sys
 import os
 import time
 import json
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
 
 # allow importing from project root (adjust if your layout differs)
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from services.mapreduce_service import MapReduceStreamService
+from services.record_batch import RecordBatch
+
 # Config
 HOST = os.getenv('MAPREDUCE_HOST', '0.0.0.0')
 PORT = int(os.getenv('MAPREDUCE_PORT', '8001'))
 NEXT_URL = os.getenv('USERBEHAVIOR_URL', 'http://localhost:8003')
+# "threads" (default), "vectorized" or "processes"; worker count for the latter
+ENGINE = os.getenv('MAPREDUCE_ENGINE', 'threads')
+WORKERS = int(os.getenv('MAPREDUCE_WORKERS', '0')) or None
 
 RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'results')
 os.makedirs(RESULTS_DIR, exist_ok=True)
@@ -27,50 +30,58 @@ class MapReduceXMLHandler:
         self.next_service_url = next_service_url
         print(f"[MapReduce Service] Initialized. Next service: {next_service_url}")
 
-    def process(self, records_data, accumulated_results):
+    def analyze(self, records_data):
         """
-        records_data: list of dicts {user_id, song_id, artist, duration, timestamp}
-        accumulated_results: dict (can be empty)
+        Count plays without forwarding (used by the workflow DAG runner).
+        records_data: list of dicts {user_id, song_id, artist, duration, timestamp},
+                      or a compact batch payload (blob handle / Binary)
         """
         try:
-            n = len(records_data or [])
-            print(f"[MapReduce Service] Processing {n} records...")
             start = time.time()
+            records = payload_batch(records_data)
+            if records is None:
+                records = records_data or []
+                # only the batch engines count over columns; encode just the two they read
+                if ENGINE in MapReduceStreamService.BATCH_ENGINES:
+                    records = RecordBatch.from_records(records, MapReduceStreamService.BATCH_FIELDS)
+            n = len(records)
+            print(f"[MapReduce Service] Processing {n} records...")
 
-            # Map phase (parallel) — key = "Artist - SongID"
-            def map_fn(r):
-                key = f"{r.get('artist', '')} - {r.get('song_id', '')}"
-                return (key, 1)
-
-            mapped = []
-            with ThreadPoolExecutor(max_workers=4) as ex:
-                mapped = list(ex.map(map_fn, records_data))
-
-            # Reduce
-            counts = defaultdict(int)
-            for k, v in mapped:
-                counts[k] += v
+            # Map + reduce — key = "Artist - SongID"
+            counts = MapReduceStreamService.perform_mapreduce(records, engine=ENGINE, max_workers=WORKERS)['play_counts']
 
             processing_time = time.time() - start
 
             # Serializables
             play_counts = {str(k): int(v) for k, v in counts.items()}
 
-            accumulated_results = accumulated_results or {}
-            accumulated_results['mapreduce'] = {
-                'play_counts': play_counts,
-                'processing_time': processing_time
-            }
-
             print(f"[MapReduce] Processed {n} records")
             print(f"[MapReduce] Top counts (sample):")
             for i, (k, v) in enumerate(sorted(play_counts.items(), key=lambda x: x[1], reverse=True)[:10], 1):
                 print(f"  {i}. {k}: {v} plays")
             print(f"[MapReduce] Processing time: {processing_time:.4f} seconds")
+            return {
+                'play_counts': play_counts,
+                'processing_time': processing_time
+            }
+
+        except Exception as e:
+            print(f"[MapReduce Service] Error: {e}")
+            raise
+
+    def process(self, records_data, accumulated_results):
+        """
+        records_data: list of dicts {user_id, song_id, artist, duration, timestamp},
+                      or a compact batch payload (forwarded as-is)
+        accumulated_results: dict (can be empty)
+        """
+        try:
+            accumulated_results = accumulated_results or {}
+            accumulated_results['mapreduce'] = self.analyze(records_data)
             print(f"[MapReduce Service] Forwarding to UserBehavior Service...")
 
             # Forward to next service
-            next_service = ServerProxy(self.next_service_url, allow_none=True)
+            next_service = downstream_proxy(self.next_service_url)
             final = next_service.process(records_data, accumulated_results)
             return final
 
@@ -79,13 +90,14 @@ class MapReduceXMLHandler:
             raise
 
 def main():
-    server = SimpleXMLRPCServer((HOST, PORT), allow_none=True, logRequests=False)
+    server = make_server(HOST, PORT, service='mapreduce')
     server.register_introspection_functions()
     handler = MapReduceXMLHandler(NEXT_URL)
     server.register_instance(handler)
 
     print("=" * 70)
     print(f"MapReduce XML-RPC Service started on {HOST}:{PORT}")
+    print(f"Server mode: {XMLRPC_SERVER_MODE}")
     print(f"Next (chained) service: {NEXT_URL}")
     print("=" * 70)
     try:
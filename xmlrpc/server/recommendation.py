@@ -2,7 +2,7 @@
 XML-RPC Recommendation Service (Music)
 Terminal service: compute trending songs and user recommendations, return final accumulated results.
 """
-from xmlrpc.server import SimpleXMLRPCServer
+from server_utils import make_server, XMLRPC_SERVER_MODE
 import sys
 import os
 import time
@@ -11,6 +11,8 @@ from collections import Counter
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from services import metrics
+
 HOST = os.getenv('RECOMMENDATION_HOST', '0.0.0.0')
 PORT = int(os.getenv('RECOMMENDATION_PORT', '8007'))
 
@@ -29,20 +31,21 @@ class RecommendationXMLHandler:
             play_counts = accumulated_results.get('mapreduce', {}).get('play_counts', {})
             user_stats = accumulated_results.get('userbehavior', {}).get('user_stats', [])
 
-            # compute trending (top 5)
-            counter = Counter(play_counts)
-            top5 = [k for k, _ in counter.most_common(5)]
-
-            # recommendations per user: exclude songs containing their top_artist
-            recommendations = {}
-            for u in user_stats:
-                uid = u.get('user_id')
-                fav = u.get('top_artist', '')
-                recs = [s for s in top5 if fav and fav not in s]
-                # if none left, just return top5
-                if not recs:
-                    recs = top5.copy()
-                recommendations[str(uid)] = recs
+            with metrics.phase('compute'):
+                # compute trending (top 5)
+                counter = Counter(play_counts)
+                top5 = [k for k, _ in counter.most_common(5)]
+
+                # recommendations per user: exclude songs containing their top_artist
+                recommendations = {}
+                for u in user_stats:
+                    uid = u.get('user_id')
+                    fav = u.get('top_artist', '')
+                    recs = [s for s in top5 if fav and fav not in s]
+                    # if none left, just return top5
+                    if not recs:
+                        recs = top5.copy()
+                    recommendations[str(uid)] = recs
 
             processing_time = time.time() - start
 
@@ -62,13 +65,14 @@ class RecommendationXMLHandler:
             raise
 
 def main():
-    server = SimpleXMLRPCServer((HOST, PORT), allow_none=True, logRequests=False)
+    server = make_server(HOST, PORT, service='recommendation')
     server.register_introspection_functions()
     handler = RecommendationXMLHandler()
     server.register_instance(handler)
 
     print("=" * 70)
     print(f"Recommendation XML-RPC Service started on {HOST}:{PORT}")
+    print(f"Server mode: {XMLRPC_SERVER_MODE}")
     print("Terminal service - returns full accumulated results")
     print("=" * 70)
     try:
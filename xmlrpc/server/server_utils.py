@@ -0,0 +1,132 @@
+"""
+Shared XML-RPC server plumbing
+Threaded server with HTTP/1.1 keep-alive, cached keep-alive proxies for the next hop,
+decoding of the compact batch payloads (blob handle / Binary) and the service
+metrics (every call counted, GET /metrics on the same port)
+"""
+import os
+import sys
+import socketserver
+import threading
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+from xmlrpc.client import ServerProxy, Binary, Fault, loads, dumps
+
+# allow importing from project root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from services import metrics
+from services.blob_store import BlobStore, is_handle
+from services.columnar_store import batch_from_bytes
+
+# "threads" serves each connection on its own thread, "single" is the old one-request-at-a-time server
+XMLRPC_SERVER_MODE = os.getenv('XMLRPC_SERVER_MODE', 'threads')
+
+
+class MetricsRequestHandler(SimpleXMLRPCRequestHandler):
+    """XML-RPC over POST, the metrics registry on GET /metrics."""
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.report_404()
+            return
+        body = metrics.REGISTRY.render()
+        self.send_response(200)
+        self.send_header('Content-Type', metrics.CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class KeepAliveRequestHandler(MetricsRequestHandler):
+    # HTTP/1.1 keeps the connection open between calls (xmlrpc.client.Transport reuses it)
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+
+class MetricsXMLRPCServer(SimpleXMLRPCServer):
+    """SimpleXMLRPCServer whose calls are counted and timed per method."""
+
+    def _marshaled_dispatch(self, data, dispatch_method=None, path=None):
+        # same flow as SimpleXMLRPCDispatcher._marshaled_dispatch, with the phases timed
+        method, status = 'unknown', 'OK'
+        timer = None
+        try:
+            with metrics.phase('deserialize'):
+                params, name = loads(data, use_builtin_types=self.use_builtin_types)
+            # client-chosen names only become labels when they are served
+            if name in self.funcs or (self.instance is not None and hasattr(self.instance, name)):
+                method = name
+            timer = metrics.RequestTimer(method)
+            if dispatch_method is not None:
+                response = dispatch_method(name, params)
+            else:
+                response = self._dispatch(name, params)
+            with metrics.phase('serialize'):
+                response = dumps((response,), methodresponse=1, allow_none=self.allow_none, encoding=self.encoding)
+        except Fault as fault:
+            status = 'FAULT'
+            response = dumps(fault, allow_none=self.allow_none, encoding=self.encoding)
+        except BaseException as exc:
+            status = 'FAULT'
+            response = dumps(Fault(1, "%s:%s" % (type(exc), exc)), encoding=self.encoding, allow_none=self.allow_none)
+        response = response.encode(self.encoding, 'xmlcharrefreplace')
+        metrics.BYTES_IN.inc(method, amount=len(data))
+        metrics.BYTES_OUT.inc(method, amount=len(response))
+        if timer is None:
+            timer = metrics.RequestTimer(method)
+        timer.finish(status)
+        return response
+
+
+class ThreadedXMLRPCServer(socketserver.ThreadingMixIn, MetricsXMLRPCServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+def make_server(host, port, mode=None, service=None):
+    mode = mode or XMLRPC_SERVER_MODE
+    if mode not in ('threads', 'single'):
+        raise ValueError(f"Unknown XML-RPC server mode '{mode}', expected 'threads' or 'single'")
+    if service:
+        metrics.configure(service, 'xmlrpc')
+    if mode == 'single':
+        # a kept-alive connection would hold the only worker, stay on HTTP/1.0 here
+        return MetricsXMLRPCServer((host, port), requestHandler=MetricsRequestHandler,
+                                   allow_none=True, logRequests=False)
+    return ThreadedXMLRPCServer((host, port), requestHandler=KeepAliveRequestHandler,
+                                allow_none=True, logRequests=False)
+
+
+_proxies = threading.local()
+
+
+def downstream_proxy(url):
+    """
+    ServerProxy for the next service, cached per thread: a proxy owns one
+    persistent connection and must not be shared between request threads.
+    """
+    cache = getattr(_proxies, 'cache', None)
+    if cache is None:
+        cache = _proxies.cache = {}
+    proxy = cache.get(url)
+    if proxy is None:
+        proxy = cache[url] = ServerProxy(url, allow_none=True)
+    return proxy
+
+
+# Batches uploaded by the client in blob payload mode
+BLOBS = BlobStore()
+
+
+def payload_batch(records_data):
+    """
+    RecordBatch for a compact payload: a blob handle (XMLRPC_PAYLOAD=blob) or an
+    xmlrpc.client.Binary holding a columnar file image or RecordBatch.to_bytes()
+    (XMLRPC_PAYLOAD=binary).
+    Returns None for a plain list of record dicts.
+    """
+    if isinstance(records_data, Binary):
+        return batch_from_bytes(records_data.data)
+    if is_handle(records_data):
+        return BLOBS.get_batch(records_data)
+    return None
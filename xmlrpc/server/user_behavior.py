@@ -2,16 +2,17 @@
 XML-RPC UserBehavior Service (Music)
 Analyzes per-user total listening time and top artist, forwards to Recommendation Service.
 """
-from xmlrpc.server import SimpleXMLRPCServer
-from xmlrpc.client import ServerProxy
+from server_utils import make_server, downstream_proxy, payload_batch, XMLRPC_SERVER_MODE
 import sys
 import os
 import time
 import json
-from collections import defaultdict, Counter
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
+from services.record_batch import RecordBatch
+from services.user_behavior_service import UserBehaviorService
+
 HOST = os.getenv('USERBEHAVIOR_HOST', '0.0.0.0')
 PORT = int(os.getenv('USERBEHAVIOR_PORT', '8003'))
 NEXT_URL = os.getenv('GENRE_ANALYSIS_URL', 'http://localhost:8005')
@@ -24,51 +25,48 @@ class UserBehaviorXMLHandler:
         self.next_service_url = next_service_url
         print(f"[UserBehavior Service] Initialized. Next service: {next_service_url}")
 
-    def process(self, records_data, accumulated_results):
+    def analyze(self, records_data):
+        """
+        Per-user stats without forwarding (used by the workflow DAG runner).
+        records_data: list of record dicts, or a compact batch payload (blob handle / Binary)
+        """
         try:
-            n = len(records_data or [])
-            print(f"[UserBehavior Service] Received {n} records")
             start = time.time()
-
-            user_time = defaultdict(int)
-            user_artists = defaultdict(list)
-
-            for r in records_data:
-                uid = r.get('user_id')
-                dur = int(r.get('duration', 0))
-                art = r.get('artist', '')
-                user_time[uid] += dur
-                user_artists[uid].append(art)
-
-            user_stats = []
-            for uid, t in user_time.items():
-                top_artist = Counter(user_artists[uid]).most_common(1)[0][0] if user_artists[uid] else ""
-                user_stats.append({
-                    'user_id': str(uid),
-                    'total_time': int(t),
-                    'top_artist': str(top_artist)
-                })
-
+            batch = payload_batch(records_data)
+            if batch is not None:
+                print(f"[UserBehavior Service] Received {len(batch)} records (columnar batch)")
+            else:
+                print(f"[UserBehavior Service] Received {len(records_data or [])} records")
+                batch = RecordBatch.from_records(records_data or [], UserBehaviorService.BATCH_FIELDS)
+
+            result = UserBehaviorService.analyze_behavior(batch)
+            user_stats = result['user_stats']
             # top users by total_time
-            top_users_sorted = sorted(user_time.items(), key=lambda x: x[1], reverse=True)[:5]
-            top_users = [uid for uid, _ in top_users_sorted]
+            top_users = [u['user_id'] for u in result['top_users']]
 
             processing_time = time.time() - start
 
-            accumulated_results = accumulated_results or {}
-            accumulated_results['userbehavior'] = {
+            print(f"[UserBehavior] Processed {len(user_stats)} users")
+            for s in user_stats[:10]:
+                print(f"  • User {s['user_id']}: {s['total_time']}s listened, Top Artist: {s['top_artist']}")
+            print(f"[UserBehavior] Processing time: {processing_time:.4f} seconds")
+            return {
                 'user_stats': user_stats,
                 'top_users': top_users,
                 'processing_time': processing_time
             }
 
-            print(f"[UserBehavior] Processed {len(user_stats)} users")
-            for s in user_stats[:10]:
-                print(f"  • User {s['user_id']}: {s['total_time']}s listened, Top Artist: {s['top_artist']}")
-            print(f"[UserBehavior] Processing time: {processing_time:.4f} seconds")
+        except Exception as e:
+            print(f"[UserBehavior Service] Error: {e}")
+            raise
+
+    def process(self, records_data, accumulated_results):
+        try:
+            accumulated_results = accumulated_results or {}
+            accumulated_results['userbehavior'] = self.analyze(records_data)
             print("[UserBehavior Service] Forwarding to Recommendation Service...")
 
-            next_svc = ServerProxy(self.next_service_url, allow_none=True)
+            next_svc = downstream_proxy(self.next_service_url)
             final = next_svc.process(records_data, accumulated_results)
             return final
 
@@ -77,13 +75,14 @@ class UserBehaviorXMLHandler:
             raise
 
 def main():
-    server = SimpleXMLRPCServer((HOST, PORT), allow_none=True, logRequests=False)
+    server = make_server(HOST, PORT, service='userbehavior')
     server.register_introspection_functions()
     handler = UserBehaviorXMLHandler(NEXT_URL)
     server.register_instance(handler)
 
     print("=" * 70)
     print(f"UserBehavior XML-RPC Service started on {HOST}:{PORT}")
+    print(f"Server mode: {XMLRPC_SERVER_MODE}")
     print(f"Next (chained) service: {NEXT_URL}")
     print("=" * 70)
     try: